@@ -118,6 +118,10 @@ class GIRASoccerReferee(RCJSoccerReferee):
             return
         self.observer.stop()
 
+    def close(self):
+        self.stop_watchdog()
+        super().close()
+
     def send(self, __key, **args):
         messageString = json.dumps({"msg": __key, "args": args})
         self.sv.wwiSendText(messageString)
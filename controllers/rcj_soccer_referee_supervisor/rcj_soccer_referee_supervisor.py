@@ -1,26 +1,43 @@
 import logging
 import os
+import random
+import sys
 from datetime import datetime
 from math import ceil
 from pathlib import Path, PosixPath
-
-from gira_soccer_referee import GIRASoccerReferee
-from gira_soccer_supervisor import GIRASoccerSupervisor
+from typing import Dict, List, Optional, Tuple, Union
 
 from recorder.consts import RecordingFormat
+from recorder.pipeline import RecorderPipeline
 from recorder.recorder import (
     BaseVideoRecordAssistant,
     MP4VideoRecordAssistant,
+    TrajectoryRecordAssistant,
     X3DVideoRecordAssistant,
 )
-from referee.consts import DEFAULT_MATCH_TIME, TIME_STEP
-from referee.event_handlers import DrawMessageHandler, JSONLoggerHandler
+from recorder.replay import TrajectoryReplay
+from recorder.trajectory import TrajectoryPlayer
+from referee.binary_log import BinaryLoggerHandler
+from referee.config import load_config
+from referee.consts import TIME_STEP
+from referee.event_handlers import (
+    BufferedJSONLoggerHandler,
+    DrawMessageHandler,
+    EventHandler,
+)
+from referee.referee import RCJSoccerReferee
+from referee.resources import ResourceMonitor
+from referee.session import load_session, SessionHalf
+from referee.supervisor import RCJSoccerSupervisor
+
+ReflogHandler = Union[BufferedJSONLoggerHandler, BinaryLoggerHandler]
 
 
 def get_video_recorder_class(rec_format: str) -> BaseVideoRecordAssistant:
     return {
         RecordingFormat.MP4.value: MP4VideoRecordAssistant,
         RecordingFormat.X3D.value: X3DVideoRecordAssistant,
+        RecordingFormat.TRAJECTORY.value: TrajectoryRecordAssistant,
     }[rec_format]
 
 
@@ -45,96 +62,266 @@ def output_path(
     return directory / filename
 
 
-TEAM_YELLOW = os.environ.get("RCJ_SIM_TEAM_YELLOW_NAME", "The Yellows")
-TEAM_YELLOW_ID = os.environ.get("RCJ_SIM_TEAM_YELLOW_ID", "The Yellows")
-YELLOW_INITIAL_SCORE = os.environ.get("RCJ_SIM_TEAM_Y_INITIAL_SCORE", "0")
-TEAM_YELLOW_INITIAL_SCORE = int(YELLOW_INITIAL_SCORE or "0")
+def create_recorders(
+    supervisor: RCJSoccerSupervisor,
+    output_prefix: Path,
+    rec_formats: List[str],
+) -> List[BaseVideoRecordAssistant]:
+    recorders = []
+    available_recording_formats = RecordingFormat.all()
+    for rec_format in rec_formats:
+        if rec_format not in available_recording_formats:
+            raise ValueError(f"Unexpected video format {rec_format}")
 
-TEAM_BLUE = os.environ.get("RCJ_SIM_TEAM_BLUE_NAME", "The Blues")
-TEAM_BLUE_ID = os.environ.get("RCJ_SIM_TEAM_BLUE_ID", "The Blues")
-BLUE_INITIAL_SCORE = os.environ.get("RCJ_SIM_TEAM_B_INITIAL_SCORE", "0")
-TEAM_BLUE_INITIAL_SCORE = int(BLUE_INITIAL_SCORE or "0")
+        recorder_class = get_video_recorder_class(rec_format)
+        rec_suffix = recorder_class.output_suffix
 
-MATCH_ID = os.environ.get("RCJ_SIM_MATCH_ID", "1")
-HALF_ID = int(os.environ.get("RCJ_SIM_HALF_ID", 1))
+        recorders.append(
+            recorder_class(
+                supervisor=supervisor,
+                output_path=str(output_prefix.with_suffix(f".{rec_suffix}")),
+                resolution="720p",
+            )
+        )
+    return recorders
 
-REC_FORMATS_RAW = os.environ.get("RCJ_SIM_REC_FORMATS", "").split(",")
-REC_FORMATS = [f for f in REC_FORMATS_RAW if f]
-MATCH_TIME = int(os.environ.get("RCJ_SIM_MATCH_TIME", DEFAULT_MATCH_TIME))
 
-automatic_mode = True if "RCJ_SIM_AUTO_MODE" in os.environ.keys() else False
+def finish_recordings(
+    supervisor: RCJSoccerSupervisor,
+    recorders: List[BaseVideoRecordAssistant],
+    output_prefix: Path,
+    artifacts_path: Optional[str] = None,
+    last: bool = True,
+):
+    pipeline = RecorderPipeline(
+        recorders,
+        artifacts_dir=Path(artifacts_path) if artifacts_path else None,
+    )
+    pipeline.stop_recording()
 
-REFLOG_OUTPUT_PATH = os.environ.get("RCJ_SIM_OUTPUT_PATH", "reflog")
-directory = Path(REFLOG_OUTPUT_PATH)
-output_prefix = output_path(
-    directory,
-    TEAM_BLUE_ID,
-    TEAM_YELLOW_ID,
-    MATCH_ID,
-    HALF_ID,
-)
-reflog_path = output_prefix.with_suffix(".jsonl")
-
-supervisor = GIRASoccerSupervisor()
-referee = GIRASoccerReferee(
-    supervisor=supervisor,
-    match_time=MATCH_TIME,
-    progress_check_steps=ceil(15 / (TIME_STEP / 1000.0)),
-    progress_check_threshold=0.5,
-    ball_progress_check_steps=ceil(10 / (TIME_STEP / 1000.0)),
-    ball_progress_check_threshold=0.5,
-    team_name_blue=TEAM_BLUE,
-    team_name_yellow=TEAM_YELLOW,
-    initial_score_blue=TEAM_BLUE_INITIAL_SCORE,
-    initial_score_yellow=TEAM_YELLOW_INITIAL_SCORE,
-    penalty_area_allowed_time=15,
-    penalty_area_reset_after=2,
-    match_id=MATCH_ID,
-    half_id=HALF_ID,
-)
+    if automatic_mode:
+        # Let whoever runs the matches know that the simulation is over, so
+        # that the next match can start while the recordings are being
+        # finalized
+        output_prefix.with_suffix(".done").touch()
 
-recorders = []
-available_recording_formats = RecordingFormat.all()
-for rec_format in REC_FORMATS:
-    if rec_format not in available_recording_formats:
-        raise ValueError(f"Unexpected video format {rec_format}")
+    logging.info("Processing the recordings...")
+    pipeline.wait()
 
-    recorder_class = get_video_recorder_class(rec_format)
-    rec_suffix = recorder_class.output_suffix
+    # Unless the session goes on with its next half
+    if automatic_mode and last:
+        supervisor.simulationQuit(0)
 
-    recorders.append(
-        recorder_class(
-            supervisor=supervisor,
-            output_path=str(output_prefix.with_suffix(f".{rec_suffix}")),
-            resolution="720p",
-        )
-    )
 
-if automatic_mode:
-    supervisor.simulationSetMode(supervisor.SIMULATION_MODE_FAST)
+def replay(supervisor: RCJSoccerSupervisor, replay_path: Path):
+    """Replay the recorded trajectory while recording it in the other
+    formats."""
+    output_prefix = directory / replay_path.stem
+    rec_formats = [
+        rec_format
+        for rec_format in REC_FORMATS
+        if rec_format != RecordingFormat.TRAJECTORY.value
+    ]
+    recorders = create_recorders(supervisor, output_prefix, rec_formats)
+
+    if automatic_mode:
+        supervisor.simulationSetMode(supervisor.SIMULATION_MODE_FAST)
     for recorder in recorders:
         recorder.start_recording()
 
-referee.add_event_subscriber(JSONLoggerHandler(reflog_path))
-referee.add_event_subscriber(DrawMessageHandler())
+    player = TrajectoryPlayer(str(replay_path))
+    TrajectoryReplay(supervisor, player).run()
+    player.close()
 
-referee.kickoff()
+    supervisor.simulationSetMode(supervisor.SIMULATION_MODE_PAUSE)
+    finish_recordings(supervisor, recorders, output_prefix, ARTIFACTS_PATH)
 
-# The "event" loop for the referee
-while supervisor.step(TIME_STEP) != -1:
-    # If the tick does not return True, the match has ended and the event loop
-    # can stop
-    if not referee.tick():
-        break
 
-# When end of match, pause simulator immediately
-supervisor.simulationSetMode(supervisor.SIMULATION_MODE_PAUSE)
+def add_event_subscribers(
+    referee: RCJSoccerReferee,
+    output_prefix: Path,
+    config: dict,
+    recorders: List[BaseVideoRecordAssistant],
+) -> List[ReflogHandler]:
+    """Subscribe the reflogs, the messages and the recorders to the events.
 
-for recorder in recorders:
-    if recorder.is_recording():
-        recorder.stop_recording()
-        logging.info(f"Processing {recorder.output_suffix} video...")
-        recorder.wait_processing()
+    Returns:
+        list: The handlers of the reflogs, which need to be closed
+    """
+    reflog_handlers: List[ReflogHandler] = [
+        BufferedJSONLoggerHandler(output_prefix.with_suffix(".jsonl"))
+    ]
+    if config["recording"]["binary_reflog"]:
+        binary_reflog_path = output_prefix.with_suffix(".rcjlog")
+        reflog_handlers.append(BinaryLoggerHandler(binary_reflog_path))
+    for reflog_handler in reflog_handlers:
+        referee.add_event_subscriber(reflog_handler)
+    if not headless:
+        referee.add_event_subscriber(DrawMessageHandler())
+    for recorder in recorders:
+        # Recorders which also record the events
+        if isinstance(recorder, EventHandler):
+            referee.add_event_subscriber(recorder)
+    return reflog_handlers
+
+
+def create_resource_monitor(config: dict) -> Optional[ResourceMonitor]:
+    if not config["recording"]["resources"]:
+        return None
+    if not ResourceMonitor.is_supported():
+        print("WARNING: The resources can only be sampled on Linux")
+        return None
+    return ResourceMonitor(config["recording"]["step_budget"])
+
+
+def write_resource_report(monitor: ResourceMonitor, output_prefix: Path):
+    """Write the resources used by the controllers next to the reflog."""
+    path = output_prefix.parent / f"{output_prefix.name}.resources.json"
+    report = monitor.write(path)
+    for controller in report["controllers"]:
+        if controller["over_budget"]:
+            print(
+                f"WARNING: {controller['name']} used "
+                f"{controller['step_time']:.1f} ms of CPU time per step"
+            )
+
+
+def play_half(
+    supervisor: RCJSoccerSupervisor,
+    half: SessionHalf,
+    initial_scores: Tuple[int, int],
+    first: bool = True,
+    last: bool = True,
+) -> Tuple[int, int]:
+    """Referee the half and record it.
+
+    Returns:
+        tuple: The final scores of the blue and the yellow team
+    """
+    config = half.config
+    match_id = config["match"]["id"]
+    half_id = config["match"]["half"]
+    rec_formats = config["recording"]["formats"]
+    output_prefix = output_path(
+        Path(config["recording"]["output_path"]),
+        config["blue"]["id"],
+        config["yellow"]["id"],
+        match_id,
+        half_id,
+    )
+
+    referee = Referee(
+        supervisor=supervisor,
+        match_time=config["match"]["time"],
+        progress_check_steps=ceil(15 / (TIME_STEP / 1000.0)),
+        progress_check_threshold=0.5,
+        ball_progress_check_steps=ceil(10 / (TIME_STEP / 1000.0)),
+        ball_progress_check_threshold=0.5,
+        team_name_blue=config["blue"]["name"],
+        team_name_yellow=config["yellow"]["name"],
+        initial_score_blue=initial_scores[0],
+        initial_score_yellow=initial_scores[1],
+        penalty_area_allowed_time=15,
+        penalty_area_reset_after=2,
+        match_id=match_id,
+        half_id=half_id,
+        broadcast_on_change=config["referee"]["broadcast_on_change"],
+        asynchronous_events=config["referee"]["asynchronous_events"],
+        event_suppression_window=config["referee"]["suppression_window"],
+    )
+    # The controllers are set once the referee has placed the robots
+    half.start(supervisor, first)
 
-if automatic_mode:
-    supervisor.simulationQuit(0)
+    recorders = create_recorders(supervisor, output_prefix, rec_formats)
+
+    if automatic_mode:
+        supervisor.simulationSetMode(supervisor.SIMULATION_MODE_FAST)
+        for recorder in recorders:
+            recorder.start_recording()
+
+    reflog_handlers = add_event_subscribers(
+        referee, output_prefix, config, recorders
+    )
+    monitor = create_resource_monitor(config)
+    referee.kickoff()
+
+    # The "event" loop for the referee
+    while supervisor.step(TIME_STEP) != -1:
+        if monitor is not None:
+            monitor.sample(supervisor.getTime())
+        # If the tick does not return True, the match has ended and the event
+        # loop can stop
+        if not referee.tick():
+            break
+
+    # When end of match, pause simulator immediately
+    supervisor.simulationSetMode(supervisor.SIMULATION_MODE_PAUSE)
+    referee.close()
+    for reflog_handler in reflog_handlers:
+        reflog_handler.close()
+    if monitor is not None:
+        monitor.sample(supervisor.getTime(), force=True)
+        write_resource_report(monitor, output_prefix)
+
+    finish_recordings(
+        supervisor,
+        recorders,
+        output_prefix,
+        config["recording"]["artifacts_path"],
+        last,
+    )
+    return referee.score_blue, referee.score_yellow
+
+
+# The config file (if any) overridden by the environment variables
+config = load_config(os.environ)
+
+REC_FORMATS = config["recording"]["formats"]
+REPLAY_PATH = config["recording"]["replay_path"]
+
+automatic_mode = config["match"]["auto"]
+# The replays draw the labels of the recorded match
+headless = config["referee"]["headless"] and not REPLAY_PATH
+
+REFLOG_OUTPUT_PATH = config["recording"]["output_path"]
+ARTIFACTS_PATH = config["recording"]["artifacts_path"]
+directory = Path(REFLOG_OUTPUT_PATH)
+
+if headless:
+    # Leave out everything which is only needed when somebody is watching
+    from referee.headless import (
+        HeadlessReferee as Referee,
+        HeadlessSupervisor as Supervisor,
+    )
+
+    if RecordingFormat.MP4.value in REC_FORMATS:
+        print("WARNING: The labels are not drawn into the headless videos")
+else:
+    from gira_soccer_referee import GIRASoccerReferee as Referee
+    from gira_soccer_supervisor import GIRASoccerSupervisor as Supervisor
+
+supervisor = Supervisor()
+if REPLAY_PATH:
+    replay(supervisor, Path(REPLAY_PATH))
+    sys.exit(0)
+
+# The placement of the robots and the kickoffs are the same for the same seed
+if config["match"]["seed"] is not None:
+    random.seed(config["match"]["seed"])
+
+# A session plays all of its halves in this simulation, one after another
+if config["match"]["session"]:
+    halves = load_session(Path(config["match"]["session"]), config)
+else:
+    halves = [SessionHalf(config, {})]
+
+final_scores: Dict[str, int] = {}
+for index, half in enumerate(halves):
+    scores = play_half(
+        supervisor,
+        half,
+        half.initial_scores(final_scores),
+        first=index == 0,
+        last=index == len(halves) - 1,
+    )
+    final_scores = dict(zip(half.team_ids, scores))
@@ -0,0 +1,301 @@
+"""Shrinking of the animations recorded by Webots.
+
+Besides the `.html` page and the `.x3d` scene, an animation recording writes
+a `.json` file with the poses of the nodes on every frame, in full
+precision. The file is shrunk in two streaming passes: the first one finds
+the nodes which never move, the second one writes the frames without those
+nodes, with quantized translations and rotations and without the values
+which did not change since they were last written.
+"""
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set, TextIO, Tuple
+
+FRAMES_KEY = "frames"
+IDS_KEY = "ids"
+QUANTIZED_FIELDS = ("translation", "rotation")
+
+# Number of decimals kept by default (millimeters and milliradians)
+DEFAULT_DECIMALS = 3
+
+READ_SIZE = 1 << 16
+WHITESPACE = " \t\r\n"
+
+
+class JSONStream:
+    """Read the values of a large JSON document one by one."""
+
+    def __init__(self, infile: TextIO):
+        self.infile = infile
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        data = self.infile.read(READ_SIZE)
+        if not data:
+            self.eof = True
+            return False
+        start = self.pos
+        self.buffer = self.buffer[start:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Get the next character which is not a whitespace."""
+        while True:
+            while (
+                self.pos < len(self.buffer)
+                and self.buffer[self.pos] in WHITESPACE
+            ):
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of the JSON document")
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at {self.pos}")
+        self.pos += 1
+
+    def skip_comma(self):
+        if self.peek() == ",":
+            self.pos += 1
+
+    def value(self) -> Any:
+        """Read the next complete value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer might continue
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def array(self) -> Iterator[Any]:
+        """Read the items of the next array one by one."""
+        self.expect("[")
+        while self.peek() != "]":
+            yield self.value()
+            self.skip_comma()
+        self.pos += 1
+
+
+def iterate_animation(infile: TextIO) -> Iterator[Tuple[str, Any]]:
+    """Iterate over the keys of the animation.
+
+    The value of the frames is an iterator over them, which has to be
+    consumed before continuing with the next key.
+    """
+    stream = JSONStream(infile)
+    stream.expect("{")
+    while stream.peek() != "}":
+        key = stream.value()
+        stream.expect(":")
+        if key == FRAMES_KEY:
+            yield key, stream.array()
+        else:
+            yield key, stream.value()
+        stream.skip_comma()
+
+
+def quantize(value: str, decimals: int) -> str:
+    """Round the space separated numbers to the number of decimals."""
+    numbers = []
+    for number in value.split():
+        text = f"{float(number):.{decimals}f}".rstrip("0").rstrip(".")
+        numbers.append("0" if text in ("", "-0") else text)
+    return " ".join(numbers)
+
+
+def quantize_pose(pose: dict, decimals: int) -> Dict[str, Any]:
+    """Get the quantized fields of the pose, without its node id."""
+    return {
+        field: quantize(value, decimals)
+        if field in QUANTIZED_FIELDS
+        else value
+        for field, value in pose.items()
+        if field != "id"
+    }
+
+
+def find_static_nodes(path: Path, decimals: int) -> Tuple[Set[int], int]:
+    """Find the nodes whose (quantized) pose never changes.
+
+    Returns:
+        tuple: The ids of the static nodes and the number of all the nodes
+    """
+    first_poses: Dict[int, Dict[str, Any]] = {}
+    moving: Set[int] = set()
+
+    with open(path) as infile:
+        for key, value in iterate_animation(infile):
+            if key != FRAMES_KEY:
+                continue
+            for frame in value:
+                for pose in frame.get("poses", []):
+                    node = pose["id"]
+                    if node in moving:
+                        continue
+                    fields = quantize_pose(pose, decimals)
+                    first = first_poses.setdefault(node, fields)
+                    if any(first.get(f) != v for f, v in fields.items()):
+                        moving.add(node)
+
+    return set(first_poses) - moving, len(first_poses)
+
+
+class FrameShrinker:
+    """Drop the static nodes and the unchanged values from the frames."""
+
+    def __init__(self, static_nodes: Set[int], decimals: int):
+        self.static_nodes = static_nodes
+        self.decimals = decimals
+        # Last written fields of each node
+        self.written: Dict[int, Dict[str, Any]] = {}
+        self.poses_in = 0
+        self.poses_out = 0
+
+    def shrink(self, frame: dict) -> dict:
+        if "poses" not in frame:
+            return frame
+
+        poses = []
+        for pose in frame["poses"]:
+            self.poses_in += 1
+            node = pose["id"]
+            if node in self.static_nodes:
+                continue
+
+            written = self.written.setdefault(node, {})
+            changed = {
+                field: value
+                for field, value in quantize_pose(pose, self.decimals).items()
+                if written.get(field) != value
+            }
+            if changed:
+                written.update(changed)
+                poses.append({"id": node, **changed})
+
+        self.poses_out += len(poses)
+        return {**frame, "poses": poses}
+
+
+def filter_ids(ids: Any, static_nodes: Set[int]) -> Any:
+    """Remove the static nodes from the list of the animated ones."""
+    if isinstance(ids, str):
+        kept = [i for i in ids.split(",") if i and int(i) not in static_nodes]
+        return ",".join(kept)
+    return [i for i in ids if i not in static_nodes]
+
+
+def measure_load_time(path: Path) -> float:
+    start = time.perf_counter()
+    with open(path) as infile:
+        json.load(infile)
+    return time.perf_counter() - start
+
+
+def shrink_animation(
+    path: Path,
+    output: Optional[Path] = None,
+    decimals: int = DEFAULT_DECIMALS,
+    measure_load: bool = False,
+) -> dict:
+    """Shrink the animation file.
+
+    Args:
+        path (Path): Path of the animation `.json` file
+        output (Path, optional): Path of the shrunk file, the animation is
+            replaced if not set
+        decimals (int): Number of decimals of the translations and rotations
+        measure_load (bool): Whether to also measure how long loading the
+            files takes (which loads them whole into memory)
+
+    Returns:
+        dict: Report with the sizes before and after
+    """
+    output = output or path
+    static_nodes, node_count = find_static_nodes(path, decimals)
+    shrinker = FrameShrinker(static_nodes, decimals)
+
+    tmp_path = output.with_name(f"{output.name}.tmp")
+    with open(path) as infile, open(tmp_path, "w") as outfile:
+        outfile.write("{")
+        for n, (key, value) in enumerate(iterate_animation(infile)):
+            if n:
+                outfile.write(",")
+            outfile.write(json.dumps(key) + ":")
+            if key == FRAMES_KEY:
+                outfile.write("[")
+                for i, frame in enumerate(value):
+                    if i:
+                        outfile.write(",")
+                    frame = shrinker.shrink(frame)
+                    outfile.write(json.dumps(frame, separators=(",", ":")))
+                outfile.write("]")
+            else:
+                if key == IDS_KEY:
+                    value = filter_ids(value, static_nodes)
+                outfile.write(json.dumps(value, separators=(",", ":")))
+        outfile.write("}")
+
+    report = {
+        "original_size": path.stat().st_size,
+        "size": tmp_path.stat().st_size,
+        "nodes": node_count,
+        "static_nodes": len(static_nodes),
+        "original_poses": shrinker.poses_in,
+        "poses": shrinker.poses_out,
+    }
+    if measure_load:
+        report["original_load_time"] = measure_load_time(path)
+        report["load_time"] = measure_load_time(tmp_path)
+
+    os.replace(tmp_path, output)
+    return report
+
+
+def format_report(report: dict) -> str:
+    lines = [
+        "Size: {original_size} -> {size} bytes".format(**report),
+        "Nodes: {nodes}, {static_nodes} static".format(**report),
+        "Poses: {original_poses} -> {poses}".format(**report),
+    ]
+    if "load_time" in report:
+        lines.append(
+            "Load time: {original_load_time:.3f}s -> {load_time:.3f}s".format(
+                **report
+            )
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Shrink an animation recorded by Webots."
+    )
+    parser.add_argument("input", type=Path, help="animation .json file")
+    parser.add_argument("--output", type=Path, help="defaults to the input")
+    parser.add_argument("--decimals", type=int, default=DEFAULT_DECIMALS)
+    parser.add_argument(
+        "--measure-load",
+        action="store_true",
+        help="also measure the time it takes to load the files",
+    )
+    args = parser.parse_args()
+
+    report = shrink_animation(
+        args.input, args.output, args.decimals, args.measure_load
+    )
+    print(format_report(report))
@@ -0,0 +1,428 @@
+"""Tournament archive of trajectories and their events.
+
+The poses of all of the archived trajectories are stored decompressed, one
+float32 row per tick, in a single file which is memory mapped when read.
+The events are indexed by team, event type, match and half in columns
+sorted in that order, so that e.g. every goal of a team is found by a binary
+search and its pose window is read without touching the other matches.
+"""
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from recorder.trajectory import TrajectoryPlayer
+
+MANIFEST = "manifest.json"
+POSES_FILE = "poses.f32"
+ARCHIVE_VERSION = 1
+
+# Code of a missing value in the dictionary encoded columns
+MISSING = -1
+
+# The index is sorted by the columns in this order
+INDEX_COLUMNS = {
+    "team": np.int32,
+    "event": np.int16,
+    "match": np.int32,
+    "half": np.int8,
+    "tick": np.int32,
+    "segment": np.int32,
+}
+SORT_COLUMNS = ("team", "event", "match", "half", "tick")
+# The dictionary which encodes the values of each column
+DICTIONARIES = {"team": "team", "event": "event", "match": "match"}
+
+
+class Hit:
+    """An indexed event."""
+
+    __slots__ = ("team", "event", "match", "half", "tick", "segment")
+
+    def __init__(
+        self,
+        team: Optional[str],
+        event: str,
+        match: Optional[str],
+        half: int,
+        tick: int,
+        segment: int,
+    ):
+        self.team = team
+        self.event = event
+        self.match = match
+        self.half = half
+        self.tick = tick
+        self.segment = segment
+
+    def __repr__(self) -> str:
+        return (
+            f"Hit({self.event}, team={self.team}, match={self.match}, "
+            f"half={self.half}, tick={self.tick})"
+        )
+
+
+def event_team(event_type: str, payload: dict, half: dict) -> Optional[str]:
+    """Get the name of the team the event is about."""
+    if event_type == "GOAL":
+        return payload.get("team_name")
+
+    if event_type == "KICKOFF":
+        side = payload.get("team_name")
+    else:
+        side = payload.get("robot_name")
+    if side and side[0] == "B":
+        return half["team_blue"]
+    if side and side[0] == "Y":
+        return half["team_yellow"]
+    return None
+
+
+class TournamentArchive:
+    """Archive of the trajectories of a tournament.
+
+    The poses are only ever appended and the index (which only holds the
+    events) is written as a new generation, which the manifest refers to
+    once it is replaced, so that an interrupted addition leaves the archive
+    as it was before.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        manifest_path = path / MANIFEST
+        if manifest_path.exists():
+            self.manifest = json.loads(manifest_path.read_text())
+            if self.manifest["version"] != ARCHIVE_VERSION:
+                raise ValueError(f"Unsupported archive version in {path}")
+        else:
+            self.manifest = {
+                "version": ARCHIVE_VERSION,
+                "width": None,
+                "time_step": None,
+                "robot_names": None,
+                "rows": 0,
+                "index": 0,
+                "dictionaries": {
+                    name: [] for name in set(DICTIONARIES.values())
+                },
+                "segments": [],
+            }
+
+        self.codes = {
+            name: {value: code for code, value in enumerate(values)}
+            for name, values in self.manifest["dictionaries"].items()
+        }
+        self.index = self._load_index()
+        self._poses: Optional[np.memmap] = None
+
+    def index_path(self, column: str, generation: int) -> Path:
+        return self.path / f"index_{column}.{generation}.npy"
+
+    def _load_index(self) -> Dict[str, np.ndarray]:
+        generation = self.manifest["index"]
+        index = {}
+        for column, dtype in INDEX_COLUMNS.items():
+            if generation:
+                index[column] = np.load(
+                    self.index_path(column, generation), mmap_mode="r"
+                )
+            else:
+                index[column] = np.zeros(0, dtype=dtype)
+        return index
+
+    def encode(self, dictionary: str, value: Optional[str]) -> int:
+        """Get the code of the value, adding it to the dictionary if needed."""
+        if value is None:
+            return MISSING
+
+        codes = self.codes[dictionary]
+        if value not in codes:
+            codes[value] = len(codes)
+            self.manifest["dictionaries"][dictionary].append(value)
+        return codes[value]
+
+    def code(self, dictionary: str, value: str) -> Optional[int]:
+        return self.codes[dictionary].get(value)
+
+    def decode(self, dictionary: str, code: int) -> Optional[str]:
+        if code == MISSING:
+            return None
+        return self.manifest["dictionaries"][dictionary][code]
+
+    def _check_format(self, player: TrajectoryPlayer):
+        if self.manifest["width"] is None:
+            self.manifest["width"] = player.width
+            self.manifest["time_step"] = player.time_step
+            self.manifest["robot_names"] = player.robot_names
+        elif (
+            self.manifest["width"] != player.width
+            or self.manifest["time_step"] != player.time_step
+            or self.manifest["robot_names"] != player.robot_names
+        ):
+            raise ValueError("The trajectory does not match the archive")
+
+    def _append_poses(self, player: TrajectoryPlayer):
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / POSES_FILE, "ab") as outfile:
+            # Drop what an interrupted addition might have left behind
+            row_size = self.manifest["width"] * 4
+            outfile.truncate(self.manifest["rows"] * row_size)
+            for index in range(len(player.chunks)):
+                outfile.write(player.read_chunk(index)[0].tobytes())
+
+    def _index_events(
+        self, player: TrajectoryPlayer, segment: int
+    ) -> Dict[str, list]:
+        entries: Dict[str, list] = {column: [] for column in INDEX_COLUMNS}
+        half = {
+            "match": None,
+            "half": 0,
+            "team_blue": None,
+            "team_yellow": None,
+        }
+
+        for tick, event_type, payload in player.events():
+            payload = payload or {}
+            if event_type == "MATCH_START":
+                half = {
+                    "match": str(payload["match_id"]),
+                    "half": int(payload["halftime"]),
+                    "team_blue": payload["team_name_blue"],
+                    "team_yellow": payload["team_name_yellow"],
+                }
+                self.encode("team", half["team_blue"])
+                self.encode("team", half["team_yellow"])
+
+            team = event_team(event_type, payload, half)
+            entries["team"].append(self.encode("team", team))
+            entries["event"].append(self.encode("event", event_type))
+            entries["match"].append(self.encode("match", half["match"]))
+            entries["half"].append(half["half"])
+            entries["tick"].append(tick)
+            entries["segment"].append(segment)
+        return entries
+
+    def _write_index(self, entries: Dict[str, list]):
+        """Write a new generation of the index, which is only used once the
+        manifest refers to it."""
+        columns = {
+            column: np.concatenate(
+                (self.index[column], np.asarray(entries[column], dtype=dtype))
+            )
+            for column, dtype in INDEX_COLUMNS.items()
+        }
+        # np.lexsort sorts by the last key first
+        order = np.lexsort([columns[c] for c in reversed(SORT_COLUMNS)])
+        self.manifest["index"] += 1
+        for column, values in columns.items():
+            np.save(
+                self.index_path(column, self.manifest["index"]), values[order]
+            )
+
+    def _save_manifest(self):
+        tmp_path = self.path / f"{MANIFEST}.tmp"
+        tmp_path.write_text(json.dumps(self.manifest))
+        os.replace(tmp_path, self.path / MANIFEST)
+
+    def add(self, path: Path) -> int:
+        """Add the trajectory to the archive.
+
+        Args:
+            path (Path): Path of the trajectory file
+
+        Returns:
+            int: Number of indexed events, 0 if it was already archived
+        """
+        source = str(path.resolve())
+        if any(s["source"] == source for s in self.manifest["segments"]):
+            return 0
+
+        player = TrajectoryPlayer(str(path))
+        try:
+            self._check_format(player)
+            self._append_poses(player)
+            segment = len(self.manifest["segments"])
+            entries = self._index_events(player, segment)
+            ticks = len(player)
+        finally:
+            player.close()
+
+        self.manifest["segments"].append(
+            {
+                "source": source,
+                "first_row": self.manifest["rows"],
+                "ticks": ticks,
+            }
+        )
+        self.manifest["rows"] += ticks
+        self._write_index(entries)
+        self._save_manifest()
+
+        self.index = self._load_index()
+        self._poses = None
+        for column in INDEX_COLUMNS:
+            old_path = self.index_path(column, self.manifest["index"] - 1)
+            if old_path.exists():
+                old_path.unlink()
+        return len(entries["tick"])
+
+    @property
+    def poses(self) -> np.ndarray:
+        """Memory mapped poses of all of the archived ticks."""
+        if self._poses is None:
+            rows = self.manifest["rows"]
+            if rows == 0:
+                return np.zeros((0, self.manifest["width"] or 0), np.float32)
+            self._poses = np.memmap(
+                self.path / POSES_FILE,
+                dtype=np.float32,
+                mode="r",
+                shape=(rows, self.manifest["width"]),
+            )
+        return self._poses
+
+    def _narrow(
+        self, column: str, code: int, lower: int, upper: int
+    ) -> Tuple[int, int]:
+        """Narrow the range of the index rows to the ones with the code, the
+        column has to be sorted within the range."""
+        values = self.index[column][lower:upper]
+        start = lower + int(np.searchsorted(values, code, side="left"))
+        end = lower + int(np.searchsorted(values, code, side="right"))
+        return start, end
+
+    def find(
+        self,
+        team: Optional[str] = None,
+        event: Optional[str] = None,
+        match: Optional[str] = None,
+        half: Optional[int] = None,
+    ) -> List[Hit]:
+        """Find the indexed events matching all of the given values.
+
+        Returns:
+            list: The events, ordered by team, event type, match, half and
+            tick
+        """
+        wanted = {"team": team, "event": event, "match": match}
+        codes = {}
+        for column, value in wanted.items():
+            if value is not None:
+                codes[column] = self.code(DICTIONARIES[column], value)
+        if None in codes.values():
+            return []
+        if half is not None:
+            codes["half"] = half
+
+        # Binary search while the leading columns are given, then filter
+        lower, upper = 0, len(self.index["tick"])
+        for column in SORT_COLUMNS[:-1]:
+            if column not in codes:
+                break
+            lower, upper = self._narrow(
+                column, codes.pop(column), lower, upper
+            )
+        mask = np.ones(upper - lower, dtype=bool)
+        for column, code in codes.items():
+            mask &= self.index[column][lower:upper] == code
+
+        rows = np.arange(lower, upper)[mask]
+        return [self.hit(int(row)) for row in rows]
+
+    def hit(self, row: int) -> Hit:
+        return Hit(
+            self.decode("team", int(self.index["team"][row])),
+            self.decode("event", int(self.index["event"][row])),
+            self.decode("match", int(self.index["match"][row])),
+            int(self.index["half"][row]),
+            int(self.index["tick"][row]),
+            int(self.index["segment"][row]),
+        )
+
+    def window(self, hit: Hit, before: int, after: int) -> np.ndarray:
+        """Get the poses around the event, within its trajectory.
+
+        Args:
+            hit (Hit): The event
+            before (int): Number of ticks before the event
+            after (int): Number of ticks from the event on
+
+        Returns:
+            np.ndarray: One row per tick with the ball translation followed by
+            the translation and rotation of each robot
+        """
+        segment = self.manifest["segments"][hit.segment]
+        first_row = segment["first_row"]
+        start = first_row + max(hit.tick - before, 0)
+        end = first_row + min(hit.tick + after, segment["ticks"])
+        return self.poses[start:end]
+
+    def windows(
+        self, before: int, after: int, **kwargs
+    ) -> Iterator[Tuple[Hit, np.ndarray]]:
+        """Find the events and get the poses around them.
+
+        Args:
+            before (int): Number of ticks before each event
+            after (int): Number of ticks from each event on
+            **kwargs: The values passed to `find`
+
+        Yields:
+            tuple: The event and its poses
+        """
+        for hit in self.find(**kwargs):
+            yield hit, self.window(hit, before, after)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Archive trajectories and extract the poses around events."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="archive trajectories")
+    add_parser.add_argument("archive", type=Path)
+    add_parser.add_argument("paths", type=Path, nargs="+")
+
+    find_parser = subparsers.add_parser("find", help="find events")
+    find_parser.add_argument("archive", type=Path)
+    find_parser.add_argument("--team")
+    find_parser.add_argument("--event")
+    find_parser.add_argument("--match")
+    find_parser.add_argument("--half", type=int)
+    find_parser.add_argument(
+        "--before", type=float, default=3.0, help="seconds before the event"
+    )
+    find_parser.add_argument(
+        "--after", type=float, default=1.0, help="seconds after the event"
+    )
+    find_parser.add_argument(
+        "--output", type=Path, help=".npz file for the pose windows"
+    )
+    args = parser.parse_args(argv)
+
+    archive = TournamentArchive(args.archive)
+    if args.command == "add":
+        for path in args.paths:
+            print(f"{path}: {archive.add(path)} events")
+        return
+
+    hits = archive.find(args.team, args.event, args.match, args.half)
+    for hit in hits:
+        print(f"{hit.match}\t{hit.half}\t{hit.team}\t{hit.event}\t{hit.tick}")
+
+    if args.output:
+        ticks_per_second = 1000 / archive.manifest["time_step"]
+        before = int(args.before * ticks_per_second)
+        after = int(args.after * ticks_per_second)
+        np.savez(
+            args.output,
+            *[archive.window(hit, before, after) for hit in hits],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import queue
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from recorder.recorder import BaseVideoRecordAssistant
+
+# Size of the blocks in which the artifacts are read while being hashed
+HASH_BLOCK_SIZE = 1 << 20
+INDEX_FILENAME = "artifacts.jsonl"
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as infile:
+        for block in iter(lambda: infile.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactWorker:
+    """Finalize the recorded files in a background thread.
+
+    The artifacts of a recording are first post-processed by the recorder,
+    then every artifact is moved into the artifacts directory (if there is
+    one), hashed and appended to the index in that directory.
+    """
+
+    def __init__(self, artifacts_dir: Optional[Path] = None):
+        self.artifacts_dir = artifacts_dir
+        self.queue: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self.artifacts: List[dict] = []
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(
+        self,
+        paths: Sequence[Path],
+        post_process: Optional[Callable[[], None]] = None,
+    ):
+        """Finalize the artifacts of a recording.
+
+        Args:
+            paths (list): Paths of the artifacts
+            post_process (callable, optional): Called before the artifacts
+                are moved
+        """
+        self.queue.put((paths, post_process))
+
+    def _run(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+
+            self.finalize(*job)
+
+    def finalize(
+        self,
+        paths: Sequence[Path],
+        post_process: Optional[Callable[[], None]],
+    ):
+        if post_process is not None:
+            try:
+                post_process()
+            except Exception as e:
+                # The recording is still kept, just not post-processed
+                print(f"Could not post-process {paths}: {e}")
+
+        for path in paths:
+            try:
+                self.artifacts.append(self.process(path))
+            except OSError as e:
+                print(f"Could not process the artifact {path}: {e}")
+
+    def process(self, path: Path) -> dict:
+        """Move, hash and index the artifact.
+
+        Args:
+            path (Path): Path of the artifact
+
+        Returns:
+            dict: The index entry of the artifact
+        """
+        if self.artifacts_dir is not None:
+            self.artifacts_dir.mkdir(parents=True, exist_ok=True)
+            path = Path(shutil.move(str(path), self.artifacts_dir / path.name))
+
+        entry = {
+            "path": str(path),
+            "size": path.stat().st_size,
+            "sha256": file_sha256(path),
+        }
+
+        index_path = path.parent / INDEX_FILENAME
+        with index_path.open("a") as outfile:
+            outfile.write(json.dumps(entry) + "\n")
+
+        return entry
+
+    def close(self):
+        """Wait until all of the submitted artifacts are processed."""
+        self.queue.put(None)
+        self.thread.join()
+
+
+class RecorderPipeline:
+    """Wait for the recorders to process their recordings and hand the
+    finished files over to a background worker.
+
+    The recorders are polled together, starting with short delays between
+    the polls which double up to `max_delay` while nothing is ready. The
+    Webots API is not thread-safe, so the polling itself stays in the
+    controller's thread.
+    """
+
+    def __init__(
+        self,
+        recorders: List[BaseVideoRecordAssistant],
+        artifacts_dir: Optional[Path] = None,
+        initial_delay: float = 0.05,
+        max_delay: float = 1.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Args:
+            recorders (list): The recorders of the match
+            artifacts_dir (Path, optional): Directory the finished files are
+                moved to, they are left in place if not set
+            initial_delay (float): Seconds to wait after the first poll
+            max_delay (float): Maximum number of seconds between the polls
+            sleep (callable): Function used for waiting between the polls
+        """
+        self.recorders = recorders
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.worker = ArtifactWorker(artifacts_dir)
+        self.pending: List[BaseVideoRecordAssistant] = []
+
+    def stop_recording(self):
+        """Stop all of the active recorders."""
+        for recorder in self.recorders:
+            if recorder.is_recording():
+                recorder.stop_recording()
+                self.pending.append(recorder)
+
+    def poll(self) -> bool:
+        """Hand the recordings which are ready over to the worker.
+
+        Returns:
+            bool: Whether any recording got ready
+        """
+        ready = [recorder for recorder in self.pending if recorder.is_ready()]
+        for recorder in ready:
+            self.pending.remove(recorder)
+            self.worker.submit(recorder.artifacts(), recorder.post_process)
+        return bool(ready)
+
+    def wait(self):
+        """Wait until all of the recordings are processed and finalized."""
+        delay = self.initial_delay
+        while True:
+            if self.poll():
+                delay = self.initial_delay
+            if not self.pending:
+                break
+            self.sleep(delay)
+            delay = min(delay * 2, self.max_delay)
+        self.worker.close()
@@ -1,10 +1,16 @@
 import datetime
 import time
 from pathlib import Path
+from typing import BinaryIO, List, Optional
 
 from controller import Supervisor
 
+from recorder.animation import format_report, shrink_animation
 from recorder.consts import RecordingFileSuffix
+from recorder.trajectory import TrajectoryWriter
+from referee.consts import ROBOT_NAMES
+from referee.event_handlers import EventHandler
+from referee.events import Event
 
 
 class BaseVideoRecordAssistant:
@@ -24,6 +30,8 @@ class BaseVideoRecordAssistant:
         self.resolution = resolution
 
         self._is_recording = False
+        # Path of the file being recorded
+        self.filename = ""
 
         if not isinstance(self.supervisor, Supervisor):
             raise TypeError("Unexpected supervisor instance")
@@ -59,6 +67,18 @@ class BaseVideoRecordAssistant:
     def is_recording(self):
         return self._is_recording
 
+    def is_ready(self) -> bool:
+        """Whether the recording is processed and written to the file."""
+        return True
+
+    def artifacts(self) -> List[Path]:
+        """Get the paths of the files written by the recording."""
+        return [Path(self.filename)] if self.filename else []
+
+    def post_process(self):
+        """Process the written files, once the recording is ready."""
+        pass
+
     def wait_processing(self):
         raise NotImplementedError
 
@@ -68,7 +88,7 @@ class MP4VideoRecordAssistant(BaseVideoRecordAssistant):
 
     def start_recording(self):
         width, height = self.get_resolution()
-        filename = self.create_title()
+        filename = self.filename = self.create_title()
 
         # API details for movieStartRecording
         # https://www.cyberbotics.com/doc/reference/supervisor?tab-language=python#wb_supervisor_movie_start_recording
@@ -88,8 +108,11 @@ class MP4VideoRecordAssistant(BaseVideoRecordAssistant):
         self.supervisor.movieStopRecording()
         self._is_recording = False
 
+    def is_ready(self) -> bool:
+        return self.supervisor.movieIsReady()
+
     def wait_processing(self):
-        while not self.supervisor.movieIsReady():
+        while not self.is_ready():
             time.sleep(1.0)
 
 
@@ -97,7 +120,7 @@ class X3DVideoRecordAssistant(BaseVideoRecordAssistant):
     output_suffix = RecordingFileSuffix.X3D.value
 
     def start_recording(self):
-        filename = self.create_title()
+        filename = self.filename = self.create_title()
         self.supervisor.animationStartRecording(filename)
         self._is_recording = True
 
@@ -105,5 +128,74 @@ class X3DVideoRecordAssistant(BaseVideoRecordAssistant):
         self.supervisor.animationStopRecording()
         self._is_recording = False
 
+    def artifacts(self) -> List[Path]:
+        # The page loads the scene and the animation from the files next to it
+        page = Path(self.filename)
+        companions = [page.with_suffix(suffix) for suffix in (".x3d", ".json")]
+        return [page] + [path for path in companions if path.exists()]
+
+    def post_process(self):
+        animation = Path(self.filename).with_suffix(".json")
+        if animation.exists():
+            report = shrink_animation(animation, measure_load=True)
+            print(format_report(report))
+
+    def wait_processing(self):
+        pass
+
+
+class TrajectoryRecordAssistant(BaseVideoRecordAssistant, EventHandler):
+    """Record the poses of the ball and the robots on every tick, together
+    with the scores and the events, into a compact trajectory file.
+
+    Besides being a recorder, it needs to be subscribed to the referee's
+    events.
+    """
+
+    output_suffix = RecordingFileSuffix.TRAJECTORY.value
+    # The events need to be recorded on the tick they happen on
+    synchronous = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.writer: Optional[TrajectoryWriter] = None
+        self.outfile: Optional[BinaryIO] = None
+        self.score_blue = 0
+        self.score_yellow = 0
+
+    def start_recording(self):
+        self.filename = self.create_title()
+        self.outfile = open(self.filename, "wb")
+        self.writer = TrajectoryWriter(self.outfile)
+        self._is_recording = True
+        self.supervisor.position_listeners.append(self.record_positions)
+
+    def stop_recording(self):
+        # The supervisor outlives the recorder when a session plays several
+        # halves, each of them with its own recorders
+        self.supervisor.position_listeners.remove(self.record_positions)
+        self.writer.close()
+        self.outfile.close()
+        self._is_recording = False
+
+    def record_positions(self):
+        if not self._is_recording:
+            return
+
+        sv = self.supervisor
+        self.writer.write_frame(
+            sv.ball_translation,
+            [sv.robot_translation[robot] for robot in ROBOT_NAMES],
+            [sv.robot_rotation[robot] for robot in ROBOT_NAMES],
+            self.score_blue,
+            self.score_yellow,
+        )
+
+    def handle(self, referee, event: Event):
+        self.score_blue = referee.score_blue
+        self.score_yellow = referee.score_yellow
+        if self._is_recording:
+            self.writer.write_event(event.event_type.value, event.payload())
+
     def wait_processing(self):
         pass
@@ -0,0 +1,368 @@
+"""Top-down 2D rendering of trajectory files.
+
+The frames are rasterized with NumPy only, so no Webots (nor GPU) is needed.
+The ticks are split into ranges which are rendered by a pool of processes,
+each of them reading the trajectory file on its own.
+"""
+import argparse
+import math
+import multiprocessing
+import struct
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from recorder.trajectory import TrajectoryPlayer
+from referee.consts import (
+    BLUE_PENALTY_AREA,
+    FIELD_X_LOWER_LIMIT,
+    FIELD_X_UPPER_LIMIT,
+    FIELD_Y_LOWER_LIMIT,
+    FIELD_Y_UPPER_LIMIT,
+    GOAL_BLUE_BACK_WALL_Y_LIMIT,
+    GOAL_BLUE_Y_LIMIT,
+    GOAL_X_LOWER_LIMIT,
+    GOAL_X_UPPER_LIMIT,
+    GOAL_YELLOW_BACK_WALL_Y_LIMIT,
+    GOAL_YELLOW_Y_LIMIT,
+    NEUTRAL_SPOTS,
+    TIME_STEP,
+    YELLOW_PENALTY_AREA,
+)
+
+# Pixels per meter
+DEFAULT_SCALE = 400
+# Meters of space around the field
+MARGIN = 0.03
+
+BALL_RADIUS = 0.021
+ROBOT_RADIUS = 0.037
+LINE_WIDTH = 0.01
+NEUTRAL_SPOT_RADIUS = 0.008
+
+BACKGROUND_COLOR = (40, 40, 40)
+FIELD_COLOR = (30, 120, 40)
+LINE_COLOR = (240, 240, 240)
+BLUE_COLOR = (30, 60, 230)
+YELLOW_COLOR = (240, 210, 20)
+BALL_COLOR = (255, 120, 0)
+HEADING_COLOR = (20, 20, 20)
+
+FORMATS = ("png", "raw")
+
+
+class FieldRenderer:
+    """Rasterize the field and the objects on it.
+
+    The image shows the field from above with its long (y) axis horizontal,
+    the blue goal on the right and the yellow goal on the left.
+    """
+
+    def __init__(self, scale: int = DEFAULT_SCALE):
+        self.scale = scale
+        self.y_min = GOAL_YELLOW_BACK_WALL_Y_LIMIT - MARGIN
+        self.x_max = FIELD_X_UPPER_LIMIT + MARGIN
+        width = GOAL_BLUE_BACK_WALL_Y_LIMIT + MARGIN - self.y_min
+        height = self.x_max - (FIELD_X_LOWER_LIMIT - MARGIN)
+        # Even dimensions keep the video encoders happy
+        self.width = 2 * math.ceil(width * scale / 2)
+        self.height = 2 * math.ceil(height * scale / 2)
+
+        # Field coordinates of the center of each pixel
+        self.ys = self.y_min + (np.arange(self.width) + 0.5) / scale
+        self.xs = self.x_max - (np.arange(self.height) + 0.5) / scale
+
+        self.background = self._draw_background()
+
+    @property
+    def frame_size(self) -> int:
+        return self.width * self.height * 3
+
+    def _rectangle_mask(
+        self,
+        x_range: Tuple[float, float],
+        y_range: Tuple[float, float],
+    ) -> np.ndarray:
+        rows = (self.xs >= x_range[0]) & (self.xs <= x_range[1])
+        columns = (self.ys >= y_range[0]) & (self.ys <= y_range[1])
+        return rows[:, None] & columns[None, :]
+
+    def _outline_mask(
+        self,
+        x_range: Tuple[float, float],
+        y_range: Tuple[float, float],
+    ) -> np.ndarray:
+        w = LINE_WIDTH / 2
+        outer = self._rectangle_mask(
+            (x_range[0] - w, x_range[1] + w), (y_range[0] - w, y_range[1] + w)
+        )
+        inner = self._rectangle_mask(
+            (x_range[0] + w, x_range[1] - w), (y_range[0] + w, y_range[1] - w)
+        )
+        return outer & ~inner
+
+    def _draw_background(self) -> np.ndarray:
+        image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        image[:] = BACKGROUND_COLOR
+
+        field_x = (FIELD_X_LOWER_LIMIT, FIELD_X_UPPER_LIMIT)
+        goal_x = (GOAL_X_LOWER_LIMIT, GOAL_X_UPPER_LIMIT)
+        yellow_goal = (GOAL_YELLOW_BACK_WALL_Y_LIMIT, GOAL_YELLOW_Y_LIMIT)
+        blue_goal = (GOAL_BLUE_Y_LIMIT, GOAL_BLUE_BACK_WALL_Y_LIMIT)
+
+        field_y = (FIELD_Y_LOWER_LIMIT, FIELD_Y_UPPER_LIMIT)
+        image[self._rectangle_mask(field_x, field_y)] = FIELD_COLOR
+        image[self._rectangle_mask(goal_x, yellow_goal)] = YELLOW_COLOR
+        image[self._rectangle_mask(goal_x, blue_goal)] = BLUE_COLOR
+
+        lines = self._outline_mask(field_x, field_y)
+        for y_boundary, x_lower, x_upper in (
+            YELLOW_PENALTY_AREA,
+            BLUE_PENALTY_AREA,
+        ):
+            goal_line = math.copysign(GOAL_BLUE_Y_LIMIT, y_boundary)
+            y_range = tuple(sorted((y_boundary, goal_line)))
+            lines |= self._outline_mask((x_lower, x_upper), y_range)
+        # The halfway line
+        lines |= self._rectangle_mask(
+            field_x, (-LINE_WIDTH / 2, LINE_WIDTH / 2)
+        )
+        image[lines] = LINE_COLOR
+
+        for x, y in NEUTRAL_SPOTS.values():
+            self.draw_disk(image, x, y, NEUTRAL_SPOT_RADIUS, LINE_COLOR)
+
+        return image
+
+    def draw_disk(
+        self,
+        image: np.ndarray,
+        x: float,
+        y: float,
+        radius: float,
+        color: Tuple[int, int, int],
+    ):
+        """Draw a filled disk, only touching the pixels around it."""
+        row_start = max(int((self.x_max - x - radius) * self.scale), 0)
+        row_end = min(
+            int((self.x_max - x + radius) * self.scale) + 2, self.height
+        )
+        col_start = max(int((y - radius - self.y_min) * self.scale), 0)
+        col_end = min(
+            int((y + radius - self.y_min) * self.scale) + 2, self.width
+        )
+        if row_start >= row_end or col_start >= col_end:
+            return
+
+        dx = self.xs[row_start:row_end, None] - x
+        dy = self.ys[None, col_start:col_end] - y
+        mask = dx * dx + dy * dy <= radius * radius
+        image[row_start:row_end, col_start:col_end][mask] = color
+
+    def draw_frame(self, frame) -> np.ndarray:
+        """Draw the objects of the frame on the field.
+
+        Args:
+            frame (Frame): The frame from the trajectory player
+
+        Returns:
+            np.ndarray: RGB image of the frame
+        """
+        image = self.background.copy()
+
+        for robot, (x, y, _) in frame.robot_translations.items():
+            color = BLUE_COLOR if robot.startswith("B") else YELLOW_COLOR
+            self.draw_disk(image, x, y, ROBOT_RADIUS, color)
+
+            # Mark the front of the robot, assuming it only rotates around
+            # the vertical axis
+            axis_z, angle = frame.robot_rotations[robot][2:]
+            yaw = angle if axis_z >= 0 else -angle
+            front = ROBOT_RADIUS * 0.6
+            self.draw_disk(
+                image,
+                x + front * math.cos(yaw),
+                y + front * math.sin(yaw),
+                ROBOT_RADIUS * 0.3,
+                HEADING_COLOR,
+            )
+
+        x, y, _ = frame.ball_translation
+        self.draw_disk(image, x, y, BALL_RADIUS, BALL_COLOR)
+        return image
+
+
+def encode_png(image: np.ndarray) -> bytes:
+    """Encode the RGB image as PNG."""
+    height, width, _ = image.shape
+
+    def chunk(chunk_type: bytes, data: bytes) -> bytes:
+        body = chunk_type + data
+        crc = zlib.crc32(body) & 0xFFFFFFFF
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", crc)
+
+    # Every row starts with the filter type, which is none
+    rows = np.zeros((height, width * 3 + 1), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, width * 3)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(rows.tobytes(), 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def split_ranges(
+    ticks: int,
+    parts: int,
+    step: int = 1,
+) -> List[Tuple[int, int]]:
+    """Split the ticks into ranges of about the same number of frames.
+
+    Args:
+        ticks (int): Number of ticks
+        parts (int): Number of ranges
+        step (int): Every how many ticks a frame is rendered
+
+    Returns:
+        list: Start and end tick of each non-empty range
+    """
+    frames = math.ceil(ticks / step)
+    bounds = np.linspace(0, frames, parts + 1).round().astype(int) * step
+    return [
+        (int(start), min(int(end), ticks))
+        for start, end in zip(bounds[:-1], bounds[1:])
+        if start < end
+    ]
+
+
+def render_range(
+    path: str,
+    output: str,
+    output_format: str,
+    start: int,
+    end: int,
+    step: int = 1,
+    scale: int = DEFAULT_SCALE,
+) -> int:
+    """Render the frames of the ticks in the range.
+
+    PNG frames are written as `frame_<n>.png` into the output directory, raw
+    frames into their position in the output file.
+
+    Returns:
+        int: Number of rendered frames
+    """
+    renderer = FieldRenderer(scale)
+    player = TrajectoryPlayer(path)
+    rendered = 0
+
+    raw_file = None
+    if output_format == "raw":
+        raw_file = open(output, "r+b")
+        raw_file.seek(start // step * renderer.frame_size)
+
+    for tick in range(start, end, step):
+        image = renderer.draw_frame(player.frame(tick))
+        if raw_file is not None:
+            raw_file.write(image.tobytes())
+        else:
+            frame_path = Path(output) / ("frame_%06d.png" % (tick // step))
+            frame_path.write_bytes(encode_png(image))
+        rendered += 1
+
+    if raw_file is not None:
+        raw_file.close()
+    player.close()
+    return rendered
+
+
+def render(
+    path: Path,
+    output: Path,
+    output_format: str = "png",
+    processes: Optional[int] = None,
+    step: int = 1,
+    scale: int = DEFAULT_SCALE,
+) -> Tuple[int, int, int]:
+    """Render the trajectory file using a pool of processes.
+
+    Args:
+        path (Path): Path of the trajectory file
+        output (Path): Directory for PNG frames or file for raw RGB frames
+        output_format (str): Either "png" or "raw"
+        processes (int, optional): Number of processes, defaults to the
+            number of CPUs
+        step (int): Every how many ticks a frame is rendered
+        scale (int): Pixels per meter
+
+    Returns:
+        tuple: Number of frames, width and height of the frames
+    """
+    if output_format not in FORMATS:
+        raise ValueError(f"Unexpected output format {output_format}")
+
+    player = TrajectoryPlayer(str(path))
+    ticks = len(player)
+    player.close()
+    renderer = FieldRenderer(scale)
+    processes = processes or multiprocessing.cpu_count()
+
+    if output_format == "raw":
+        frames = math.ceil(ticks / step)
+        with open(output, "wb") as outfile:
+            outfile.truncate(frames * renderer.frame_size)
+    else:
+        output.mkdir(parents=True, exist_ok=True)
+
+    # More ranges than processes balance the load between them
+    tasks = [
+        (str(path), str(output), output_format, start, end, step, scale)
+        for start, end in split_ranges(ticks, processes * 4, step)
+    ]
+    if processes == 1:
+        counts = [render_range(*task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            counts = pool.starmap(render_range, tasks)
+
+    return sum(counts), renderer.width, renderer.height
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Render a trajectory file from above."
+    )
+    parser.add_argument("input", type=Path, help="trajectory file")
+    parser.add_argument(
+        "output",
+        type=Path,
+        help="directory for PNG frames or file for raw RGB frames",
+    )
+    parser.add_argument("--format", choices=FORMATS, default="png")
+    parser.add_argument("--processes", type=int, help="defaults to CPUs")
+    parser.add_argument(
+        "--step", type=int, default=1, help="render every n-th tick"
+    )
+    parser.add_argument("--scale", type=int, default=DEFAULT_SCALE)
+    args = parser.parse_args()
+
+    frames, width, height = render(
+        args.input,
+        args.output,
+        args.format,
+        args.processes,
+        args.step,
+        args.scale,
+    )
+    print(f"Rendered {frames} frames of {width}x{height} pixels")
+    if args.format == "raw":
+        rate = 1000 / TIME_STEP / args.step
+        print(
+            f"Encode with: ffmpeg -f rawvideo -pix_fmt rgb24 -s {width}x"
+            f"{height} -r {rate:g} -i {args.output} out.mp4"
+        )
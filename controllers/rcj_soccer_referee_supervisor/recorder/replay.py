@@ -0,0 +1,67 @@
+from collections import defaultdict
+from typing import Dict, List
+
+from recorder.trajectory import TrajectoryPlayer
+from referee.consts import ROBOT_NAMES
+from referee.supervisor import RCJSoccerSupervisor
+
+
+class TrajectoryReplay:
+    """Drive the scene from a recorded trajectory.
+
+    The poses of the ball and the robots are set directly on every step, so
+    the result does not depend on the physics, and the robot controllers are
+    detached, so that only the recorded match is shown (and recorded).
+    """
+
+    def __init__(
+        self, supervisor: RCJSoccerSupervisor, player: TrajectoryPlayer
+    ):
+        self.sv = supervisor
+        self.player = player
+        self.time_step = player.time_step
+        self.match_time = 0
+
+        self.events: Dict[int, List[list]] = defaultdict(list)
+        for event in player.events():
+            self.events[event[0]].append(event)
+
+    def handle_events(self, tick: int):
+        for _, event_type, payload in self.events.get(tick, []):
+            if event_type == "MATCH_START":
+                self.match_time = payload["total_match_time"]
+                self.sv.draw_team_names(
+                    payload["team_name_blue"], payload["team_name_yellow"]
+                )
+
+    def apply_frame(self, tick: int):
+        """Move the objects to their poses on the tick and draw the labels.
+
+        Args:
+            tick (int): Index of the tick
+        """
+        self.handle_events(tick)
+        frame = self.player.frame(tick)
+
+        self.sv.set_ball_position(frame.ball_translation)
+        for robot in ROBOT_NAMES:
+            self.sv.set_robot_position(robot, frame.robot_translations[robot])
+            self.sv.set_robot_rotation(robot, frame.robot_rotations[robot])
+
+        self.sv.draw_scores(frame.score_blue, frame.score_yellow)
+        elapsed = (tick + 1) * self.time_step / 1000.0
+        self.sv.draw_time(max(self.match_time - elapsed, 0))
+
+    def run(self) -> int:
+        """Replay the whole trajectory.
+
+        Returns:
+            int: Number of replayed ticks
+        """
+        self.sv.detach_robot_controllers()
+
+        for tick in range(len(self.player)):
+            self.apply_frame(tick)
+            if self.sv.step(self.time_step) == -1:
+                return tick + 1
+        return len(self.player)
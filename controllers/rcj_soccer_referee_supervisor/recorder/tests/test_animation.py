@@ -0,0 +1,131 @@
+import json
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.modules["controller"] = MagicMock()
+
+import recorder.recorder
+from recorder import animation
+from recorder.animation import JSONStream, quantize, shrink_animation
+from recorder.recorder import X3DVideoRecordAssistant
+
+
+def write_animation(path: Path, frames: int):
+    data = {
+        "basicTimeStep": 32,
+        "ids": "1,2,3",
+        "labelsIds": "",
+        "frames": [
+            {
+                "time": 32 * i,
+                "poses": [
+                    # The field never moves
+                    {"id": 1, "translation": "0 0 0", "rotation": "0 0 1 0"},
+                    # The ball slowly rolls
+                    {
+                        "id": 2,
+                        "translation": f"{0.00001 * i:.6f} 0.1234567 0.02",
+                    },
+                    # The robot jitters below the quantization and moves once
+                    {
+                        "id": 3,
+                        "translation": "%s 0.3 %s"
+                        % (0.3 if i < 150 else 0.35, 0.04 + 1e-6 * (i % 2)),
+                        "rotation": "0 0 1 -1.5700001",
+                    },
+                ],
+            }
+            for i in range(frames)
+        ],
+    }
+    path.write_text(json.dumps(data, indent=1))
+    return data
+
+
+@pytest.mark.parametrize(
+    "value,decimals,expected",
+    [
+        ("0.123456 -0.00001 1", 3, "0.123 0 1"),
+        ("-1.5707963 2.5", 2, "-1.57 2.5"),
+        ("10 -0.0004", 3, "10 0"),
+    ],
+)
+def test_quantize(value, decimals, expected):
+    assert quantize(value, decimals) == expected
+
+
+def test_stream_reads_values_across_buffers(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(animation, "READ_SIZE", 3)
+    path = tmp_path / "data.json"
+    path.write_text(' [12345, {"a": [1, 2]}, "text" ] ')
+
+    with open(path) as infile:
+        stream = JSONStream(infile)
+        assert list(stream.array()) == [12345, {"a": [1, 2]}, "text"]
+
+
+def test_shrink_animation(tmp_path: Path):
+    path = tmp_path / "match.json"
+    original = write_animation(path, 300)
+    output = tmp_path / "small.json"
+
+    report = shrink_animation(path, output, measure_load=True)
+
+    data = json.loads(output.read_text())
+    assert data["basicTimeStep"] == 32
+    assert data["ids"] == "2,3"
+    assert len(data["frames"]) == 300
+    assert [f["time"] for f in data["frames"]] == [
+        f["time"] for f in original["frames"]
+    ]
+    # The robot is written only when it moves, the ball every time it moves
+    # by a millimeter
+    assert data["frames"][0]["poses"] == [
+        {"id": 2, "translation": "0 0.123 0.02"},
+        {"id": 3, "translation": "0.3 0.3 0.04", "rotation": "0 0 1 -1.57"},
+    ]
+    assert data["frames"][1]["poses"] == []
+    ball = [p for f in data["frames"] for p in f["poses"] if p["id"] == 2]
+    assert [p["translation"] for p in ball[:3]] == [
+        "0 0.123 0.02",
+        "0.001 0.123 0.02",
+        "0.002 0.123 0.02",
+    ]
+
+    assert report["nodes"] == 3
+    assert report["static_nodes"] == 1
+    assert report["original_poses"] == 900
+    assert data["frames"][150]["poses"][-1] == {
+        "id": 3,
+        "translation": "0.35 0.3 0.04",
+    }
+    assert report["poses"] == len(ball) + 2
+    assert report["size"] < report["original_size"] / 10
+    assert report["load_time"] > 0
+
+
+def test_shrink_animation_in_place(tmp_path: Path):
+    path = tmp_path / "match.json"
+    write_animation(path, 10)
+
+    report = shrink_animation(path)
+
+    assert report["size"] == path.stat().st_size
+    assert sorted(tmp_path.iterdir()) == [path]
+
+
+def test_recording_reports_load_time(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setattr(recorder.recorder, "Supervisor", MagicMock)
+    path = tmp_path / "match.json"
+    write_animation(path, 10)
+    assistant = X3DVideoRecordAssistant(MagicMock())
+    assistant.filename = str(tmp_path / "match.html")
+
+    assistant.post_process()
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("Size: ")
+    assert lines[-1].startswith("Load time: ")
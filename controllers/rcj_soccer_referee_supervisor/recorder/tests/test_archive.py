@@ -0,0 +1,155 @@
+from pathlib import Path
+
+import numpy as np
+
+from recorder.archive import main, POSES_FILE, TournamentArchive
+from recorder.trajectory import TrajectoryPlayer, TrajectoryWriter
+from referee.consts import ROBOT_NAMES
+
+
+def write_half(
+    path: Path,
+    match_id: int,
+    halftime: int,
+    blue: str,
+    yellow: str,
+    goals: dict,
+    ticks: int = 300,
+):
+    """Write a trajectory where the ball x coordinate encodes the match,
+    half and tick, with the blue goals and yellow goals on the given ticks.
+    """
+    with open(path, "wb") as outfile:
+        writer = TrajectoryWriter(outfile, chunk_size=64)
+        writer.write_event(
+            "MATCH_START",
+            {
+                "match_id": match_id,
+                "halftime": halftime,
+                "team_name_blue": blue,
+                "team_name_yellow": yellow,
+            },
+        )
+        for tick in range(ticks):
+            if tick in goals:
+                team = blue if goals[tick] == "blue" else yellow
+                writer.write_event("GOAL", {"team_name": team})
+            if tick == 100:
+                writer.write_event(
+                    "LACK_OF_PROGRESS", {"type": "robot", "robot_name": "Y2"}
+                )
+            ball_x = match_id * 10 + halftime + tick / 1000
+            writer.write_frame(
+                [ball_x, 0.0, 0.0],
+                [[0.0, 0.0, 0.0]] * len(ROBOT_NAMES),
+                [[0.0, 0.0, 1.0, 0.0]] * len(ROBOT_NAMES),
+                0,
+                0,
+            )
+        writer.write_event("MATCH_FINISH", {})
+        writer.close()
+
+
+def create_archive(tmp_path: Path) -> TournamentArchive:
+    write_half(tmp_path / "1.rcjtraj", 1, 1, "A", "B", {50: "blue"})
+    write_half(tmp_path / "2.rcjtraj", 1, 2, "B", "A", {10: "yellow"})
+    write_half(tmp_path / "3.rcjtraj", 2, 1, "C", "B", {250: "yellow"})
+
+    archive = TournamentArchive(tmp_path / "archive")
+    for name in ("1", "2", "3"):
+        archive.add(tmp_path / f"{name}.rcjtraj")
+    return archive
+
+
+def test_find_events(tmp_path: Path):
+    archive = create_archive(tmp_path)
+
+    goals = archive.find(team="A", event="GOAL")
+    assert [(g.match, g.half, g.tick) for g in goals] == [
+        ("1", 1, 50),
+        ("1", 2, 10),
+    ]
+    assert [g.tick for g in archive.find(team="B", event="GOAL")] == [250]
+    assert len(archive.find(event="GOAL")) == 3
+    assert len(archive.find(event="GOAL", match="2")) == 1
+    assert len(archive.find(team="A", half=2)) == 2
+
+    lack_of_progress = archive.find(event="LACK_OF_PROGRESS", match="1")
+    # Ordered by the team first
+    assert [(e.team, e.half) for e in lack_of_progress] == [
+        ("A", 2),
+        ("B", 1),
+    ]
+
+    assert archive.find(team="D") == []
+    assert archive.find(event="GOAL", half=3) == []
+
+
+def test_windows_stay_within_the_half(tmp_path: Path):
+    archive = create_archive(tmp_path)
+
+    (goal,) = archive.find(team="A", event="GOAL", half=2)
+    window = archive.window(goal, 20, 5)
+    # The window is clamped to the start of the half
+    assert len(window) == 15
+    assert window[0, 0] == np.float32(12.0)
+
+    (goal,) = archive.find(team="B", event="GOAL")
+    window = archive.window(goal, 20, 100)
+    assert len(window) == 70
+    player = TrajectoryPlayer(str(tmp_path / "3.rcjtraj"))
+    assert np.array_equal(window, player.poses(230, 300))
+    player.close()
+
+    hits = list(archive.windows(2, 3, event="GOAL"))
+    assert [len(window) for _, window in hits] == [5, 5, 5]
+
+
+def test_reopen_and_add_again(tmp_path: Path):
+    create_archive(tmp_path)
+    write_half(tmp_path / "4.rcjtraj", 2, 2, "B", "C", {20: "blue"})
+
+    archive = TournamentArchive(tmp_path / "archive")
+    assert archive.add(tmp_path / "1.rcjtraj") == 0
+    assert archive.add(tmp_path / "4.rcjtraj") == 4
+    assert len(archive.poses) == 1200
+    assert [g.match for g in archive.find(team="B", event="GOAL")] == [
+        "2",
+        "2",
+    ]
+    assert len(list((tmp_path / "archive").glob("index_tick.*.npy"))) == 1
+
+
+def test_interrupted_addition_is_discarded(tmp_path: Path):
+    archive = create_archive(tmp_path)
+    with open(tmp_path / "archive" / POSES_FILE, "ab") as outfile:
+        outfile.write(b"\0" * 1000)
+
+    write_half(tmp_path / "4.rcjtraj", 2, 2, "B", "C", {20: "blue"})
+    archive = TournamentArchive(tmp_path / "archive")
+    archive.add(tmp_path / "4.rcjtraj")
+
+    (goal,) = archive.find(team="B", event="GOAL", match="2", half=2)
+    assert archive.window(goal, 0, 1)[0, 0] == np.float32(22.02)
+
+
+def test_cli(tmp_path: Path, capsys):
+    write_half(tmp_path / "1.rcjtraj", 1, 1, "A", "B", {50: "blue"})
+    main(["add", str(tmp_path / "archive"), str(tmp_path / "1.rcjtraj")])
+
+    output = tmp_path / "goals.npz"
+    main(
+        [
+            "find",
+            str(tmp_path / "archive"),
+            "--team",
+            "A",
+            "--event",
+            "GOAL",
+            "--output",
+            str(output),
+        ]
+    )
+    assert "1\t1\tA\tGOAL\t50" in capsys.readouterr().out
+    with np.load(output) as windows:
+        assert len(windows["arr_0"]) > 0
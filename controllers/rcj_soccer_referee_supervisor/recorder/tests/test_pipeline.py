@@ -0,0 +1,118 @@
+import hashlib
+import json
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.modules["controller"] = MagicMock()
+
+from recorder.pipeline import ArtifactWorker, INDEX_FILENAME, RecorderPipeline
+
+
+class FakeRecorder:
+    def __init__(self, filename: str, polls_until_ready: int):
+        self.filename = filename
+        self.polls_until_ready = polls_until_ready
+        self.recording = True
+        self.polls = 0
+        self.post_processed = False
+
+    def is_recording(self) -> bool:
+        return self.recording
+
+    def stop_recording(self):
+        self.recording = False
+
+    def is_ready(self) -> bool:
+        self.polls += 1
+        return self.polls > self.polls_until_ready
+
+    def artifacts(self):
+        return [Path(self.filename)] if self.filename else []
+
+    def post_process(self):
+        self.post_processed = True
+
+
+def create_recording(path: Path, data: bytes) -> str:
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_worker_moves_hashes_and_indexes(tmp_path: Path):
+    source = tmp_path / "match.mp4"
+    source.write_bytes(b"video")
+    artifacts_dir = tmp_path / "artifacts"
+
+    worker = ArtifactWorker(artifacts_dir)
+    worker.submit([source])
+    worker.close()
+
+    moved = artifacts_dir / "match.mp4"
+    assert not source.exists()
+    assert moved.read_bytes() == b"video"
+
+    entry = json.loads((artifacts_dir / INDEX_FILENAME).read_text())
+    assert entry == {
+        "path": str(moved),
+        "size": 5,
+        "sha256": hashlib.sha256(b"video").hexdigest(),
+    }
+    assert worker.artifacts == [entry]
+
+
+def test_worker_reports_missing_artifact(tmp_path: Path, capsys):
+    worker = ArtifactWorker()
+    worker.submit([tmp_path / "missing.mp4"])
+    worker.close()
+
+    assert worker.artifacts == []
+    assert "missing.mp4" in capsys.readouterr().out
+
+
+def test_worker_post_processes_before_moving(tmp_path: Path):
+    source = tmp_path / "match.html"
+    source.write_text("page")
+    companion = tmp_path / "match.json"
+    companion.write_text("{}")
+
+    def post_process():
+        companion.write_text("{ }")
+
+    worker = ArtifactWorker(tmp_path / "artifacts")
+    worker.submit([source, companion], post_process)
+    worker.close()
+
+    assert (tmp_path / "artifacts" / "match.json").read_text() == "{ }"
+    assert len(worker.artifacts) == 2
+
+
+def test_pipeline_polls_recorders_together(tmp_path: Path):
+    slow = FakeRecorder(create_recording(tmp_path / "a.mp4", b"a"), 3)
+    fast = FakeRecorder(create_recording(tmp_path / "a.html", b"b"), 0)
+    idle = FakeRecorder("", 0)
+    idle.recording = False
+    delays = []
+
+    pipeline = RecorderPipeline(
+        [slow, fast, idle],
+        initial_delay=0.1,
+        max_delay=0.3,
+        sleep=delays.append,
+    )
+    pipeline.stop_recording()
+    assert pipeline.pending == [slow, fast]
+    assert not slow.is_recording()
+
+    pipeline.wait()
+
+    assert slow.polls == 4
+    assert fast.polls == 1
+    assert idle.polls == 0
+    assert slow.post_processed and fast.post_processed
+    # The delay is reset once a recording gets ready and then backs off
+    assert delays == [0.1, 0.2, 0.3]
+    paths = [artifact["path"] for artifact in pipeline.worker.artifacts]
+    assert paths == [fast.filename, slow.filename]
+    index = (tmp_path / INDEX_FILENAME).read_text().splitlines()
+    assert len(index) == 2
@@ -0,0 +1,144 @@
+import struct
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from recorder.render import (
+    BALL_COLOR,
+    BLUE_COLOR,
+    encode_png,
+    FIELD_COLOR,
+    FieldRenderer,
+    HEADING_COLOR,
+    LINE_COLOR,
+    render,
+    split_ranges,
+    YELLOW_COLOR,
+)
+from recorder.trajectory import Frame, TrajectoryWriter
+from referee.consts import ROBOT_NAMES
+
+
+def pixel(renderer: FieldRenderer, image: np.ndarray, x: float, y: float):
+    row = int((renderer.x_max - x) * renderer.scale)
+    column = int((y - renderer.y_min) * renderer.scale)
+    return tuple(image[row, column])
+
+
+def create_frame(ball=(0.2, 0.3, 0.0)) -> Frame:
+    return Frame(
+        0,
+        list(ball),
+        {"B1": [0.3, 0.3, 0.04], "Y1": [-0.3, -0.3, 0.04]},
+        {"B1": [0, 0, 1, -1.57], "Y1": [0, 0, 1, 1.57]},
+        0,
+        0,
+    )
+
+
+def test_background():
+    renderer = FieldRenderer(200)
+    image = renderer.background
+
+    assert image.shape == (renderer.height, renderer.width, 3)
+    assert renderer.width % 2 == 0 and renderer.height % 2 == 0
+    assert pixel(renderer, image, 0.0, 0.0) == LINE_COLOR
+    assert pixel(renderer, image, 0.1, 0.4) == FIELD_COLOR
+    assert pixel(renderer, image, 0.0, 0.8) == BLUE_COLOR
+    assert pixel(renderer, image, 0.0, -0.8) == YELLOW_COLOR
+
+
+def test_draw_frame():
+    renderer = FieldRenderer(200)
+    background = renderer.background.copy()
+
+    image = renderer.draw_frame(create_frame())
+
+    assert pixel(renderer, image, 0.2, 0.3) == BALL_COLOR
+    assert pixel(renderer, image, 0.3, 0.33) == BLUE_COLOR
+    assert pixel(renderer, image, 0.3, 0.28) == HEADING_COLOR
+    assert pixel(renderer, image, -0.3, -0.33) == YELLOW_COLOR
+    assert pixel(renderer, image, -0.3, -0.28) == HEADING_COLOR
+    # The background is left untouched
+    assert (renderer.background == background).all()
+
+
+def test_draw_frame_outside_of_image():
+    renderer = FieldRenderer(100)
+
+    image = renderer.draw_frame(create_frame(ball=(5.0, 5.0, 0.0)))
+
+    assert BALL_COLOR not in set(map(tuple, image.reshape(-1, 3)))
+
+
+def test_encode_png():
+    image = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+
+    data = encode_png(image)
+
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+    width, height = struct.unpack(">II", data[16:24])
+    assert (width, height) == (3, 2)
+    length = struct.unpack(">I", data[33:37])[0]
+    rows = zlib.decompress(data[41 : 41 + length])  # noqa: E203
+    assert rows == b"\x00" + image[0].tobytes() + b"\x00" + image[1].tobytes()
+
+
+@pytest.mark.parametrize(
+    "ticks,parts,step,expected",
+    [
+        (10, 2, 1, [(0, 5), (5, 10)]),
+        (10, 3, 2, [(0, 4), (4, 6), (6, 10)]),
+        (2, 4, 1, [(0, 1), (1, 2)]),
+    ],
+)
+def test_split_ranges(ticks, parts, step, expected):
+    assert split_ranges(ticks, parts, step) == expected
+
+
+def write_trajectory(path: Path, ticks: int):
+    with open(path, "wb") as outfile:
+        writer = TrajectoryWriter(outfile, chunk_size=8)
+        for tick in range(ticks):
+            writer.write_frame(
+                [0.0, -0.5 + 0.05 * tick, 0.0],
+                [[0.0, 0.0, 0.04]] * len(ROBOT_NAMES),
+                [[0.0, 0.0, 1.0, 0.0]] * len(ROBOT_NAMES),
+                0,
+                0,
+            )
+        writer.close()
+
+
+def test_render_png(tmp_path: Path):
+    path = tmp_path / "match.rcjtraj"
+    write_trajectory(path, 20)
+
+    frames, width, height = render(path, tmp_path / "frames", processes=2)
+
+    assert frames == 20
+    pngs = sorted((tmp_path / "frames").iterdir())
+    assert [p.name for p in pngs[:2]] == [
+        "frame_000000.png",
+        "frame_000001.png",
+    ]
+    assert len(pngs) == 20
+
+
+def test_render_raw(tmp_path: Path):
+    path = tmp_path / "match.rcjtraj"
+    write_trajectory(path, 20)
+    output = tmp_path / "match.rgb"
+
+    frames, width, height = render(
+        path, output, "raw", processes=1, step=3, scale=100
+    )
+
+    assert frames == 7
+    video = np.fromfile(output, dtype=np.uint8).reshape(7, height, width, 3)
+    renderer = FieldRenderer(100)
+    for n in (0, 6):
+        ball_y = -0.5 + 0.05 * 3 * n
+        assert pixel(renderer, video[n], 0.0, ball_y) == BALL_COLOR
@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+sys.modules["controller"] = MagicMock()
+
+from recorder.replay import TrajectoryReplay
+from recorder.trajectory import TrajectoryPlayer, TrajectoryWriter
+from referee.consts import ROBOT_NAMES, TIME_STEP
+
+
+def write_trajectory(path: Path, ticks: int):
+    with open(path, "wb") as outfile:
+        writer = TrajectoryWriter(outfile, chunk_size=4)
+        writer.write_event(
+            "MATCH_START",
+            {
+                "total_match_time": 10,
+                "team_name_blue": "Blues",
+                "team_name_yellow": "Yellows",
+            },
+        )
+        for tick in range(ticks):
+            writer.write_frame(
+                [0.0, 0.0, 0.5 * tick],
+                [[float(n), float(tick), 0.0] for n in range(6)],
+                [[0.0, 0.0, 1.0, 0.5] for _ in range(6)],
+                tick // 5,
+                0,
+            )
+        writer.close()
+
+
+def test_replay_sets_poses(tmp_path: Path):
+    path = tmp_path / "match.rcjtraj"
+    write_trajectory(path, 10)
+    player = TrajectoryPlayer(str(path))
+    supervisor = MagicMock()
+    supervisor.step.return_value = 0
+
+    assert TrajectoryReplay(supervisor, player).run() == 10
+
+    supervisor.detach_robot_controllers.assert_called_once()
+    supervisor.draw_team_names.assert_called_once_with("Blues", "Yellows")
+    supervisor.step.assert_called_with(TIME_STEP)
+    assert supervisor.step.call_count == 10
+
+    supervisor.set_ball_position.assert_called_with([0.0, 0.0, 4.5])
+    supervisor.set_robot_position.assert_called_with(
+        ROBOT_NAMES[-1], [5.0, 9.0, 0.0]
+    )
+    supervisor.set_robot_rotation.assert_called_with(
+        ROBOT_NAMES[-1], [0.0, 0.0, 1.0, 0.5]
+    )
+    supervisor.draw_scores.assert_called_with(1, 0)
+    time = supervisor.draw_time.call_args[0][0]
+    assert abs(time - (10 - 10 * TIME_STEP / 1000)) < 1e-9
+    player.close()
+
+
+def test_replay_stops_with_simulation(tmp_path: Path):
+    path = tmp_path / "match.rcjtraj"
+    write_trajectory(path, 10)
+    player = TrajectoryPlayer(str(path))
+    supervisor = MagicMock()
+    supervisor.step.side_effect = [0, 0, -1]
+
+    assert TrajectoryReplay(supervisor, player).run() == 3
+    player.close()
@@ -0,0 +1,141 @@
+import math
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+sys.modules["controller"] = MagicMock()
+
+import recorder.recorder
+from recorder.recorder import TrajectoryRecordAssistant
+from recorder.trajectory import TrajectoryPlayer, TrajectoryWriter
+from referee.consts import ROBOT_NAMES, TIME_STEP
+
+
+def robot_pose(tick: int, n: int):
+    angle = tick * 0.01 + n
+    translation = [0.5 * math.cos(angle), 0.4 * math.sin(angle), 0.04]
+    rotation = [0.0, 0.0, 1.0, angle % (2 * math.pi)]
+    return translation, rotation
+
+
+def write_match(path: Path, ticks: int, chunk_size: int = 256):
+    with open(path, "wb") as outfile:
+        writer = TrajectoryWriter(outfile, chunk_size=chunk_size)
+        for tick in range(ticks):
+            if tick == 10:
+                writer.write_event("GOAL", {"team_name": "The Blues"})
+            poses = [robot_pose(tick, n) for n in range(len(ROBOT_NAMES))]
+            writer.write_frame(
+                [0.001 * tick, 0.0, 0.02],
+                [translation for translation, _ in poses],
+                [rotation for _, rotation in poses],
+                int(tick >= 10),
+                0,
+            )
+        writer.write_event("MATCH_FINISH")
+        writer.close()
+
+
+def test_roundtrip_and_seek(tmp_path: Path):
+    path = tmp_path / "match.rcjtraj"
+    write_match(path, 1000, chunk_size=64)
+
+    player = TrajectoryPlayer(str(path))
+    assert len(player) == 1000
+    assert player.time_step == TIME_STEP
+    assert player.robot_names == ROBOT_NAMES
+
+    for tick in (999, 0, 500, 63, 64):
+        frame = player.frame(tick)
+        translation, rotation = robot_pose(tick, 2)
+        assert frame.tick == tick
+        assert frame.robot_translations["B3"] == list(np.float32(translation))
+        assert frame.robot_rotations["B3"] == list(np.float32(rotation))
+        assert frame.ball_translation[0] == np.float32(0.001 * tick)
+        assert frame.score_blue == int(tick >= 10)
+
+    with pytest.raises(IndexError):
+        player.frame(1000)
+
+    poses = player.poses(60, 70)
+    assert poses.shape == (10, 45)
+    assert poses[5, 0] == np.float32(0.065)
+    assert len(list(player)) == 1000
+
+    assert player.events() == [
+        [10, "GOAL", {"team_name": "The Blues"}],
+        [1000, "MATCH_FINISH", None],
+    ]
+    assert player.events(0, 1000) == [[10, "GOAL", {"team_name": "The Blues"}]]
+    player.close()
+
+
+def test_incomplete_chunk_is_ignored(tmp_path: Path):
+    path = tmp_path / "match.rcjtraj"
+    write_match(path, 200, chunk_size=64)
+    data = path.read_bytes()
+    path.write_bytes(data[:-10])
+
+    player = TrajectoryPlayer(str(path))
+    assert len(player) == 192
+    assert player.frame(191).tick == 191
+    player.close()
+
+
+def test_not_a_trajectory(tmp_path: Path):
+    path = tmp_path / "match.rcjtraj"
+    path.write_bytes(b"something else entirely")
+
+    with pytest.raises(ValueError):
+        TrajectoryPlayer(str(path))
+
+
+def test_full_match_is_small(tmp_path: Path):
+    path = tmp_path / "match.rcjtraj"
+    ticks = 10 * 60 * 1000 // TIME_STEP
+    write_match(path, ticks)
+
+    assert path.stat().st_size < 4 * 1024 * 1024
+    player = TrajectoryPlayer(str(path))
+    assert len(player) == ticks
+    player.close()
+
+
+class FakeSupervisor:
+    def __init__(self):
+        self.position_listeners = []
+        self.ball_translation = [0.0, 0.0, 0.02]
+        poses = [robot_pose(0, n) for n in range(len(ROBOT_NAMES))]
+        self.robot_translation = {
+            robot: translation
+            for robot, (translation, _) in zip(ROBOT_NAMES, poses)
+        }
+        self.robot_rotation = {
+            robot: rotation for robot, (_, rotation) in zip(ROBOT_NAMES, poses)
+        }
+
+    def update_positions(self):
+        for listener in self.position_listeners:
+            listener()
+
+
+def test_halves_on_one_supervisor(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(recorder.recorder, "Supervisor", FakeSupervisor)
+    supervisor = FakeSupervisor()
+    paths = [tmp_path / f"half{half}.rcjtraj" for half in (1, 2)]
+
+    for path, ticks in zip(paths, (3, 5)):
+        trajectory = TrajectoryRecordAssistant(supervisor, str(path))
+        trajectory.start_recording()
+        for _ in range(ticks):
+            supervisor.update_positions()
+        trajectory.stop_recording()
+        assert supervisor.position_listeners == []
+
+    for path, ticks in zip(paths, (3, 5)):
+        player = TrajectoryPlayer(str(path))
+        assert len(player) == ticks
+        player.close()
@@ -0,0 +1,351 @@
+"""Compact trajectory recording format.
+
+The file starts with a header naming the recorded robots, followed by chunks
+of consecutive ticks. Each chunk holds the float32 poses of the ball (its
+translation) and of the robots (translation and rotation), the scores and
+the events of those ticks. The poses and scores are stored as zlib
+compressed differences between consecutive ticks, computed on the raw bits
+of the values, so that they are restored exactly.
+"""
+import json
+import mmap
+import struct
+import zlib
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+numpy_installed = False
+try:
+    import numpy as np
+
+    numpy_installed = True
+except Exception:
+    print(
+        "Numpy module not installed, trajectory recording disabled."
+        " To enable, run 'pip install numpy'"
+    )
+
+from referee.consts import ROBOT_NAMES, TIME_STEP
+
+MAGIC = b"RCJTRJ"
+FORMAT_VERSION = 1
+
+# Number of ticks stored in a single chunk
+DEFAULT_CHUNK_SIZE = 256
+
+BALL_POSE_SIZE = 3
+ROBOT_POSE_SIZE = 7
+
+# Format version, time step in milliseconds, ticks per chunk, robot count
+FILE_HEADER = struct.Struct("<BHIB")
+# First tick, tick count and the compressed sizes of the poses, the scores
+# and the events
+CHUNK_HEADER = struct.Struct("<IIIII")
+NAME_LENGTH = struct.Struct("<B")
+
+
+def pose_size(robot_count: int) -> int:
+    return BALL_POSE_SIZE + robot_count * ROBOT_POSE_SIZE
+
+
+def _pack_deltas(array: "np.ndarray", dtype) -> bytes:
+    """Compress the differences between consecutive rows of the array."""
+    raw = array.view(dtype)
+    deltas = np.diff(raw, axis=0, prepend=np.zeros_like(raw[:1]))
+    return zlib.compress(deltas.tobytes())
+
+
+def _unpack_deltas(data: bytes, dtype, shape: Tuple[int, int]):
+    deltas = np.frombuffer(zlib.decompress(data), dtype=dtype)
+    return np.cumsum(deltas.reshape(shape), axis=0, dtype=dtype)
+
+
+class TrajectoryWriter:
+    """Write per-tick poses, scores and events into a trajectory file."""
+
+    def __init__(
+        self,
+        outfile: BinaryIO,
+        robot_names: Sequence[str] = ROBOT_NAMES,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        time_step: int = TIME_STEP,
+    ):
+        if not numpy_installed:
+            raise RuntimeError("Trajectory recording requires numpy")
+
+        self.outfile = outfile
+        self.robot_names = list(robot_names)
+        self.chunk_size = chunk_size
+        self.time_step = time_step
+
+        self.tick = 0
+        self.chunk_start = 0
+        self.poses = np.zeros(
+            (chunk_size, pose_size(len(robot_names))), dtype=np.float32
+        )
+        self.scores = np.zeros((chunk_size, 2), dtype=np.int32)
+        self.events: List[list] = []
+
+        header = MAGIC + FILE_HEADER.pack(
+            FORMAT_VERSION, time_step, chunk_size, len(robot_names)
+        )
+        for name in self.robot_names:
+            encoded = name.encode("utf8")
+            header += NAME_LENGTH.pack(len(encoded)) + encoded
+        self.outfile.write(header)
+
+    def write_frame(
+        self,
+        ball_translation: Sequence[float],
+        robot_translations: Sequence[Sequence[float]],
+        robot_rotations: Sequence[Sequence[float]],
+        score_blue: int,
+        score_yellow: int,
+    ):
+        """Write the state of a single tick.
+
+        Args:
+            ball_translation (list): x, y and z coordinates of the ball
+            robot_translations (list): Translation of each robot
+            robot_rotations (list): Rotation (axis and angle) of each robot
+            score_blue (int): Score of the blue team
+            score_yellow (int): Score of the yellow team
+        """
+        row = list(ball_translation)
+        for translation, rotation in zip(robot_translations, robot_rotations):
+            row += translation
+            row += rotation
+
+        i = self.tick - self.chunk_start
+        self.poses[i] = row
+        self.scores[i] = (score_blue, score_yellow)
+        self.tick += 1
+
+        if self.tick - self.chunk_start == self.chunk_size:
+            self.flush_chunk()
+
+    def write_event(self, event_type: str, payload: Optional[dict] = None):
+        """Write an event which happened on the current tick."""
+        self.events.append([self.tick, event_type, payload])
+
+    def flush_chunk(self):
+        """Write the ticks which are not written yet as a chunk."""
+        count = self.tick - self.chunk_start
+        if count == 0 and not self.events:
+            return
+
+        poses = _pack_deltas(self.poses[:count], np.int32)
+        scores = _pack_deltas(self.scores[:count], np.int32)
+        events = zlib.compress(json.dumps(self.events).encode("utf8"))
+
+        self.outfile.write(
+            CHUNK_HEADER.pack(
+                self.chunk_start, count, len(poses), len(scores), len(events)
+            )
+        )
+        self.outfile.write(poses + scores + events)
+
+        self.chunk_start = self.tick
+        self.events = []
+
+    def close(self):
+        self.flush_chunk()
+        self.outfile.flush()
+
+
+class Frame:
+    """State of the match on a single tick."""
+
+    __slots__ = (
+        "tick",
+        "ball_translation",
+        "robot_translations",
+        "robot_rotations",
+        "score_blue",
+        "score_yellow",
+    )
+
+    def __init__(
+        self,
+        tick: int,
+        ball_translation: List[float],
+        robot_translations: Dict[str, List[float]],
+        robot_rotations: Dict[str, List[float]],
+        score_blue: int,
+        score_yellow: int,
+    ):
+        self.tick = tick
+        self.ball_translation = ball_translation
+        self.robot_translations = robot_translations
+        self.robot_rotations = robot_rotations
+        self.score_blue = score_blue
+        self.score_yellow = score_yellow
+
+
+class TrajectoryPlayer:
+    """Read a trajectory file with random access by tick.
+
+    The file is memory mapped and only the chunks which are accessed get
+    decompressed. A chunk which is incomplete (e.g. when the file is still
+    being written) is ignored.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.buffer[: len(MAGIC)] != MAGIC:
+            raise ValueError("Not a trajectory file")
+        offset = len(MAGIC)
+        (
+            version,
+            self.time_step,
+            self.chunk_size,
+            robot_count,
+        ) = FILE_HEADER.unpack_from(self.buffer, offset)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported trajectory version {version}")
+        offset += FILE_HEADER.size
+
+        self.robot_names = []
+        for _ in range(robot_count):
+            (length,) = NAME_LENGTH.unpack_from(self.buffer, offset)
+            offset += NAME_LENGTH.size
+            end = offset + length
+            self.robot_names.append(self.buffer[offset:end].decode("utf8"))
+            offset = end
+        self.width = pose_size(robot_count)
+
+        # First tick, tick count and offset of the header of each chunk
+        self.chunks: List[Tuple[int, int, int]] = []
+        while offset + CHUNK_HEADER.size <= len(self.buffer):
+            first_tick, count, *sizes = CHUNK_HEADER.unpack_from(
+                self.buffer, offset
+            )
+            end = offset + CHUNK_HEADER.size + sum(sizes)
+            if end > len(self.buffer):
+                break
+            self.chunks.append((first_tick, count, offset))
+            offset = end
+
+        self.ticks = sum(count for _, count, _ in self.chunks)
+        self.cached_chunk: Optional[int] = None
+        self.cached_data = None
+
+    def __len__(self) -> int:
+        return self.ticks
+
+    def close(self):
+        self.buffer.close()
+        self.file.close()
+
+    def read_chunk(self, index: int):
+        """Decompress the chunk.
+
+        Returns:
+            tuple: Poses, scores and events of the chunk
+        """
+        if self.cached_chunk == index:
+            return self.cached_data
+
+        _, count, offset = self.chunks[index]
+        _, _, poses_size, scores_size, events_size = CHUNK_HEADER.unpack_from(
+            self.buffer, offset
+        )
+        offset += CHUNK_HEADER.size
+        poses_end = offset + poses_size
+        scores_end = poses_end + scores_size
+        events_end = scores_end + events_size
+
+        poses = _unpack_deltas(
+            self.buffer[offset:poses_end], np.int32, (count, self.width)
+        ).view(np.float32)
+        scores = _unpack_deltas(
+            self.buffer[poses_end:scores_end], np.int32, (count, 2)
+        )
+        events = json.loads(
+            zlib.decompress(self.buffer[scores_end:events_end])
+        )
+
+        self.cached_chunk = index
+        self.cached_data = (poses, scores, events)
+        return self.cached_data
+
+    def _chunk_index(self, tick: int) -> int:
+        if not 0 <= tick < self.ticks:
+            raise IndexError(f"Tick {tick} is not recorded")
+        # All of the chunks but the last one are full
+        return tick // self.chunk_size
+
+    def poses(self, start: int = 0, end: Optional[int] = None):
+        """Get the poses of the ticks in the range.
+
+        Returns:
+            np.ndarray: One row per tick with the ball translation followed by
+            the translation and rotation of each robot
+        """
+        end = self.ticks if end is None else min(end, self.ticks)
+        parts = []
+        for index in range(len(self.chunks)):
+            first_tick, count, _ = self.chunks[index]
+            if first_tick + count <= start or first_tick >= end:
+                continue
+            poses = self.read_chunk(index)[0]
+            lower = max(start - first_tick, 0)
+            upper = min(end - first_tick, count)
+            parts.append(poses[lower:upper])
+        if not parts:
+            return np.zeros((0, self.width), dtype=np.float32)
+        return np.concatenate(parts)
+
+    def frame(self, tick: int) -> Frame:
+        """Get the state of the match on the tick.
+
+        Args:
+            tick (int): Index of the tick
+
+        Returns:
+            Frame: The poses and scores on the tick
+        """
+        index = self._chunk_index(tick)
+        poses, scores, _ = self.read_chunk(index)
+        i = tick - self.chunks[index][0]
+        row = poses[i].tolist()
+
+        translations = {}
+        rotations = {}
+        for n, robot in enumerate(self.robot_names):
+            start = BALL_POSE_SIZE + n * ROBOT_POSE_SIZE
+            middle = start + 3
+            end = start + ROBOT_POSE_SIZE
+            translations[robot] = row[start:middle]
+            rotations[robot] = row[middle:end]
+
+        score_blue, score_yellow = scores[i].tolist()
+        return Frame(
+            tick,
+            row[:BALL_POSE_SIZE],
+            translations,
+            rotations,
+            score_blue,
+            score_yellow,
+        )
+
+    def __iter__(self) -> Iterator[Frame]:
+        for tick in range(self.ticks):
+            yield self.frame(tick)
+
+    def events(self, start: int = 0, end: Optional[int] = None) -> List[list]:
+        """Get the events which happened on the ticks in the range.
+
+        The events which happen after the last position update of the match
+        (such as its finish) are on the tick after the last recorded one.
+
+        Returns:
+            list: Tick, event type and payload of each event
+        """
+        events = []
+        for index in range(len(self.chunks)):
+            for event in self.read_chunk(index)[2]:
+                if event[0] >= start and (end is None or event[0] < end):
+                    events.append(event)
+        return events
@@ -0,0 +1,513 @@
+"""Compact binary reflog format.
+
+The file starts with a header describing the payload schema of each event
+type, followed by one length-prefixed frame per event. A frame holds the
+event type id, flags, the tick index, the match time and the UTC time of the
+event, followed by the payload values in the order given by the schema.
+
+Events which do not fit their schema are stored with their payload encoded
+as JSON, so that any event can be logged.
+
+The reader decodes the frames in blocks: the fixed-size frame headers (and
+the times of the events) are decoded together with numpy, and the payloads,
+which repeat a lot within a match, are only decoded once per block.
+"""
+import argparse
+import atexit
+import json
+import os
+import struct
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+numpy_installed = False
+try:
+    import numpy as np
+
+    numpy_installed = True
+except Exception:
+    print(
+        "Numpy module not installed, decoding the binary reflogs in bulk"
+        " disabled. To enable, run 'pip install numpy'"
+    )
+
+from referee.consts import TIME_STEP
+from referee.enums import GameEvents
+from referee.event_handlers import EventHandler
+from referee.events import Event
+
+MAGIC = b"RCJLOG"
+FORMAT_VERSION = 2
+
+# Keys of the payload of each event type, in the order they are serialized.
+# The ids of the event types are the positions in this table, starting at 1.
+SCHEMAS: Dict[GameEvents, Tuple[str, ...]] = {
+    GameEvents.MATCH_START: (
+        "score_yellow",
+        "score_blue",
+        "total_match_time",
+        "team_name_yellow",
+        "team_name_blue",
+        "match_id",
+        "halftime",
+    ),
+    GameEvents.MATCH_FINISH: (
+        "total_match_time",
+        "score_yellow",
+        "score_blue",
+        "team_name_yellow",
+        "team_name_blue",
+    ),
+    GameEvents.LACK_OF_PROGRESS: ("type", "robot_name"),
+    GameEvents.INSIDE_PENALTY_FOR_TOO_LONG: ("type", "robot_name"),
+    GameEvents.KICKOFF: ("robot_name", "team_name"),
+    GameEvents.GOAL: ("team_name", "score_yellow", "score_blue"),
+    GameEvents.EVENTS_SUPPRESSED: ("event", "type", "robot_name", "count"),
+}
+
+# Event type id of the events stored with their type name and JSON payload
+JSON_EVENT_TYPE_ID = 0
+
+# Length of the frame which follows
+FRAME_LENGTH = struct.Struct("<H")
+# Event type id, flags, tick index, match time and microseconds since the
+# epoch
+FRAME_HEADER = struct.Struct("<BBIdq")
+# The match time is an int (e.g. 0 at the start of the match), which the
+# JSON reflog writes without a fraction
+FLAG_INT_MATCHTIME = 1
+# Bitmask of the schema keys present in the payload
+PRESENCE_MASK = struct.Struct("<H")
+STRING_LENGTH = struct.Struct("<H")
+INT_VALUE = struct.Struct("<q")
+FLOAT_VALUE = struct.Struct("<d")
+
+# Tags of the payload values
+TAG_NONE = 0
+TAG_FALSE = 1
+TAG_TRUE = 2
+TAG_INT = 3
+TAG_FLOAT = 4
+TAG_STRING = 5
+
+EPOCH = datetime(1970, 1, 1)
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+# Bytes read (and frames decoded together) at once
+READ_BLOCK_SIZE = 1 << 20
+
+
+def _pack_string(value: str) -> bytes:
+    encoded = value.encode("utf8")
+    return STRING_LENGTH.pack(len(encoded)) + encoded
+
+
+def _unpack_string(buffer: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = STRING_LENGTH.unpack_from(buffer, offset)
+    start = offset + STRING_LENGTH.size
+    end = start + length
+    return buffer[start:end].decode("utf8"), end
+
+
+def _pack_value(value) -> bytes:
+    """Pack a single payload value together with its tag.
+
+    Raises:
+        TypeError: if the value is not a scalar
+    """
+    if value is None:
+        return bytes((TAG_NONE,))
+    if value is True:
+        return bytes((TAG_TRUE,))
+    if value is False:
+        return bytes((TAG_FALSE,))
+    if isinstance(value, int):
+        return bytes((TAG_INT,)) + INT_VALUE.pack(value)
+    if isinstance(value, float):
+        return bytes((TAG_FLOAT,)) + FLOAT_VALUE.pack(value)
+    if isinstance(value, str):
+        return bytes((TAG_STRING,)) + _pack_string(value)
+    raise TypeError(f"Unsupported payload value {value!r}")
+
+
+def _unpack_value(buffer: bytes, offset: int):
+    tag = buffer[offset]
+    offset += 1
+    if tag == TAG_NONE:
+        return None, offset
+    if tag == TAG_FALSE:
+        return False, offset
+    if tag == TAG_TRUE:
+        return True, offset
+    if tag == TAG_INT:
+        return INT_VALUE.unpack_from(buffer, offset)[0], offset + 8
+    if tag == TAG_FLOAT:
+        return FLOAT_VALUE.unpack_from(buffer, offset)[0], offset + 8
+    if tag == TAG_STRING:
+        return _unpack_string(buffer, offset)
+    raise ValueError(f"Unexpected value tag {tag}")
+
+
+def pack_header(schemas: Dict[GameEvents, Tuple[str, ...]]) -> bytes:
+    """Pack the file header describing the schemas.
+
+    Args:
+        schemas (dict): Keys of the payload of each event type
+
+    Returns:
+        bytes: the packed header
+    """
+    header = MAGIC + bytes((FORMAT_VERSION, len(schemas)))
+    for event_type, keys in schemas.items():
+        header += _pack_string(event_type.value)
+        header += bytes((len(keys),))
+        for key in keys:
+            header += _pack_string(key)
+    return header
+
+
+def read_header(infile: BinaryIO) -> List[Tuple[str, Tuple[str, ...]]]:
+    """Read the file header.
+
+    Args:
+        infile (BinaryIO): File positioned at its beginning
+
+    Returns:
+        list: Pairs of event type name and payload keys, the id of each event
+        type is its position in the list plus one.
+    """
+    if infile.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a binary reflog")
+
+    version, count = infile.read(2)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary reflog version {version}")
+
+    def read_string() -> str:
+        (length,) = STRING_LENGTH.unpack(infile.read(STRING_LENGTH.size))
+        return infile.read(length).decode("utf8")
+
+    schemas = []
+    for _ in range(count):
+        name = read_string()
+        (key_count,) = infile.read(1)
+        keys = tuple(read_string() for _ in range(key_count))
+        schemas.append((name, keys))
+    return schemas
+
+
+class BinaryLogWriter:
+    """Write events into a binary reflog."""
+
+    def __init__(
+        self,
+        outfile: BinaryIO,
+        schemas: Dict[GameEvents, Tuple[str, ...]] = SCHEMAS,
+    ):
+        self.outfile = outfile
+        self.schemas = schemas
+        self.type_ids = {
+            event_type: type_id
+            for type_id, event_type in enumerate(schemas, start=1)
+        }
+
+    def write_header(self):
+        self.outfile.write(pack_header(self.schemas))
+
+    def _pack_payload(self, event_type: str, payload: Optional[dict]) -> bytes:
+        """Pack the payload against the schema of the event type.
+
+        Raises:
+            KeyError: if the payload does not fit the schema
+            TypeError: if a value of the payload is not a scalar
+        """
+        keys = self.schemas[GameEvents(event_type)]
+        # The keys need to keep their order so that the payload is read back
+        # exactly the same
+        if payload is None or list(payload) != [
+            k for k in keys if k in payload
+        ]:
+            raise KeyError(event_type)
+
+        mask = 0
+        values = b""
+        for i, key in enumerate(keys):
+            if key in payload:
+                mask |= 1 << i
+                values += _pack_value(payload[key])
+        return PRESENCE_MASK.pack(mask) + values
+
+    def write(
+        self,
+        time: datetime,
+        matchtime: float,
+        event_type: str,
+        payload: Optional[dict] = None,
+    ):
+        """Write a single event.
+
+        Args:
+            time (datetime): UTC time when the event happened
+            matchtime (float): Match time when the event happened
+            event_type (str): Event type
+            payload (dict, optional): More information about the event
+        """
+        tick = round(matchtime / (TIME_STEP / 1000.0))
+        microseconds = (time - EPOCH) // timedelta(microseconds=1)
+
+        try:
+            type_id = self.type_ids[GameEvents(event_type)]
+            body = self._pack_payload(event_type, payload)
+        except (KeyError, ValueError, TypeError):
+            type_id = JSON_EVENT_TYPE_ID
+            body = _pack_string(event_type) + _pack_string(json.dumps(payload))
+
+        flags = 0
+        if isinstance(matchtime, int):
+            flags |= FLAG_INT_MATCHTIME
+        frame = FRAME_HEADER.pack(
+            type_id, flags, tick, matchtime, microseconds
+        )
+        frame += body
+        self.outfile.write(FRAME_LENGTH.pack(len(frame)) + frame)
+
+
+def _unpack_payload(
+    frame: bytes,
+    offset: int,
+    type_id: int,
+    schemas: List[Tuple[str, Tuple[str, ...]]],
+) -> Tuple[str, Optional[dict]]:
+    """Unpack the event type and the payload which follow the frame header."""
+    if type_id == JSON_EVENT_TYPE_ID:
+        event_type, offset = _unpack_string(frame, offset)
+        payload_json, offset = _unpack_string(frame, offset)
+        return event_type, json.loads(payload_json)
+
+    event_type, keys = schemas[type_id - 1]
+    (mask,) = PRESENCE_MASK.unpack_from(frame, offset)
+    offset += PRESENCE_MASK.size
+    payload = {}
+    for i, key in enumerate(keys):
+        if mask & (1 << i):
+            payload[key], offset = _unpack_value(frame, offset)
+    return event_type, payload
+
+
+def _event_data(
+    time: str, matchtime, event_type: str, payload: Optional[dict]
+) -> dict:
+    data = {"datetime": time, "matchtime": matchtime, "event": event_type}
+    if payload is not None:
+        data["payload"] = payload
+    return data
+
+
+def _unpack_frame(
+    frame: bytes, schemas: List[Tuple[str, Tuple[str, ...]]]
+) -> dict:
+    """Unpack the event in the frame as written by `JSONLoggerHandler`."""
+    header = FRAME_HEADER.unpack_from(frame)
+    type_id, flags, _, matchtime, microseconds = header
+    if flags & FLAG_INT_MATCHTIME:
+        matchtime = int(matchtime)
+    time = EPOCH + timedelta(microseconds=microseconds)
+    event_type, payload = _unpack_payload(
+        frame, FRAME_HEADER.size, type_id, schemas
+    )
+    return _event_data(
+        time.strftime(DATETIME_FORMAT), matchtime, event_type, payload
+    )
+
+
+def _frame_offsets(buffer: bytes) -> Tuple[List[int], List[int], int]:
+    """Find the complete frames in the buffer.
+
+    Returns:
+        tuple: The offsets and the lengths of the frames, and the end of the
+        last one
+    """
+    offsets, lengths = [], []
+    position = 0
+    while position + FRAME_LENGTH.size <= len(buffer):
+        (length,) = FRAME_LENGTH.unpack_from(buffer, position)
+        start = position + FRAME_LENGTH.size
+        if start + length > len(buffer):
+            break
+        offsets.append(start)
+        lengths.append(length)
+        position = start + length
+    return offsets, lengths, position
+
+
+if numpy_installed:
+    HEADER_DTYPE = np.dtype(
+        [
+            ("type_id", "u1"),
+            ("flags", "u1"),
+            ("tick", "<u4"),
+            ("matchtime", "<f8"),
+            ("microseconds", "<i8"),
+        ]
+    )
+
+
+def _unpack_frames(
+    buffer: bytes,
+    offsets: List[int],
+    lengths: List[int],
+    schemas: List[Tuple[str, Tuple[str, ...]]],
+) -> Iterator[dict]:
+    """Unpack the frames of the buffer, decoding their headers together."""
+    if not numpy_installed:
+        for offset, length in zip(offsets, lengths):
+            end = offset + length
+            yield _unpack_frame(buffer[offset:end], schemas)
+        return
+
+    if not offsets:
+        return
+
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    columns = np.asarray(offsets, dtype=np.int64)[:, np.newaxis] + np.arange(
+        FRAME_HEADER.size
+    )
+    headers = raw[columns].view(HEADER_DTYPE)[:, 0]
+    times = np.datetime_as_string(
+        headers["microseconds"].astype("datetime64[us]"), unit="us"
+    )
+    is_int = (headers["flags"] & FLAG_INT_MATCHTIME).astype(bool)
+
+    # The payloads of the events repeat, they are only decoded once
+    payloads: Dict[Tuple[int, bytes], Tuple[str, Optional[dict]]] = {}
+    for offset, length, type_id, time, matchtime, int_matchtime in zip(
+        offsets,
+        lengths,
+        headers["type_id"].tolist(),
+        times.tolist(),
+        headers["matchtime"].tolist(),
+        is_int.tolist(),
+    ):
+        body, end = offset + FRAME_HEADER.size, offset + length
+        if type_id == JSON_EVENT_TYPE_ID:
+            frame = buffer[offset:end]
+            event_type, payload = _unpack_payload(
+                frame, FRAME_HEADER.size, type_id, schemas
+            )
+        else:
+            key = (type_id, buffer[body:end])
+            if key not in payloads:
+                payloads[key] = _unpack_payload(key[1], 0, type_id, schemas)
+            event_type, payload = payloads[key]
+            payload = dict(payload)
+        yield _event_data(
+            time + "Z",
+            int(matchtime) if int_matchtime else matchtime,
+            event_type,
+            payload,
+        )
+
+
+def read_binary_reflog(path: Path) -> Iterator[dict]:
+    """Read the events of a binary reflog.
+
+    An incomplete frame at the end of the file (e.g. when the file is still
+    being written) is ignored.
+
+    Args:
+        path (Path): Path of the binary reflog
+
+    Yields:
+        dict: The events, identical to the ones written by
+        `JSONLoggerHandler`
+    """
+    with open(path, "rb") as infile:
+        schemas = read_header(infile)
+
+        buffer = b""
+        while True:
+            block = infile.read(READ_BLOCK_SIZE)
+            buffer += block
+            offsets, lengths, end = _frame_offsets(buffer)
+            yield from _unpack_frames(buffer, offsets, lengths, schemas)
+            buffer = buffer[end:]
+            if not block:
+                return
+
+
+def convert_to_jsonl(path: Path, output_path: Path):
+    """Convert a binary reflog to the JSON lines written by
+    `JSONLoggerHandler`.
+
+    Args:
+        path (Path): Path of the binary reflog
+        output_path (Path): Path of the JSON lines file to be written
+    """
+    with open(output_path, "w") as outfile:
+        for data in read_binary_reflog(path):
+            outfile.write(json.dumps(data) + "\n")
+
+
+class BinaryLoggerHandler(EventHandler):
+    """Handler for writing data to a binary reflog.
+
+    The file is kept open and it is flushed and synced to the disk when the
+    match finishes and when the interpreter exits.
+    """
+
+    lossless = True
+
+    def __init__(self, logfile: Path):
+        super().__init__()
+        self.logfile = logfile
+
+        is_new = not logfile.exists() or logfile.stat().st_size == 0
+        if not is_new:
+            with open(logfile, "rb") as infile:
+                existing = read_header(infile)
+            expected = [(t.value, keys) for t, keys in SCHEMAS.items()]
+            if existing != expected:
+                raise ValueError(
+                    f"{logfile} was written with different schemas"
+                )
+
+        self.outfile = open(logfile, "ab")
+        self.writer = BinaryLogWriter(self.outfile)
+        if is_new:
+            self.writer.write_header()
+        atexit.register(self.close)
+
+    def handle(self, referee, event: Event):
+        matchtime = referee.match_time - referee.time
+        self.writer.write(
+            datetime.utcnow(),
+            matchtime,
+            event.event_type.value,
+            event.payload(),
+        )
+
+        if event.event_type == GameEvents.MATCH_FINISH:
+            self.flush()
+
+    def flush(self):
+        """Flush the file and sync it to the disk."""
+        if self.outfile.closed:
+            return
+        self.outfile.flush()
+        os.fsync(self.outfile.fileno())
+
+    def close(self):
+        self.flush()
+        self.outfile.close()
+        atexit.unregister(self.close)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert a binary reflog to JSON lines."
+    )
+    parser.add_argument("input", type=Path, help="binary reflog")
+    parser.add_argument("output", type=Path, help="JSON lines file")
+    args = parser.parse_args()
+
+    convert_to_jsonl(args.input, args.output)
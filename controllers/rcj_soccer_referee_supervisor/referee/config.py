@@ -0,0 +1,155 @@
+"""Configuration of a match.
+
+The configuration is read from a TOML or JSON file (set by `RCJ_SIM_CONFIG`)
+with the following sections, every value being optional:
+
+    [match]      id, half, time, auto, session, seed
+    [blue]       name, id, initial_score, rgb, png_url, controller
+    [yellow]     name, id, initial_score, rgb, png_url, controller
+    [robot]      ir_range
+    [referee]    broadcast_on_change, asynchronous_events, headless,
+                 suppression_window
+    [recording]  formats, output_path, artifacts_path, binary_reflog,
+                 replay_path, resources, step_budget
+    [world]      physics
+
+The colours, the controllers, the `ir_range` and the physics profile only
+affect the generated world, their defaults are shared with the scripts (see
+`referee.config_file`). The `RCJ_SIM_*` environment variables take
+precedence over the file.
+"""
+import copy
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from referee.config_file import read_config_file, WORLD_CONFIG
+from referee.consts import DEFAULT_MATCH_TIME, EVENT_SUPPRESSION_WINDOW
+from referee.resources import DEFAULT_STEP_BUDGET
+
+CONFIG_VARIABLE = "RCJ_SIM_CONFIG"
+
+DEFAULT_CONFIG: Dict[str, Dict[str, Any]] = {
+    "match": {
+        "id": "1",
+        "half": 1,
+        "time": DEFAULT_MATCH_TIME,
+        "auto": False,
+        "session": None,
+        "seed": None,
+    },
+    "blue": {
+        "name": "The Blues",
+        "id": "The Blues",
+        "initial_score": 0,
+        **WORLD_CONFIG["blue"],
+    },
+    "yellow": {
+        "name": "The Yellows",
+        "id": "The Yellows",
+        "initial_score": 0,
+        **WORLD_CONFIG["yellow"],
+    },
+    "robot": dict(WORLD_CONFIG["robot"]),
+    "referee": {
+        "broadcast_on_change": False,
+        "asynchronous_events": False,
+        "headless": False,
+        "suppression_window": EVENT_SUPPRESSION_WINDOW,
+    },
+    "recording": {
+        "formats": [],
+        "output_path": "reflog",
+        "artifacts_path": None,
+        "binary_reflog": False,
+        "replay_path": None,
+        "resources": False,
+        "step_budget": DEFAULT_STEP_BUDGET,
+    },
+    "world": dict(WORLD_CONFIG["world"]),
+}
+
+
+def _flag(value: str) -> bool:
+    # The flags are enabled by setting the variable to any value
+    return True
+
+
+def _formats(value: str) -> list:
+    return [f for f in value.split(",") if f]
+
+
+def _score(value: str) -> int:
+    return int(value or "0")
+
+
+# Section, key and parser of the value of each environment variable
+ENV_VARIABLES: Dict[str, Tuple[str, str, Callable[[str], Any]]] = {
+    "RCJ_SIM_TEAM_YELLOW_NAME": ("yellow", "name", str),
+    "RCJ_SIM_TEAM_YELLOW_ID": ("yellow", "id", str),
+    "RCJ_SIM_TEAM_Y_INITIAL_SCORE": ("yellow", "initial_score", _score),
+    "RCJ_SIM_TEAM_BLUE_NAME": ("blue", "name", str),
+    "RCJ_SIM_TEAM_BLUE_ID": ("blue", "id", str),
+    "RCJ_SIM_TEAM_B_INITIAL_SCORE": ("blue", "initial_score", _score),
+    "RCJ_SIM_MATCH_ID": ("match", "id", str),
+    "RCJ_SIM_HALF_ID": ("match", "half", int),
+    "RCJ_SIM_MATCH_TIME": ("match", "time", int),
+    "RCJ_SIM_AUTO_MODE": ("match", "auto", _flag),
+    "RCJ_SIM_SESSION": ("match", "session", str),
+    "RCJ_SIM_SEED": ("match", "seed", int),
+    "RCJ_SIM_REC_FORMATS": ("recording", "formats", _formats),
+    "RCJ_SIM_OUTPUT_PATH": ("recording", "output_path", str),
+    "RCJ_SIM_ARTIFACTS_PATH": ("recording", "artifacts_path", str),
+    "RCJ_SIM_BINARY_REFLOG": ("recording", "binary_reflog", _flag),
+    "RCJ_SIM_REPLAY_PATH": ("recording", "replay_path", str),
+    "RCJ_SIM_RESOURCES": ("recording", "resources", _flag),
+    "RCJ_SIM_STEP_BUDGET": ("recording", "step_budget", float),
+    "RCJ_SIM_BROADCAST_ON_CHANGE": ("referee", "broadcast_on_change", _flag),
+    "RCJ_SIM_ASYNC_EVENTS": ("referee", "asynchronous_events", _flag),
+    "RCJ_SIM_HEADLESS": ("referee", "headless", _flag),
+    "RCJ_SIM_SUPPRESSION_WINDOW": ("referee", "suppression_window", float),
+}
+
+
+def merge_config(config: dict, overrides: Mapping[str, Mapping[str, Any]]):
+    """Update the config with the values of the overrides.
+
+    Raises:
+        ValueError: If a section or a key is not known
+    """
+    for section, values in overrides.items():
+        if section not in config:
+            raise ValueError(f"Unknown config section [{section}]")
+        for key, value in values.items():
+            if key not in config[section]:
+                raise ValueError(f"Unknown config key {key} in [{section}]")
+            config[section][key] = value
+
+
+def load_config(
+    environ: Mapping[str, str],
+    path: Optional[Path] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Load the configuration of the match.
+
+    Args:
+        environ (dict): The environment variables
+        path (Path, optional): The config file, defaults to the one set by
+            `RCJ_SIM_CONFIG`
+
+    Returns:
+        dict: The values of each section, the defaults being overridden by
+        the config file, which is overridden by the environment variables
+    """
+    config = copy.deepcopy(DEFAULT_CONFIG)
+
+    if path is None and environ.get(CONFIG_VARIABLE):
+        path = Path(environ[CONFIG_VARIABLE])
+    if path is not None:
+        merge_config(config, read_config_file(path))
+
+    for variable, (section, key, parse) in ENV_VARIABLES.items():
+        if variable in environ:
+            config[section][key] = parse(environ[variable])
+
+    config["match"]["id"] = str(config["match"]["id"])
+    return config
@@ -0,0 +1,57 @@
+"""Reading of the match config files and the defaults of the world.
+
+The scripts which generate the worlds (`scripts/tournament/worlds.py`) load
+this module by its path, as they cannot import the referee, so that they
+read the config files and default the world the same way. It only imports
+the standard library.
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+tomllib_installed = False
+try:
+    import tomllib
+
+    tomllib_installed = True
+except Exception:
+    try:
+        import tomli as tomllib
+
+        tomllib_installed = True
+    except Exception:
+        pass
+
+# Defaults of the config values which affect the generated world
+WORLD_CONFIG: Dict[str, Dict[str, Any]] = {
+    "blue": {
+        "rgb": "0 0 1",
+        "png_url": "soccer/blue.png",
+        "controller": "rcj_soccer_team_blue",
+    },
+    "yellow": {
+        "rgb": "1 1 0",
+        "png_url": "soccer/yellow.png",
+        "controller": "rcj_soccer_team_yellow",
+    },
+    "robot": {
+        "ir_range": 0.6,
+    },
+    "world": {
+        "physics": "competition",
+    },
+}
+
+
+def read_config_file(path: Path) -> dict:
+    """Read the TOML (`.toml`) or JSON (any other suffix) file."""
+    if path.suffix != ".toml":
+        return json.loads(path.read_text())
+
+    if not tomllib_installed:
+        raise RuntimeError(
+            "Reading TOML requires Python 3.11 or the tomli module."
+            " To enable, run 'pip install tomli'"
+        )
+    with path.open("rb") as infile:
+        return tomllib.load(infile)
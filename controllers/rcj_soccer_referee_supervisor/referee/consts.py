@@ -75,3 +75,21 @@ MAX_EVENT_MESSAGES_IN_QUEUE = 10
 DISTANCE_AROUND_UNOCCUPIED_NEUTRAL_SPOT = 0.08
 
 LACK_OF_PROGRESS_NUMBER_OF_NEUTRAL_SPOTS = 3
+
+# Version of the supervisor packet sent when broadcasting only on change
+SUPERVISOR_PACKET_VERSION = 1
+# Number of steps after which an unchanged supervisor packet is re-sent
+SUPERVISOR_PACKET_KEEPALIVE_STEPS = 1000 // TIME_STEP
+
+# Maximum number of events waiting for an asynchronous event subscriber
+EVENT_QUEUE_SIZE = 1024
+
+# Number of seconds for which a repeated event of the same object is
+# suppressed after it has been fired
+EVENT_SUPPRESSION_WINDOW = 2
+
+# Spacing of the grid of candidate positions used when all the neutral
+# spots are occupied
+PLACEMENT_GRID_STEP = 0.05
+# Distance the candidate positions keep from the walls and penalty areas
+PLACEMENT_GRID_MARGIN = 0.1
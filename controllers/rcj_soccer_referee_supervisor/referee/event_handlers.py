@@ -1,25 +1,78 @@
+import atexit
+import gzip
 import json
+import os
+import threading
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, TextIO, Tuple
+
+from referee.enums import GameEvents
+from referee.events import (
+    Event,
+    EventsSuppressedEvent,
+    GoalEvent,
+    InsidePenaltyForTooLongEvent,
+    KickoffEvent,
+    LackOfProgressEvent,
+    MatchFinishEvent,
+    MatchStartEvent,
+)
+
+
+def format_log_line(
+    time: datetime,
+    matchtime: float,
+    type: str,
+    payload: Optional[dict] = None,
+) -> str:
+    """Format the event as a single line of the JSON log.
+
+    Args:
+        time (datetime): UTC time when the event happened
+        matchtime (float): Match time when the event happened
+        type (str): Event type
+        payload (dict, optional): More information about the event
+
+    Returns:
+        str: JSON representation of the event ending with a newline
+    """
+    data = {
+        "datetime": time.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "matchtime": matchtime,
+        "event": type,
+    }
+
+    if payload is not None:
+        data["payload"] = payload
+
+    return json.dumps(data) + "\n"
 
 
 class EventHandler:
+    # Whether the handler has to handle the events inline, even if the
+    # Eventer dispatches events asynchronously
+    synchronous = False
+    # Whether the handler must get every event (like the reflogs, which the
+    # results are read from). When its queue is full, the referee waits for
+    # it instead of dropping the event.
+    lossless = False
+    # The events the handler subscribes to by default, all of them if None
+    events: Optional[Tuple[GameEvents, ...]] = None
+
     def __init__(self):
         pass
 
     def handle(
         self,
         referee,  # Referee from referee.py
-        type: str,
-        payload: Optional[dict] = None,
+        event: Event,
     ):
         """Handle the incoming event
 
         Args:
             referee (RCJSoccerReferee): Instance of Referee
-            type (str): Event type
-            payload (dict, optional): More information about the event
+            event (Event): The event record
         """
         raise NotImplementedError
 
@@ -27,61 +80,232 @@ class EventHandler:
 class JSONLoggerHandler(EventHandler):
     """Handler for writing data to json file."""
 
+    lossless = True
+
     def __init__(self, logfile: Path):
         super().__init__()
         self.logfile = logfile
 
-    def handle(self, referee, type: str, payload: Optional[dict] = None):
+    def handle(self, referee, event: Event):
         matchtime = referee.match_time - referee.time
-        data = {
-            "datetime": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
-            "matchtime": matchtime,
-            "event": type,
-        }
-
-        if payload is not None:
-            data["payload"] = payload
+        line = format_log_line(
+            datetime.utcnow(),
+            matchtime,
+            event.event_type.value,
+            event.payload(),
+        )
 
         with self.logfile.open("a") as outfile:
-            json.dump(data, outfile)
-            outfile.write("\n")
+            outfile.write(line)
+
+
+class BufferedJSONLoggerHandler(EventHandler):
+    """Handler for writing data to json file, which keeps the file open and
+    writes the events from a background thread.
+
+    The events are buffered in memory and written once there are
+    `flush_size` of them or every `flush_interval` seconds. The file is
+    flushed and synced to the disk when the match finishes and when the
+    interpreter exits.
+
+    The compressed (`.gz`) and the rotated (`.<n>`) files are meant for
+    archiving, the tools which follow and analyze the reflogs only read the
+    plain `*.jsonl` ones.
+    """
+
+    lossless = True
+
+    def __init__(
+        self,
+        logfile: Path,
+        flush_size: int = 64,
+        flush_interval: float = 1.0,
+        max_bytes: Optional[int] = None,
+        compress: bool = False,
+    ):
+        """
+        Args:
+            logfile (Path): Path of the log file
+            flush_size (int): Number of buffered events which triggers
+                writing them to the file
+            flush_interval (float): Maximum number of seconds the events stay
+                in the buffer
+            max_bytes (int, optional): Once this many (uncompressed) bytes
+                are written to the file, it is renamed to `<logfile>.<n>` and
+                a new file is started
+            compress (bool): Whether to write the file compressed with gzip,
+                `.gz` is appended to the name of the file unless it has it
+        """
+        super().__init__()
+        if compress and logfile.suffix != ".gz":
+            logfile = logfile.with_name(f"{logfile.name}.gz")
+        self.logfile = logfile
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.compress = compress
+
+        self.outfile: Optional[TextIO] = None
+        self.written_bytes = 0
+        self.rotations = 0
+        self.closed = False
+
+        # Events waiting to be written together with the UTC time and the
+        # match time when they happened
+        self.buffer: List[Tuple[datetime, float, Event]] = []
+        self.buffer_lock = threading.Lock()
+        self.file_lock = threading.Lock()
+        self.wakeup = threading.Event()
+
+        self.writer = threading.Thread(target=self._run_writer, daemon=True)
+        self.writer.start()
+        atexit.register(self.close)
+
+    def handle(self, referee, event: Event):
+        matchtime = referee.match_time - referee.time
+        with self.buffer_lock:
+            self.buffer.append((datetime.utcnow(), matchtime, event))
+            buffered = len(self.buffer)
+
+        if event.event_type == GameEvents.MATCH_FINISH:
+            self.flush(sync=True)
+        elif buffered >= self.flush_size:
+            self.wakeup.set()
+
+    def _run_writer(self):
+        while not self.closed:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def _open(self) -> TextIO:
+        if self.compress:
+            return gzip.open(self.logfile, "at", encoding="utf8")
+        return self.logfile.open("a", encoding="utf8")
+
+    def _existing_bytes(self) -> int:
+        """Get the number of uncompressed bytes already in the file."""
+        if not self.logfile.exists():
+            return 0
+        if not self.compress:
+            return self.logfile.stat().st_size
+
+        size = 0
+        with gzip.open(self.logfile, "rb") as infile:
+            for chunk in iter(lambda: infile.read(1 << 16), b""):
+                size += len(chunk)
+        return size
+
+    def _rotate(self):
+        """Close the current file and move it aside."""
+        self.outfile.close()
+        self.outfile = None
+        self.rotations += 1
+        rotated = self.logfile.with_name(
+            f"{self.logfile.name}.{self.rotations}"
+        )
+        self.logfile.rename(rotated)
+
+    def _write(self, line: str):
+        if self.outfile is None:
+            self.written_bytes = self._existing_bytes()
+            self.outfile = self._open()
+
+        self.outfile.write(line)
+        self.written_bytes += len(line.encode("utf8"))
+
+        if self.max_bytes is not None and self.written_bytes >= self.max_bytes:
+            self._rotate()
+
+    def flush(self, sync: bool = False):
+        """Write the buffered events to the file.
+
+        Args:
+            sync (bool): Whether to also sync the file to the disk
+        """
+        with self.file_lock:
+            with self.buffer_lock:
+                events, self.buffer = self.buffer, []
+
+            for time, matchtime, event in events:
+                payload = event.payload()
+                line = format_log_line(
+                    time, matchtime, event.event_type.value, payload
+                )
+                self._write(line)
+
+            if self.outfile is not None:
+                self.outfile.flush()
+                if sync:
+                    os.fsync(self.outfile.fileno())
+
+    def close(self):
+        """Stop the writer thread, write the remaining events and close the
+        file."""
+        if self.closed:
+            return
+
+        self.closed = True
+        self.wakeup.set()
+        self.writer.join()
+        self.flush(sync=True)
+
+        with self.file_lock:
+            if self.outfile is not None:
+                self.outfile.close()
+                self.outfile = None
+
+        atexit.unregister(self.close)
 
 
 class DrawMessageHandler(EventHandler):
     """Handler for creating the message which is drawn onto world window."""
 
+    # The messages are added to the referee's queue, which is not thread-safe
+    synchronous = True
+
+    def __init__(self):
+        super().__init__()
+        # Message formatter for each event type
+        self.formatters = {
+            event_type: getattr(self, f"create_{event_type.value.lower()}_msg")
+            for event_type in GameEvents
+        }
+
     def create_inside_penalty_for_too_long_msg(
         self,
-        robot_name: str,
-        **kwargs,
+        event: InsidePenaltyForTooLongEvent,
     ) -> str:
-        return f"Robot {robot_name}: Inside penalty for too long."
+        return f"Robot {event.robot_name}: Inside penalty for too long."
 
-    def create_lack_of_progress_msg(
-        self,
-        type: str,
-        robot_name: Optional[str] = None,
-        **kwargs,
-    ) -> str:
-        if type == "ball":
+    def create_lack_of_progress_msg(self, event: LackOfProgressEvent) -> str:
+        if event.robot_name is None:
             return "Ball: Lack of progress."
-        return f"Robot {robot_name}: Lack of progress."
+        return f"Robot {event.robot_name}: Lack of progress."
 
-    def create_goal_msg(self, team_name: str, **kwargs) -> str:
-        return f"A goal was scored by {team_name}."
+    def create_goal_msg(self, event: GoalEvent) -> str:
+        return f"A goal was scored by {event.team_name}."
 
-    def create_kickoff_msg(self, robot_name: str, **kwargs) -> str:
-        return f"Robot {robot_name} is kicking off."
+    def create_kickoff_msg(self, event: KickoffEvent) -> str:
+        return f"Robot {event.robot_name} is kicking off."
 
-    def create_match_start_msg(self, total_match_time: int, **kwargs) -> str:
-        return f"The match ({total_match_time}s) has started."
+    def create_match_start_msg(self, event: MatchStartEvent) -> str:
+        return f"The match ({event.total_match_time}s) has started."
 
-    def create_match_finish_msg(self, total_match_time: int, **kwargs) -> str:
-        return f"The match time {total_match_time}s is over."
+    def create_match_finish_msg(self, event: MatchFinishEvent) -> str:
+        return f"The match time {event.total_match_time}s is over."
+
+    def create_events_suppressed_msg(
+        self,
+        event: EventsSuppressedEvent,
+    ) -> str:
+        if event.robot_name is None:
+            object_name = "Ball"
+        else:
+            object_name = f"Robot {event.robot_name}"
+        event_name = event.suppressed_event.value.lower().replace("_", " ")
+        return f"{object_name}: {event.count} more {event_name} suppressed."
 
-    def handle(self, referee, type: str, payload: Optional[dict] = None):
-        # Call formatter based on event type.
-        msg_formatter = getattr(self, f"create_{type.lower()}_msg")
-        data = payload if payload is not None else {}
-        message = msg_formatter(**data)
+    def handle(self, referee, event: Event):
+        message = self.formatters[event.event_type](event)
         referee.add_event_message_to_queue(message)
@@ -0,0 +1,46 @@
+from typing import Optional
+
+
+class EventSuppressor:
+    """Coalesce an event which keeps being triggered for the same object.
+
+    The first trigger lets the event through and opens a suppression window.
+    The triggers within the window are only counted, so that they can be
+    summarized once it is over.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self.reset()
+
+    def reset(self):
+        # The match time counts down, so the window ends at a lower time
+        self.window_end: Optional[float] = None
+        self.suppressed = 0
+
+    def trigger(self, time: float) -> bool:
+        """Make EventSuppressor react to a new trigger of the event.
+
+        Args:
+            time (float): Current game time
+
+        Returns:
+            bool: Whether the event should be fired
+        """
+        if self.window_end is not None and time > self.window_end:
+            self.suppressed += 1
+            return False
+
+        self.window_end = time - self.window
+        return True
+
+    def is_window_over(self, time: float) -> bool:
+        """Detect whether the suppression window is over.
+
+        Args:
+            time (float): Current game time
+
+        Returns:
+            bool: Whether the suppression window is over
+        """
+        return self.window_end is not None and time <= self.window_end
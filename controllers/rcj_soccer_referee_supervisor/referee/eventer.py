@@ -1,13 +1,207 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from referee.consts import EVENT_QUEUE_SIZE
+from referee.enums import GameEvents
 from referee.event_handlers import EventHandler
+from referee.events import Event
+
+# Put into the queue of an asynchronous subscriber to stop its worker
+STOP_WORKER = object()
+
+
+class RefereeSnapshot:
+    """The referee's clock at the moment an event was fired.
+
+    Asynchronous subscribers handle the event later on, when the referee
+    has already moved on, so they get this snapshot instead.
+    """
+
+    __slots__ = ("match_time", "time")
+
+    def __init__(self, referee):
+        self.match_time = referee.match_time
+        self.time = referee.time
+
+
+class EventDispatcher:
+    """Deliver events to a single subscriber, either inline or via a bounded
+    queue read by a worker thread, and keep track of its statistics.
+
+    The events for a lossless subscriber are never dropped, the referee
+    waits for the room in its queue instead.
+    """
+
+    def __init__(self, subscriber: EventHandler, queue_size: Optional[int]):
+        """
+        Args:
+            subscriber (EventHandler): The subscriber to deliver events to
+            queue_size (int, optional): Size of the queue of the subscriber.
+                If not set, the events are handled inline.
+        """
+        self.subscriber = subscriber
+        self.handled = 0
+        self.dropped = 0
+        self.blocked = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+        self.queue: Optional[queue.Queue] = None
+        self.worker: Optional[threading.Thread] = None
+        if queue_size is not None:
+            self.queue = queue.Queue(maxsize=queue_size)
+            self.worker = threading.Thread(target=self._run, daemon=True)
+            self.worker.start()
+
+    @property
+    def is_synchronous(self) -> bool:
+        return self.queue is None
+
+    def dispatch(self, referee, event: Event):
+        """Deliver the event to the subscriber. If the queue of the subscriber
+        is full, the event is dropped so that the referee never waits, unless
+        the subscriber is lossless.
+
+        Args:
+            referee (RCJSoccerReferee): The referee firing the event
+            event (Event): The event record
+        """
+        if self.queue is None:
+            self._handle(referee, event)
+            return
+
+        item = (RefereeSnapshot(referee), event)
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            if not self.subscriber.lossless:
+                self.dropped += 1
+                return
+            self.blocked += 1
+            self.queue.put(item)
+
+    def _handle(self, referee, event: Event):
+        start = time.perf_counter()
+        try:
+            self.subscriber.handle(referee, event)
+        finally:
+            latency = time.perf_counter() - start
+            self.handled += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is STOP_WORKER:
+                return
+
+            try:
+                self._handle(*item)
+            except Exception:
+                logging.exception(
+                    f"{type(self.subscriber).__name__} failed to handle event"
+                )
+
+    def close(self):
+        """Handle the remaining events and stop the worker thread."""
+        if self.worker is None:
+            return
+
+        self.queue.put(STOP_WORKER)
+        self.worker.join()
+        self.worker = None
+
+    def metrics(self) -> dict:
+        """Get the statistics of the subscriber.
+
+        Returns:
+            dict: Queue depth, number of handled, dropped and blocked
+            (waited for the room in the queue) events as well as the mean and
+            maximum time (in seconds) it took to handle an event.
+        """
+        return {
+            "handler": type(self.subscriber).__name__,
+            "synchronous": self.is_synchronous,
+            "queue_depth": 0 if self.queue is None else self.queue.qsize(),
+            "handled": self.handled,
+            "dropped": self.dropped,
+            "blocked": self.blocked,
+            "mean_latency": self.total_latency / max(self.handled, 1),
+            "max_latency": self.max_latency,
+        }
 
 
 class Eventer:
-    def __init__(self):
+    def __init__(
+        self,
+        asynchronous: bool = False,
+        queue_size: int = EVENT_QUEUE_SIZE,
+    ):
+        """
+        Args:
+            asynchronous (bool): Whether the subscribers handle the events in
+                their own worker threads. Subscribers marked as synchronous
+                always handle the events inline.
+            queue_size (int): Maximum number of events waiting for an
+                asynchronous subscriber. Further events are dropped, unless
+                the subscriber is lossless.
+        """
+        self.asynchronous = asynchronous
+        self.queue_size = queue_size
         self.subscribers = []
+        self.dispatchers: List[EventDispatcher] = []
+        # The dispatchers of the subscribers of each event type
+        self.routes: Dict[GameEvents, List[EventDispatcher]] = {
+            event_type: [] for event_type in GameEvents
+        }
 
-    def subscribe(self, subscriber: EventHandler):
+    def subscribe(
+        self,
+        subscriber: EventHandler,
+        events: Optional[Iterable[GameEvents]] = None,
+    ):
+        """Subscribe to the events.
+
+        Args:
+            subscriber (EventHandler): Instance inheriting EventHandler
+            events (list, optional): The event types to subscribe to. Defaults
+                to the `events` of the subscriber, or all of them.
+        """
         self.subscribers.append(subscriber)
 
-    def event(self, *args, **kwargs):
-        for subscriber in self.subscribers:
-            subscriber.handle(*args, **kwargs)
+        inline = not self.asynchronous or subscriber.synchronous
+        queue_size = None if inline else self.queue_size
+        dispatcher = EventDispatcher(subscriber, queue_size)
+        self.dispatchers.append(dispatcher)
+
+        if events is None:
+            events = subscriber.events or GameEvents
+        for event_type in events:
+            self.routes[event_type].append(dispatcher)
+
+    def event(self, referee, event: Event):
+        """Deliver the event to its subscribers.
+
+        Args:
+            referee (RCJSoccerReferee): The referee firing the event
+            event (Event): The event record
+        """
+        for dispatcher in self.routes[event.event_type]:
+            dispatcher.dispatch(referee, event)
+
+    def metrics(self) -> List[dict]:
+        """Get the statistics of all the subscribers.
+
+        Returns:
+            list: See `EventDispatcher.metrics`
+        """
+        return [dispatcher.metrics() for dispatcher in self.dispatchers]
+
+    def close(self):
+        """Wait for the asynchronous subscribers to handle all the events."""
+        for dispatcher in self.dispatchers:
+            dispatcher.close()
@@ -0,0 +1,175 @@
+from typing import Optional, Tuple
+
+from referee.enums import GameEvents
+
+
+class Event:
+    """Base class of the events fired by the referee.
+
+    The events are compact records. Their payload only gets built as a dict
+    when a handler asks for it by calling `payload`.
+    """
+
+    __slots__ = ()
+
+    event_type: GameEvents
+    # Attributes making up the payload, in the order they are serialized
+    payload_fields: Tuple[str, ...] = ()
+
+    def payload(self) -> dict:
+        """Get the information about the event as a dict.
+
+        Returns:
+            dict: The payload of the event
+        """
+        return {field: getattr(self, field) for field in self.payload_fields}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.payload()})"
+
+
+class MatchStartEvent(Event):
+    __slots__ = (
+        "score_yellow",
+        "score_blue",
+        "total_match_time",
+        "team_name_yellow",
+        "team_name_blue",
+        "match_id",
+        "halftime",
+    )
+
+    event_type = GameEvents.MATCH_START
+    payload_fields = __slots__
+
+    def __init__(
+        self,
+        score_yellow: int,
+        score_blue: int,
+        total_match_time: int,
+        team_name_yellow: str,
+        team_name_blue: str,
+        match_id: int,
+        halftime: int,
+    ):
+        self.score_yellow = score_yellow
+        self.score_blue = score_blue
+        self.total_match_time = total_match_time
+        self.team_name_yellow = team_name_yellow
+        self.team_name_blue = team_name_blue
+        self.match_id = match_id
+        self.halftime = halftime
+
+
+class MatchFinishEvent(Event):
+    __slots__ = (
+        "total_match_time",
+        "score_yellow",
+        "score_blue",
+        "team_name_yellow",
+        "team_name_blue",
+    )
+
+    event_type = GameEvents.MATCH_FINISH
+    payload_fields = __slots__
+
+    def __init__(
+        self,
+        total_match_time: int,
+        score_yellow: int,
+        score_blue: int,
+        team_name_yellow: str,
+        team_name_blue: str,
+    ):
+        self.total_match_time = total_match_time
+        self.score_yellow = score_yellow
+        self.score_blue = score_blue
+        self.team_name_yellow = team_name_yellow
+        self.team_name_blue = team_name_blue
+
+
+class LackOfProgressEvent(Event):
+    __slots__ = ("robot_name",)
+
+    event_type = GameEvents.LACK_OF_PROGRESS
+
+    def __init__(self, robot_name: Optional[str] = None):
+        """
+        Args:
+            robot_name (str, optional): The robot which did not make progress.
+                If not set, it was the ball.
+        """
+        self.robot_name = robot_name
+
+    def payload(self) -> dict:
+        if self.robot_name is None:
+            return {"type": "ball"}
+        return {"type": "robot", "robot_name": self.robot_name}
+
+
+class InsidePenaltyForTooLongEvent(Event):
+    __slots__ = ("robot_name",)
+
+    event_type = GameEvents.INSIDE_PENALTY_FOR_TOO_LONG
+
+    def __init__(self, robot_name: str):
+        self.robot_name = robot_name
+
+    def payload(self) -> dict:
+        return {"type": "robot", "robot_name": self.robot_name}
+
+
+class KickoffEvent(Event):
+    __slots__ = ("robot_name", "team_name")
+
+    event_type = GameEvents.KICKOFF
+    payload_fields = __slots__
+
+    def __init__(self, robot_name: str, team_name: str):
+        self.robot_name = robot_name
+        self.team_name = team_name
+
+
+class GoalEvent(Event):
+    __slots__ = ("team_name", "score_yellow", "score_blue")
+
+    event_type = GameEvents.GOAL
+    payload_fields = __slots__
+
+    def __init__(self, team_name: str, score_yellow: int, score_blue: int):
+        self.team_name = team_name
+        self.score_yellow = score_yellow
+        self.score_blue = score_blue
+
+
+class EventsSuppressedEvent(Event):
+    __slots__ = ("suppressed_event", "count", "robot_name")
+
+    event_type = GameEvents.EVENTS_SUPPRESSED
+
+    def __init__(
+        self,
+        suppressed_event: GameEvents,
+        count: int,
+        robot_name: Optional[str] = None,
+    ):
+        """
+        Args:
+            suppressed_event (GameEvents): Type of the suppressed events
+            count (int): Number of the suppressed events
+            robot_name (str, optional): The robot the events were triggered
+                for. If not set, it was the ball.
+        """
+        self.suppressed_event = suppressed_event
+        self.count = count
+        self.robot_name = robot_name
+
+    def payload(self) -> dict:
+        payload = {"event": self.suppressed_event.value}
+        if self.robot_name is None:
+            payload["type"] = "ball"
+        else:
+            payload["type"] = "robot"
+            payload["robot_name"] = self.robot_name
+        payload["count"] = self.count
+        return payload
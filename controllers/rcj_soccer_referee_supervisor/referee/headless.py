@@ -0,0 +1,44 @@
+"""Profile of the referee for matches which nobody watches.
+
+Unlike the `GIRASoccerReferee`, the referee neither talks to the robot
+window nor saves its state nor watches the controllers for changes, and the
+supervisor does not draw any labels. The rules are applied the same way, so
+the same events are produced.
+"""
+from typing import List
+
+from referee.referee import RCJSoccerReferee
+from referee.supervisor import RCJSoccerSupervisor
+
+
+class HeadlessSupervisor(RCJSoccerSupervisor):
+    """Supervisor which does not draw anything."""
+
+    def draw_team_names(self, team_name_blue: str, team_name_yellow: str):
+        pass
+
+    def draw_scores(self, blue: int, yellow: int):
+        pass
+
+    def draw_time(self, time: int):
+        pass
+
+    def draw_event_messages(self, messages: List[str]):
+        pass
+
+    def draw_goal_sign(self, transparency: float = 0.0):
+        pass
+
+    def hide_goal_sign(self):
+        pass
+
+
+class HeadlessReferee(RCJSoccerReferee):
+    """Referee which does not keep the messages about the events, as they
+    are never drawn."""
+
+    def add_event_message_to_queue(self, message: str):
+        pass
+
+    def process_and_draw_event_messages(self):
+        pass
@@ -0,0 +1,128 @@
+import math
+from typing import List, Optional, Tuple
+
+numpy_installed = False
+try:
+    import numpy as np
+
+    numpy_installed = True
+except Exception:
+    print(
+        "Numpy module not installed, placing objects outside of the neutral"
+        " spots disabled. To enable, run 'pip install numpy'"
+    )
+
+from referee.consts import (
+    BLUE_PENALTY_AREA,
+    DISTANCE_AROUND_UNOCCUPIED_NEUTRAL_SPOT,
+    FIELD_X_LOWER_LIMIT,
+    FIELD_X_UPPER_LIMIT,
+    NEUTRAL_SPOTS,
+    PLACEMENT_GRID_MARGIN,
+    PLACEMENT_GRID_STEP,
+    YELLOW_PENALTY_AREA,
+)
+from referee.enums import NeutralSpotDistanceType
+
+
+def create_candidate_grid() -> "np.ndarray":
+    """Create the grid of candidate positions on the field, outside of the
+    penalty areas.
+
+    Returns:
+        np.ndarray: Array of shape (n, 2) with x and y coordinates
+    """
+    x_limit = min(-FIELD_X_LOWER_LIMIT, FIELD_X_UPPER_LIMIT)
+    y_limit = min(-YELLOW_PENALTY_AREA[0], BLUE_PENALTY_AREA[0])
+
+    # The grid is symmetric around the center of the field
+    x_steps = int((x_limit - PLACEMENT_GRID_MARGIN) // PLACEMENT_GRID_STEP)
+    y_steps = int((y_limit - PLACEMENT_GRID_MARGIN) // PLACEMENT_GRID_STEP)
+    xs = np.arange(-x_steps, x_steps + 1) * PLACEMENT_GRID_STEP
+    ys = np.arange(-y_steps, y_steps + 1) * PLACEMENT_GRID_STEP
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    return np.column_stack((grid_x.ravel(), grid_y.ravel()))
+
+
+CANDIDATE_GRID = create_candidate_grid() if numpy_installed else None
+
+
+def target_neutral_spot(
+    x: float,
+    y: float,
+    distance_type: NeutralSpotDistanceType,
+) -> Tuple[float, float]:
+    """Get the neutral spot the object would be moved to if it was free: the
+    nearest (or the furthest) one, other than the spot the object is on.
+
+    Args:
+        x (float): x position of the object to be placed
+        y (float): y position of the object to be placed
+        distance_type (NeutralSpotDistanceType): Either nearest or furthest
+
+    Returns:
+        tuple: x and y coordinates of the neutral spot
+    """
+    spots = [
+        spot
+        for spot in NEUTRAL_SPOTS.values()
+        if math.hypot(x - spot[0], y - spot[1])
+        >= DISTANCE_AROUND_UNOCCUPIED_NEUTRAL_SPOT
+    ]
+    do_reverse = distance_type == NeutralSpotDistanceType.FURTHEST.value
+    return sorted(
+        spots,
+        key=lambda spot: math.hypot(x - spot[0], y - spot[1]),
+        reverse=do_reverse,
+    )[0]
+
+
+def find_free_position(
+    x: float,
+    y: float,
+    occupied: List[Tuple[float, float]],
+    distance_type: NeutralSpotDistanceType,
+) -> Optional[Tuple[float, float]]:
+    """Find the position on the candidate grid which is not occupied by any
+    other object, away from the object itself, and which is the nearest to
+    the neutral spot the object would be moved to (the nearest or the
+    furthest one, as when the neutral spots are free).
+
+    If every candidate is occupied, the one furthest away from all the
+    objects is returned, so that a position is always found.
+
+    Args:
+        x (float): x position of the object to be placed
+        y (float): y position of the object to be placed
+        occupied (list): x and y positions of the other robots and the ball
+        distance_type (NeutralSpotDistanceType): Either nearest or furthest
+
+    Returns:
+        tuple: x and y coordinates, or None if numpy is not installed
+    """
+    if not numpy_installed:
+        return None
+
+    candidates = CANDIDATE_GRID
+    objects = np.asarray(occupied, dtype=float).reshape(-1, 2)
+
+    # Distance of each candidate to the closest object
+    deltas = candidates[:, np.newaxis, :] - objects[np.newaxis, :, :]
+    clearance = np.sqrt((deltas ** 2).sum(axis=2)).min(axis=1, initial=np.inf)
+    # The object has to be moved away from where it is
+    distance = np.hypot(candidates[:, 0] - x, candidates[:, 1] - y)
+    free = (clearance >= DISTANCE_AROUND_UNOCCUPIED_NEUTRAL_SPOT) & (
+        distance >= DISTANCE_AROUND_UNOCCUPIED_NEUTRAL_SPOT
+    )
+
+    if not free.any():
+        best = int(np.argmax(np.minimum(clearance, distance)))
+        return float(candidates[best, 0]), float(candidates[best, 1])
+
+    spot_x, spot_y = target_neutral_spot(x, y, distance_type)
+    spot_distance = np.hypot(
+        candidates[:, 0] - spot_x, candidates[:, 1] - spot_y
+    )
+    best = int(np.argmin(np.where(free, spot_distance, np.inf)))
+
+    return float(candidates[best, 0]), float(candidates[best, 1])
@@ -1,22 +1,37 @@
 import random
 import struct
-from typing import List, Optional, Tuple
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
 
 from controller import Supervisor
 
 from referee.consts import (
     BALL_INITIAL_TRANSLATION,
+    EVENT_SUPPRESSION_WINDOW,
     KICKOFF_TRANSLATION,
     LACK_OF_PROGRESS_NUMBER_OF_NEUTRAL_SPOTS,
     MAX_EVENT_MESSAGES_IN_QUEUE,
     ROBOT_INITIAL_ROTATION,
     ROBOT_INITIAL_TRANSLATION,
     ROBOT_NAMES,
+    SUPERVISOR_PACKET_KEEPALIVE_STEPS,
+    SUPERVISOR_PACKET_VERSION,
     TIME_STEP,
 )
 from referee.enums import GameEvents, NeutralSpotDistanceType, Team
 from referee.event_handlers import EventHandler
+from referee.event_suppressor import EventSuppressor
 from referee.eventer import Eventer
+from referee.events import (
+    Event,
+    EventsSuppressedEvent,
+    GoalEvent,
+    InsidePenaltyForTooLongEvent,
+    KickoffEvent,
+    LackOfProgressEvent,
+    MatchFinishEvent,
+    MatchStartEvent,
+)
 from referee.penalty_area_checker import PenaltyAreaChecker
 from referee.progress_checker import ProgressChecker
 from referee.utils import (
@@ -26,6 +41,11 @@ from referee.utils import (
     time_to_string,
 )
 
+# True/False telling whether the goal was scored and we are waiting for kickoff
+LEGACY_SUPERVISOR_PACKET = struct.Struct("?")
+# Packet version, sequence number of the state and the legacy data
+SUPERVISOR_PACKET = struct.Struct("<BI?")
+
 
 class RCJSoccerReferee:
     def __init__(
@@ -46,6 +66,10 @@ class RCJSoccerReferee:
         penalty_area_reset_after: int,
         post_goal_wait_time: int = 3,
         initial_position_noise: float = 0.15,
+        broadcast_on_change: bool = False,
+        broadcast_keepalive_steps: int = SUPERVISOR_PACKET_KEEPALIVE_STEPS,
+        asynchronous_events: bool = False,
+        event_suppression_window: float = EVENT_SUPPRESSION_WINDOW,
     ):
         self.sv = supervisor
         self.match_time = match_time
@@ -59,6 +83,16 @@ class RCJSoccerReferee:
         self.post_goal_wait_time = post_goal_wait_time
         self.initial_position_noise = initial_position_noise
 
+        # When broadcasting on change, the versioned packet is only sent when
+        # the state changes, or as a keep-alive after the given number of
+        # steps. Otherwise, the legacy packet is sent on every tick.
+        self.broadcast_on_change = broadcast_on_change
+        self.broadcast_keepalive_steps = broadcast_keepalive_steps
+        self.broadcast_state: Optional[tuple] = None
+        self.broadcast_sequence = 0
+        self.broadcast_packet = b""
+        self.broadcast_steps_left = 0
+
         self.ball_reset_timer = 0
         self.ball_stop = 2
 
@@ -81,31 +115,84 @@ class RCJSoccerReferee:
             ball_progress_check_steps, ball_progress_check_threshold
         )
 
-        self.eventer = Eventer()
+        # Repeated events of the same object are coalesced, so that an object
+        # which keeps triggering the rule does not flood the subscribers
+        self.event_suppressors: Dict[
+            Tuple[str, GameEvents], EventSuppressor
+        ] = {}
+        for robot in ROBOT_NAMES:
+            for event_type in (
+                GameEvents.LACK_OF_PROGRESS,
+                GameEvents.INSIDE_PENALTY_FOR_TOO_LONG,
+            ):
+                self.event_suppressors[(robot, event_type)] = EventSuppressor(
+                    event_suppression_window
+                )
+        self.event_suppressors[
+            ("ball", GameEvents.LACK_OF_PROGRESS)
+        ] = EventSuppressor(event_suppression_window)
+
+        self.eventer = Eventer(asynchronous=asynchronous_events)
         # Event message queue to be drawn from
-        # List of Tuples of int (time) and string (message)
-        self.event_messages_to_draw: List[Tuple[int, str]] = []
+        # Tuples of int (time) and string (message), the oldest messages get
+        # dropped once the queue is full
+        self.event_messages_to_draw: Deque[Tuple[int, str]] = deque(
+            maxlen=MAX_EVENT_MESSAGES_IN_QUEUE
+        )
+        # Whether the queue has changed since the messages were last drawn
+        self.event_messages_changed = False
 
         self.reset_positions()
         self.sv.update_positions()
         self.sv.draw_team_names(self.team_name_blue, self.team_name_yellow)
         self.sv.draw_scores(self.score_blue, self.score_yellow)
 
+    def _supervisor_state(self) -> tuple:
+        """Get the state which is sent to the robots.
+
+        Returns:
+            tuple: Whether we are waiting for kickoff after a goal.
+        """
+        return (self.ball_reset_timer > 0,)
+
     def _pack_packet(self) -> bytes:
         """Pack data into packet.
 
         Returns:
             bytes: the packed packet.
         """
-        # True/False telling whether the goal was scored
-        struct_fmt = "?"
-        data = list()
+        state = self._supervisor_state()
+        if not self.broadcast_on_change:
+            return LEGACY_SUPERVISOR_PACKET.pack(*state)
+
+        return SUPERVISOR_PACKET.pack(
+            SUPERVISOR_PACKET_VERSION,
+            self.broadcast_sequence,
+            *state,
+        )
 
-        # Add Notification if the goal is scored and we are waiting for kickoff
-        # The value is True or False
-        data.append(self.ball_reset_timer > 0)
+    def emit_data(self):
+        """Send the supervisor packet to the robots.
 
-        return struct.pack(struct_fmt, *data)
+        When broadcasting on change, the packet is only sent if the state has
+        changed (which also bumps its sequence number) or if it has not been
+        sent for the keep-alive number of steps.
+        """
+        if not self.broadcast_on_change:
+            self.sv.emit_data(self._pack_packet())
+            return
+
+        state = self._supervisor_state()
+        if state != self.broadcast_state:
+            self.broadcast_state = state
+            self.broadcast_sequence = (self.broadcast_sequence + 1) % 2 ** 32
+            self.broadcast_packet = self._pack_packet()
+        elif self.broadcast_steps_left > 1:
+            self.broadcast_steps_left -= 1
+            return
+
+        self.sv.emit_data(self.broadcast_packet)
+        self.broadcast_steps_left = self.broadcast_keepalive_steps
 
     def _add_initial_position_noise(
         self, translation: List[float]
@@ -125,13 +212,59 @@ class RCJSoccerReferee:
             translation[2],
         ]
 
-    def add_event_subscriber(self, subscriber: EventHandler):
+    def add_event_subscriber(
+        self,
+        subscriber: EventHandler,
+        events: Optional[Iterable[GameEvents]] = None,
+    ):
         """Add new event subscriber.
 
         Args:
             subscriber (EventHandler): Instance inheriting EventHandler
+            events (list, optional): The event types to subscribe to. Defaults
+                to the `events` of the subscriber, or all of them.
+        """
+        self.eventer.subscribe(subscriber, events)
+
+    def close(self):
+        """Wait for the events to be handled once the half is over."""
+        self.eventer.close()
+
+    def fire_suppressible_event(self, object_name: str, event: Event):
+        """Fire the event, unless it was already fired for the same object
+        within the suppression window.
+
+        Args:
+            object_name (str): Either "ball" or the robot's name.
+            event (Event): The event to be fired
         """
-        self.eventer.subscribe(subscriber)
+        suppressor = self.event_suppressors[(object_name, event.event_type)]
+        if suppressor.trigger(self.time):
+            self.eventer.event(self, event)
+
+    def fire_suppressed_events(self, force: bool = False):
+        """Fire a summary of the suppressed events of each object whose
+        suppression window is over.
+
+        Args:
+            force (bool): Fire the summaries even if the windows are not over
+        """
+        for key, suppressor in self.event_suppressors.items():
+            if not (force or suppressor.is_window_over(self.time)):
+                continue
+
+            if suppressor.suppressed:
+                object_name, event_type = key
+                robot_name = None if object_name == "ball" else object_name
+                self.eventer.event(
+                    self,
+                    EventsSuppressedEvent(
+                        event_type,
+                        suppressor.suppressed,
+                        robot_name,
+                    ),
+                )
+            suppressor.reset()
 
     def add_event_message_to_queue(self, message: str):
         """Add new message to the message queue.
@@ -139,13 +272,16 @@ class RCJSoccerReferee:
         Args:
             message (str): Message to be added to the queue.
         """
-        if len(self.event_messages_to_draw) >= MAX_EVENT_MESSAGES_IN_QUEUE:
-            self.event_messages_to_draw.pop(0)
-
         self.event_messages_to_draw.append((self.time, message))
+        self.event_messages_changed = True
 
     def process_and_draw_event_messages(self):
-        """Process and draw event messages from the queue"""
+        """Process and draw event messages from the queue, if it has changed
+        since the last time it was drawn"""
+        if not self.event_messages_changed:
+            return
+        self.event_messages_changed = False
+
         messages = []
         for time, msg in self.event_messages_to_draw:
             messages.append(f"{time_to_string(time)} - {msg}")
@@ -216,6 +352,28 @@ class RCJSoccerReferee:
 
         return robot
 
+    def move_object_to_free_position(
+        self,
+        object_name: str,
+        distance_type: NeutralSpotDistanceType,
+    ) -> bool:
+        """Move the object to a free position on the field. Used when all the
+        neutral spots are occupied.
+
+        Args:
+            object_name (str): Either "ball" or the robot's name.
+            distance_type (NeutralSpotDistanceType): Either nearest or furthest
+
+        Returns:
+            bool: Whether the object was moved
+        """
+        position = self.sv.get_free_position(distance_type, object_name)
+        if position is None:
+            return False
+
+        self.sv.move_object_to_position(object_name, *position)
+        return True
+
     def check_robots_in_penalty_area(self):
         """
         Check whether robots are violating rule not to stay in
@@ -226,13 +384,8 @@ class RCJSoccerReferee:
             self.penalty_area_check[robot].track(pos, self.time)
 
             if self.penalty_area_check[robot].is_violating():
-                self.eventer.event(
-                    referee=self,
-                    type=GameEvents.INSIDE_PENALTY_FOR_TOO_LONG.value,
-                    payload={
-                        "type": "robot",
-                        "robot_name": robot,
-                    },
+                self.fire_suppressible_event(
+                    robot, InsidePenaltyForTooLongEvent(robot)
                 )
                 furthest_spots = self.sv.get_unoccupied_neutral_spots_sorted(
                     NeutralSpotDistanceType.FURTHEST.value,
@@ -242,6 +395,11 @@ class RCJSoccerReferee:
                     neutral_spot = furthest_spots[0][0]
                     self.sv.move_object_to_neutral_spot(robot, neutral_spot)
                     self.reset_checkers(robot)
+                elif self.move_object_to_free_position(
+                    robot,
+                    NeutralSpotDistanceType.FURTHEST.value,
+                ):
+                    self.reset_checkers(robot)
 
     def check_progress(self):
         """
@@ -258,14 +416,7 @@ class RCJSoccerReferee:
                 is_outside(x, y)
                 or not self.progress_check[robot].is_progress()
             ):
-                self.eventer.event(
-                    referee=self,
-                    type=GameEvents.LACK_OF_PROGRESS.value,
-                    payload={
-                        "type": "robot",
-                        "robot_name": robot,
-                    },
-                )
+                self.fire_suppressible_event(robot, LackOfProgressEvent(robot))
                 nearest_spots = self.sv.get_unoccupied_neutral_spots_sorted(
                     NeutralSpotDistanceType.NEAREST.value,
                     robot,
@@ -278,6 +429,11 @@ class RCJSoccerReferee:
                         ],
                     )
                     self.sv.move_object_to_neutral_spot(robot, neutral_spot[0])
+                else:
+                    self.move_object_to_free_position(
+                        robot,
+                        NeutralSpotDistanceType.NEAREST.value,
+                    )
 
                 self.reset_checkers(robot)
 
@@ -286,11 +442,7 @@ class RCJSoccerReferee:
         bx, by = bpos[0], bpos[1]
 
         if is_outside(bx, by) or not self.progress_check["ball"].is_progress():
-            self.eventer.event(
-                referee=self,
-                type=GameEvents.LACK_OF_PROGRESS.value,
-                payload={"type": "ball"},
-            )
+            self.fire_suppressible_event("ball", LackOfProgressEvent())
             nearest_spots = self.sv.get_unoccupied_neutral_spots_sorted(
                 NeutralSpotDistanceType.NEAREST.value,
                 "ball",
@@ -305,6 +457,11 @@ class RCJSoccerReferee:
 
                 self.sv.move_object_to_neutral_spot("ball", neutral_spot[0])
                 self.ball_stop = 2
+            elif self.move_object_to_free_position(
+                "ball",
+                NeutralSpotDistanceType.NEAREST.value,
+            ):
+                self.ball_stop = 2
 
             self.reset_checkers("ball")
 
@@ -338,13 +495,8 @@ class RCJSoccerReferee:
             self.ball_reset_timer = self.post_goal_wait_time
 
             self.eventer.event(
-                referee=self,
-                type=GameEvents.GOAL.value,
-                payload={
-                    "team_name": team_goal,
-                    "score_yellow": self.score_yellow,
-                    "score_blue": self.score_blue,
-                },
+                self,
+                GoalEvent(team_goal, self.score_yellow, self.score_blue),
             )
 
             # Let the team that did not score the goal have a kickoff.
@@ -367,14 +519,7 @@ class RCJSoccerReferee:
 
         robot_name = self.reset_team_for_kickoff(team)
 
-        self.eventer.event(
-            referee=self,
-            type=GameEvents.KICKOFF.value,
-            payload={
-                "robot_name": robot_name,
-                "team_name": team,
-            },
-        )
+        self.eventer.event(self, KickoffEvent(robot_name, team))
 
     def tick(self) -> bool:
         self.sv.check_reset_physics_counters()
@@ -382,39 +527,39 @@ class RCJSoccerReferee:
         # On the very first tick, note that the match has started
         if self.time == self.match_time:
             self.eventer.event(
-                referee=self,
-                type=GameEvents.MATCH_START.value,
-                payload={
-                    "score_yellow": self.score_yellow,
-                    "score_blue": self.score_blue,
-                    "total_match_time": self.match_time,
-                    "team_name_yellow": self.team_name_yellow,
-                    "team_name_blue": self.team_name_blue,
-                    "match_id": self.match_id,
-                    "halftime": self.half_id,
-                },
+                self,
+                MatchStartEvent(
+                    score_yellow=self.score_yellow,
+                    score_blue=self.score_blue,
+                    total_match_time=self.match_time,
+                    team_name_yellow=self.team_name_yellow,
+                    team_name_blue=self.team_name_blue,
+                    match_id=self.match_id,
+                    halftime=self.half_id,
+                ),
             )
 
         self.sv.update_positions()
-        self.sv.emit_data(self._pack_packet())
+        self.emit_data()
         self.time -= TIME_STEP / 1000.0
 
         # On the very last tick, note that the match has finished
         if self.time < 0:
+            self.fire_suppressed_events(force=True)
             self.eventer.event(
-                referee=self,
-                type=GameEvents.MATCH_FINISH.value,
-                payload={
-                    "total_match_time": self.match_time,
-                    "score_yellow": self.score_yellow,
-                    "score_blue": self.score_blue,
-                    "team_name_yellow": self.team_name_yellow,
-                    "team_name_blue": self.team_name_blue,
-                },
+                self,
+                MatchFinishEvent(
+                    total_match_time=self.match_time,
+                    score_yellow=self.score_yellow,
+                    score_blue=self.score_blue,
+                    team_name_yellow=self.team_name_yellow,
+                    team_name_blue=self.team_name_blue,
+                ),
             )
 
             return False
 
+        self.fire_suppressed_events()
         self.sv.draw_time(self.time)
         self.process_and_draw_event_messages()
 
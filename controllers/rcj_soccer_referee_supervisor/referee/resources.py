@@ -0,0 +1,199 @@
+"""CPU time and memory of the controllers while a half is played.
+
+The controllers are the processes Webots starts, so they are looked up in
+`/proc` as the children of the parent of the referee supervisor (which is
+one of them). Each of them is named after its robot, which Webots passes to
+it in `WEBOTS_ROBOT_NAME`, or after its controller otherwise.
+
+The processes are sampled at most once per `interval` seconds of wall time.
+A controller using more CPU time per step of the simulation than the budget
+is the one which keeps the simulation from running faster. A controller
+which blocks (e.g. on a socket) does not use the CPU, which shows as a low
+real-time factor of the whole half instead.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from referee.consts import TIME_STEP
+
+PROC = Path("/proc")
+DEFAULT_INTERVAL = 1.0
+# Milliseconds of CPU time a controller may use per step of the simulation
+DEFAULT_STEP_BUDGET = 8.0
+
+
+def read_environ(path: Path) -> Dict[str, str]:
+    environ = {}
+    for entry in path.read_bytes().split(b"\0"):
+        key, sep, value = entry.decode(errors="replace").partition("=")
+        if sep:
+            environ[key] = value
+    return environ
+
+
+class ProcessSample:
+    """CPU time and resident memory of a process at one moment.
+
+    Args:
+        stat (str): Contents of `/proc/<pid>/stat`
+    """
+
+    def __init__(self, stat: str):
+        # The name of the executable may contain spaces and parentheses
+        start = stat.rindex(")") + 2
+        fields = stat[start:].split()
+        self.ppid = int(fields[1])
+        ticks = os.sysconf("SC_CLK_TCK")
+        self.cpu_time = (int(fields[11]) + int(fields[12])) / ticks
+        self.rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class ControllerUsage:
+    """Resources used by a controller process during the half."""
+
+    def __init__(self, pid: int, name: str, sample: ProcessSample):
+        self.pid = pid
+        self.name = name
+        self.first_cpu_time = self.cpu_time = sample.cpu_time
+        self.max_rss = sample.rss
+
+    def update(self, sample: ProcessSample):
+        self.cpu_time = sample.cpu_time
+        self.max_rss = max(self.max_rss, sample.rss)
+
+    def to_dict(self, steps: int, step_budget: float) -> dict:
+        cpu_time = self.cpu_time - self.first_cpu_time
+        step_time = 1000 * cpu_time / steps if steps else 0.0
+        return {
+            "name": self.name,
+            "pid": self.pid,
+            "cpu_time": round(cpu_time, 3),
+            "max_rss": self.max_rss,
+            "step_time": round(step_time, 3),
+            "over_budget": step_time > step_budget,
+        }
+
+
+class ResourceMonitor:
+    """Sample the controllers while the half is played.
+
+    Args:
+        step_budget (float): Milliseconds of CPU time per step of the
+            simulation a controller may use
+        interval (float): Minimum seconds between the samples
+        parent_pid (int, optional): Process which started the controllers,
+            the parent of this process by default
+        proc (Path): Mount point of the proc filesystem
+    """
+
+    def __init__(
+        self,
+        step_budget: float = DEFAULT_STEP_BUDGET,
+        interval: float = DEFAULT_INTERVAL,
+        parent_pid: Optional[int] = None,
+        proc: Path = PROC,
+    ):
+        self.step_budget = step_budget
+        self.interval = interval
+        self.parent_pid = parent_pid or os.getppid()
+        self.proc = proc
+        self.controllers: Dict[int, ControllerUsage] = {}
+        self.first: Optional[Tuple[float, float]] = None
+        self.last: Optional[Tuple[float, float]] = None
+
+    @staticmethod
+    def is_supported(proc: Path = PROC) -> bool:
+        return (proc / "self" / "stat").exists()
+
+    def processes(self) -> Iterator[Tuple[int, ProcessSample]]:
+        """Get the samples of the children of the parent process."""
+        for path in self.proc.iterdir():
+            if not path.name.isdigit():
+                continue
+            try:
+                sample = ProcessSample((path / "stat").read_text())
+            except (OSError, ValueError, IndexError):
+                # The process is gone or not readable
+                continue
+            if sample.ppid == self.parent_pid:
+                yield int(path.name), sample
+
+    def controller_name(self, pid: int) -> str:
+        path = self.proc / str(pid)
+        try:
+            name = read_environ(path / "environ").get("WEBOTS_ROBOT_NAME")
+            if name:
+                return name
+            args = (path / "cmdline").read_bytes().split(b"\0")
+        except OSError:
+            return str(pid)
+        # The script (or the executable) of the controller
+        scripts = [arg for arg in args if arg.endswith(b".py")] or args
+        return f"{Path(scripts[0].decode()).stem}:{pid}"
+
+    def sample(self, sim_time: float, force: bool = False):
+        """Sample the controllers unless the last sample is too recent.
+
+        Args:
+            sim_time (float): Seconds of simulated time
+            force (bool): Whether to sample anyway
+        """
+        now = time.monotonic()
+        if (
+            not force
+            and self.last is not None
+            and now - self.last[1] < self.interval
+        ):
+            return
+
+        for pid, sample in self.processes():
+            if pid in self.controllers:
+                self.controllers[pid].update(sample)
+            else:
+                name = self.controller_name(pid)
+                self.controllers[pid] = ControllerUsage(pid, name, sample)
+        self.last = sim_time, now
+        if self.first is None:
+            self.first = self.last
+
+    def report(self) -> dict:
+        """Get the resources used by each controller between the first and
+        the last sample.
+
+        Returns:
+            dict: The `sim_time`, the `wall_time`, the `real_time_factor`
+            and the `step_budget` of the half, and the `controllers` with
+            their `cpu_time` (in seconds), `max_rss` (in bytes), `step_time`
+            (CPU milliseconds per step) and whether they are `over_budget`
+        """
+        sim_time = wall_time = 0.0
+        if self.first is not None and self.last is not None:
+            sim_time = self.last[0] - self.first[0]
+            wall_time = self.last[1] - self.first[1]
+        steps = round(1000 * sim_time / TIME_STEP)
+        controllers = sorted(self.controllers.values(), key=lambda c: c.name)
+        return {
+            "sim_time": round(sim_time, 3),
+            "wall_time": round(wall_time, 3),
+            "real_time_factor": (
+                round(sim_time / wall_time, 3) if wall_time else None
+            ),
+            "step_budget": self.step_budget,
+            "controllers": [
+                controller.to_dict(steps, self.step_budget)
+                for controller in controllers
+            ],
+        }
+
+    def write(self, path: Path) -> dict:
+        """Write the report into a JSON file.
+
+        Returns:
+            dict: The written report
+        """
+        report = self.report()
+        path.write_text(json.dumps(report, indent=2))
+        return report
@@ -0,0 +1,131 @@
+"""Sessions of several halves or matches played in one run of Webots.
+
+The session file (set by `RCJ_SIM_SESSION`) is a TOML or JSON file with a
+list of `halves`, each of them overriding the sections of the match config:
+
+    [[halves]]
+    match = {id = 1, half = 1}
+
+    [[halves]]
+    match = {id = 1, half = 2}
+    blue = {name = "Team B", id = "Team B", controller = "team_b"}
+    yellow = {name = "Team A", id = "Team A", controller = "team_a"}
+
+The halves are played in this order without restarting the simulation. The
+controllers of the robots are restarted before every half but the first one,
+so that they start from a clean state too.
+"""
+import copy
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from referee.config import merge_config, read_config_file
+from referee.enums import Team
+
+
+class SessionHalf:
+    """One half of the session.
+
+    Args:
+        config (dict): The config of the half
+        controllers (dict): The controller set by the half for each team
+        carries_scores (bool): Whether the half continues the previous half
+            of the same match, starting with its final scores
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Dict],
+        controllers: Mapping[str, Optional[str]],
+        carries_scores: bool = False,
+    ):
+        self.config = config
+        self.controllers = controllers
+        self.carries_scores = carries_scores
+
+    @property
+    def team_ids(self) -> Tuple[str, str]:
+        return self.config["blue"]["id"], self.config["yellow"]["id"]
+
+    def initial_scores(
+        self, final_scores: Mapping[str, int]
+    ) -> Tuple[int, int]:
+        """Get the scores the half starts with.
+
+        Args:
+            final_scores (dict): The final score of each team (by its ID) in
+                the previous half
+
+        Returns:
+            tuple: The initial scores of the blue and the yellow team
+        """
+        if not self.carries_scores:
+            return (
+                self.config["blue"]["initial_score"],
+                self.config["yellow"]["initial_score"],
+            )
+
+        # The teams are looked up by their IDs, as they usually swap sides
+        blue_id, yellow_id = self.team_ids
+        return final_scores.get(blue_id, 0), final_scores.get(yellow_id, 0)
+
+    def start(self, supervisor, first: bool):
+        """Set up the controllers of the robots for the half.
+
+        Args:
+            supervisor (RCJSoccerSupervisor): The supervisor of the simulation
+            first (bool): Whether the half is the first one of the session,
+                whose controllers have only just been started
+        """
+        for team, controller in self.controllers.items():
+            if not first or controller is not None:
+                supervisor.set_team_controller(team, controller)
+
+
+def load_session(path: Path, config: Dict[str, Dict]) -> List[SessionHalf]:
+    """Read the halves of the session.
+
+    A half which does not set the initial scores carries over the scores of
+    the previous half if both of them are of the same match.
+
+    Args:
+        path (Path): The session file
+        config (dict): The config of the match the halves override
+
+    Returns:
+        list: The halves in the order they are played
+
+    Raises:
+        ValueError: If there are no halves or a half overrides an unknown
+            value
+    """
+    halves: List[SessionHalf] = []
+    for overrides in read_config_file(path).get("halves", []):
+        half_config = copy.deepcopy(config)
+        merge_config(half_config, overrides)
+        half_config["match"]["id"] = str(half_config["match"]["id"])
+
+        sections = (Team.BLUE.value, "blue"), (Team.YELLOW.value, "yellow")
+        controllers = {
+            team: overrides.get(section, {}).get("controller")
+            for team, section in sections
+        }
+        scores_set = any(
+            "initial_score" in overrides.get(section, {})
+            for _, section in sections
+        )
+        continues_match = (
+            bool(halves)
+            and halves[-1].config["match"]["id"] == half_config["match"]["id"]
+        )
+        halves.append(
+            SessionHalf(
+                half_config,
+                controllers,
+                carries_scores=continues_match and not scores_set,
+            )
+        )
+
+    if not halves:
+        raise ValueError(f"There are no halves in the session {path}")
+    return halves
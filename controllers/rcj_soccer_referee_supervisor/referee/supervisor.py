@@ -1,5 +1,5 @@
 import math
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 from controller import Supervisor
 
@@ -12,6 +12,7 @@ from referee.consts import (
     ROBOT_NAMES,
 )
 from referee.enums import LabelIDs, NeutralSpotDistanceType
+from referee.placement import find_free_position
 from referee.utils import time_to_string
 
 
@@ -45,6 +46,14 @@ class RCJSoccerSupervisor(Supervisor):
 
             self.robot_reset_physics[robot] = 0
 
+        # Functions called every time the positions are updated
+        self.position_listeners: List[Callable[[], None]] = []
+
+        # The last text and parameters sent to Webots for each label, so that
+        # labels which have not changed are not redrawn on every tick
+        self.labels: Dict[LabelIDs, tuple] = {}
+        self.drawn_time: Optional[int] = None
+
     def check_reset_physics_counters(self):
         # HACK(Richo): Workaround for the following issue
         # https://github.com/RoboCupJuniorTC/rcj-soccer-sim/issues/130
@@ -67,6 +76,9 @@ class RCJSoccerSupervisor(Supervisor):
 
         assert len(self.robot_translation) == len(self.robot_rotation)
 
+        for listener in self.position_listeners:
+            listener()
+
     def get_robot_translation(self, robot: str) -> list:
         """Return the position of the robot.
 
@@ -121,6 +133,32 @@ class RCJSoccerSupervisor(Supervisor):
         self.ball.resetPhysics()
         self.ball_translation = position
 
+    def detach_robot_controllers(self):
+        """Stop the controllers of all the robots."""
+        for robot in ROBOT_NAMES:
+            field = self.robot_nodes[robot].getField("controller")
+            field.setSFString("<none>")
+
+    def set_team_controller(self, team: str, controller: Optional[str]):
+        """Start the controller anew on all the robots of the team.
+
+        Args:
+            team (str): 'B' for blue or 'Y' for yellow team
+            controller (str, optional): The controller to be set, the current
+                one is restarted if not set
+        """
+        for robot in ROBOT_NAMES:
+            if robot[0] != team:
+                continue
+
+            node = self.robot_nodes[robot]
+            field = node.getField("controller")
+            if controller is None or field.getSFString() == controller:
+                node.restartController()
+            else:
+                # Webots starts the new controller as soon as it is set
+                field.setSFString(controller)
+
     def reset_robot_velocity(self, robot_name: str):
         """Reset the robot's velocity.
 
@@ -201,14 +239,48 @@ class RCJSoccerSupervisor(Supervisor):
 
         return sorted_pairs
 
-    def move_object_to_neutral_spot(self, object_name: str, neutral_spot: str):
-        """Move the robot to the specified neutral spot.
+    def get_free_position(
+        self,
+        distance_type: NeutralSpotDistanceType,
+        object_name: str,
+    ) -> Optional[Tuple[float, float]]:
+        """Get a free position on the field for the object. Meant to be used
+        when all the neutral spots are occupied.
+
+        Args:
+            distance_type (NeutralSpotDistanceType): Either nearest or furthest
+            object_name (str): Get the position for this object
+
+        Returns:
+            tuple: x and y coordinates, or None if it cannot be computed
+        """
+        if object_name == "ball":
+            x, y = self.ball_translation[0], self.ball_translation[1]
+        else:
+            x = self.robot_translation[object_name][0]
+            y = self.robot_translation[object_name][1]
+
+        # The position of the object itself is not occupied for it
+        occupied = [
+            (pos[0], pos[1])
+            for robot, pos in self.robot_translation.items()
+            if robot != object_name
+        ]
+        if object_name != "ball":
+            occupied.append(
+                (self.ball_translation[0], self.ball_translation[1])
+            )
+
+        return find_free_position(x, y, occupied, distance_type)
+
+    def move_object_to_position(self, object_name: str, x: float, y: float):
+        """Move the object to the specified position on the field.
 
         Args:
             object_name (str): Name of the object (Ball or robot's name)
-            neutral_spot (str): The spot the robot will be moved to
+            x (float): x position
+            y (float): y position
         """
-        x, y = NEUTRAL_SPOTS[neutral_spot]
         if object_name == "ball":
             self.set_ball_position([x, y, BALL_DEPTH])
         else:
@@ -217,6 +289,16 @@ class RCJSoccerSupervisor(Supervisor):
                 object_name, ROBOT_INITIAL_ROTATION[object_name]
             )
 
+    def move_object_to_neutral_spot(self, object_name: str, neutral_spot: str):
+        """Move the robot to the specified neutral spot.
+
+        Args:
+            object_name (str): Name of the object (Ball or robot's name)
+            neutral_spot (str): The spot the robot will be moved to
+        """
+        x, y = NEUTRAL_SPOTS[neutral_spot]
+        self.move_object_to_position(object_name, x, y)
+
     def emit_data(self, packet: bytes):
         """Send packet via emitter
 
@@ -225,6 +307,42 @@ class RCJSoccerSupervisor(Supervisor):
         """
         self.emitter.send(packet)
 
+    def draw_label(
+        self,
+        label_id: LabelIDs,
+        text: str,
+        x: float,
+        y: float,
+        size: float,
+        color: int,
+        transparency: float,
+        font: str,
+    ):
+        """Draw the label, unless it is already drawn with the same text and
+        parameters.
+
+        Args:
+            label_id (LabelIDs): ID of the label
+            text (str): the text to be drawn
+            x (float): X position
+            y (float): Y position
+            size (float): size of the text
+            color (int): color of the text
+            transparency (float): transparency of the text
+            font (str): font of the text
+        """
+        label = (text, x, y, size, color, transparency, font)
+        if self.labels.get(label_id) == label:
+            return
+
+        self.labels[label_id] = label
+        self.setLabel(label_id.value, *label)
+
+    def clear_drawn_labels(self):
+        """Forget the drawn labels so that all of them get redrawn."""
+        self.labels = {}
+        self.drawn_time = None
+
     def draw_team_names(self, team_name_blue: str, team_name_yellow: str):
         """Visualize (draw) the names of the teams.
 
@@ -232,8 +350,8 @@ class RCJSoccerSupervisor(Supervisor):
             team_name_blue (str): name of the blue team
             team_name_yellow (str): name of the yellow team
         """
-        self.setLabel(
-            LabelIDs.BLUE_TEAM.value,
+        self.draw_label(
+            LabelIDs.BLUE_TEAM,
             team_name_blue,
             0.92 - (len(team_name_blue) * 0.01),  # X position
             0.05,  # Y position
@@ -243,8 +361,8 @@ class RCJSoccerSupervisor(Supervisor):
             "Tahoma",  # Font
         )
 
-        self.setLabel(
-            LabelIDs.YELLOW_TEAM.value,
+        self.draw_label(
+            LabelIDs.YELLOW_TEAM,
             team_name_yellow,
             0.05,  # X position
             0.05,  # Y position
@@ -262,8 +380,8 @@ class RCJSoccerSupervisor(Supervisor):
             blue (int): score of the blue team
             yellow (int): score of the yellow team
         """
-        self.setLabel(
-            LabelIDs.BLUE_SCORE.value,
+        self.draw_label(
+            LabelIDs.BLUE_SCORE,
             str(blue),
             0.92,  # X position
             0.01,  # Y position
@@ -273,8 +391,8 @@ class RCJSoccerSupervisor(Supervisor):
             "Tahoma",  # Font
         )
 
-        self.setLabel(
-            LabelIDs.YELLOW_SCORE.value,
+        self.draw_label(
+            LabelIDs.YELLOW_SCORE,
             str(yellow),
             0.05,  # X position
             0.01,  # Y position
@@ -290,8 +408,15 @@ class RCJSoccerSupervisor(Supervisor):
         Args:
             time (int): the current match time
         """
-        self.setLabel(
-            LabelIDs.TIME.value,
+        # The label only shows whole seconds, so there is no need to format
+        # the time more often than once per second
+        seconds = int(time)
+        if seconds == self.drawn_time:
+            return
+        self.drawn_time = seconds
+
+        self.draw_label(
+            LabelIDs.TIME,
             time_to_string(time),
             0.45,
             0.01,
@@ -308,8 +433,8 @@ class RCJSoccerSupervisor(Supervisor):
             messages: List of string messages to be drawn
         """
         if messages:
-            self.setLabel(
-                LabelIDs.EVENT_MESSAGES.value,
+            self.draw_label(
+                LabelIDs.EVENT_MESSAGES,
                 "\n".join(messages),
                 0.01,
                 0.95 - ((len(messages) - 1) * 0.025),
@@ -327,8 +452,8 @@ class RCJSoccerSupervisor(Supervisor):
                 no transparency and 1 meaning total transparency (the text will
                 not be visible).
         """
-        self.setLabel(
-            LabelIDs.GOAL.value,
+        self.draw_label(
+            LabelIDs.GOAL,
             "GOAL!",
             0.30,
             0.40,
@@ -340,8 +465,8 @@ class RCJSoccerSupervisor(Supervisor):
 
     def hide_goal_sign(self):
         """Hide the GOAL! once the game is again in progress."""
-        self.setLabel(
-            LabelIDs.GOAL.value,
+        self.draw_label(
+            LabelIDs.GOAL,
             "",
             0.30,
             0.40,
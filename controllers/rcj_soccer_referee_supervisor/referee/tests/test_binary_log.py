@@ -0,0 +1,168 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from referee import binary_log
+from referee.binary_log import (
+    BinaryLoggerHandler,
+    convert_to_jsonl,
+    read_binary_reflog,
+)
+from referee.enums import GameEvents
+from referee.event_handlers import JSONLoggerHandler
+from referee.events import (
+    Event,
+    EventsSuppressedEvent,
+    GoalEvent,
+    InsidePenaltyForTooLongEvent,
+    KickoffEvent,
+    LackOfProgressEvent,
+    MatchFinishEvent,
+    MatchStartEvent,
+)
+
+
+class UnknownEvent(Event):
+    __slots__ = ()
+
+    event_type = GameEvents.GOAL
+
+    def payload(self) -> dict:
+        return {"team_name": "Blues", "extra": [1, 2]}
+
+
+EVENTS = [
+    MatchStartEvent(0, 0, 600, "Yellows", "Blues", "1", 1),
+    KickoffEvent("B3", "B"),
+    LackOfProgressEvent("B1"),
+    LackOfProgressEvent(),
+    InsidePenaltyForTooLongEvent("Y2"),
+    EventsSuppressedEvent(GameEvents.LACK_OF_PROGRESS, 62, "B1"),
+    GoalEvent("Blues", 0, 1),
+    UnknownEvent(),
+    MatchFinishEvent(600, 0, 1, "Yellows", "Blues"),
+]
+
+
+@pytest.fixture
+def referee() -> MagicMock:
+    referee = MagicMock()
+    referee.match_time = 600
+    referee.time = 600
+    return referee
+
+
+@pytest.fixture(autouse=True)
+def utcnow():
+    with patch("referee.binary_log.datetime") as binary_datetime, patch(
+        "referee.event_handlers.datetime"
+    ) as json_datetime:
+        now = datetime(2022, 1, 2, 3, 4, 5, 6)
+        binary_datetime.utcnow.return_value = now
+        json_datetime.utcnow.return_value = now
+        yield
+
+
+def log_events(tmp_path: Path, referee: MagicMock, events=EVENTS):
+    json_handler = JSONLoggerHandler(tmp_path / "reflog.jsonl")
+    binary_handler = BinaryLoggerHandler(tmp_path / "reflog.rcjlog")
+    for event in events:
+        referee.time -= 0.032 * 7
+        json_handler.handle(referee, event)
+        binary_handler.handle(referee, event)
+    binary_handler.close()
+    return json_handler.logfile, binary_handler.logfile
+
+
+def test_read_binary_reflog(tmp_path: Path, referee: MagicMock):
+    json_path, binary_path = log_events(tmp_path, referee)
+
+    expected = [json.loads(line) for line in json_path.open()]
+    assert list(read_binary_reflog(binary_path)) == expected
+
+
+@pytest.mark.parametrize("bulk", [True, False])
+def test_read_in_blocks(
+    tmp_path: Path, referee: MagicMock, monkeypatch, bulk: bool
+):
+    json_path, binary_path = log_events(tmp_path, referee, EVENTS * 3)
+    # The frames are split between the blocks
+    monkeypatch.setattr(binary_log, "READ_BLOCK_SIZE", 7)
+    monkeypatch.setattr(
+        binary_log, "numpy_installed", bulk and binary_log.numpy_installed
+    )
+
+    expected = [json.loads(line) for line in json_path.open()]
+    events = list(read_binary_reflog(binary_path))
+    assert events == expected
+    # The events do not share their decoded payloads
+    events[2]["payload"]["robot_name"] = "B2"
+    assert events[2 + len(EVENTS)]["payload"]["robot_name"] == "B1"
+
+
+def test_convert_to_jsonl(tmp_path: Path, referee: MagicMock):
+    json_path, binary_path = log_events(tmp_path, referee)
+
+    converted_path = tmp_path / "converted.jsonl"
+    convert_to_jsonl(binary_path, converted_path)
+
+    assert converted_path.read_bytes() == json_path.read_bytes()
+
+
+def test_events_at_the_start_of_the_match(tmp_path: Path, referee: MagicMock):
+    json_handler = JSONLoggerHandler(tmp_path / "reflog.jsonl")
+    binary_handler = BinaryLoggerHandler(tmp_path / "reflog.rcjlog")
+    # The match time is the int 0 until the first step
+    for event in EVENTS[:2]:
+        json_handler.handle(referee, event)
+        binary_handler.handle(referee, event)
+    referee.time -= 0.032
+    json_handler.handle(referee, EVENTS[2])
+    binary_handler.handle(referee, EVENTS[2])
+    binary_handler.close()
+
+    converted_path = tmp_path / "converted.jsonl"
+    convert_to_jsonl(binary_handler.logfile, converted_path)
+    assert converted_path.read_bytes() == json_handler.logfile.read_bytes()
+    matchtimes = [
+        e["matchtime"] for e in read_binary_reflog(binary_handler.logfile)
+    ]
+    assert [type(t) for t in matchtimes] == [int, int, float]
+
+
+def test_binary_reflog_smaller(tmp_path: Path, referee: MagicMock):
+    events = [LackOfProgressEvent("B1")] * 100
+    json_path, binary_path = log_events(tmp_path, referee, events)
+
+    assert binary_path.stat().st_size < json_path.stat().st_size / 3
+
+
+def test_read_truncated_binary_reflog(tmp_path: Path, referee: MagicMock):
+    _, binary_path = log_events(tmp_path, referee)
+    data = binary_path.read_bytes()
+    binary_path.write_bytes(data[:-3])
+
+    assert len(list(read_binary_reflog(binary_path))) == len(EVENTS) - 1
+
+
+def test_append_to_binary_reflog(tmp_path: Path, referee: MagicMock):
+    _, binary_path = log_events(tmp_path, referee)
+
+    handler = BinaryLoggerHandler(binary_path)
+    handler.handle(referee, KickoffEvent("Y3", "Y"))
+    handler.close()
+
+    events = list(read_binary_reflog(binary_path))
+    assert len(events) == len(EVENTS) + 1
+    assert events[-1]["payload"] == {"robot_name": "Y3", "team_name": "Y"}
+
+
+def test_not_a_binary_reflog(tmp_path: Path):
+    path = tmp_path / "reflog.rcjlog"
+    path.write_bytes(b"{}\n")
+
+    with pytest.raises(ValueError):
+        BinaryLoggerHandler(path)
@@ -0,0 +1,101 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from referee.config import DEFAULT_CONFIG, load_config
+from referee.config_file import tomllib_installed
+from referee.consts import DEFAULT_MATCH_TIME
+
+
+def test_defaults():
+    config = load_config({})
+    assert config == DEFAULT_CONFIG
+    assert config["match"]["time"] == DEFAULT_MATCH_TIME
+    assert config["recording"]["formats"] == []
+
+    # The defaults are not shared between the configs
+    config["recording"]["formats"].append("mp4")
+    assert load_config({})["recording"]["formats"] == []
+
+
+def test_environment_variables():
+    config = load_config(
+        {
+            "RCJ_SIM_TEAM_BLUE_NAME": "Team A",
+            "RCJ_SIM_TEAM_Y_INITIAL_SCORE": "",
+            "RCJ_SIM_TEAM_B_INITIAL_SCORE": "2",
+            "RCJ_SIM_HALF_ID": "2",
+            "RCJ_SIM_REC_FORMATS": "mp4,,x3d",
+            "RCJ_SIM_AUTO_MODE": "",
+            "RCJ_SIM_SEED": "7",
+            "RCJ_SIM_RESOURCES": "1",
+            "RCJ_SIM_STEP_BUDGET": "2.5",
+            "RCJ_SIM_SUPPRESSION_WINDOW": "0",
+        }
+    )
+    assert config["referee"]["suppression_window"] == 0
+    assert config["recording"]["resources"] is True
+    assert config["recording"]["step_budget"] == 2.5
+    assert config["blue"]["name"] == "Team A"
+    # The ID does not follow the name
+    assert config["blue"]["id"] == "The Blues"
+    assert config["blue"]["initial_score"] == 2
+    assert config["yellow"]["initial_score"] == 0
+    assert config["match"]["half"] == 2
+    assert config["recording"]["formats"] == ["mp4", "x3d"]
+    assert config["match"]["auto"] is True
+    assert config["match"]["seed"] == 7
+    assert config["referee"]["broadcast_on_change"] is False
+
+
+def test_config_file_is_overridden_by_environment(tmp_path: Path):
+    path = tmp_path / "match.json"
+    path.write_text(
+        json.dumps(
+            {
+                "match": {"id": 7, "time": 300},
+                "blue": {"name": "Team A", "rgb": "0 0 0.5"},
+                "recording": {"formats": ["trajectory"]},
+            }
+        )
+    )
+    config = load_config(
+        {"RCJ_SIM_CONFIG": str(path), "RCJ_SIM_MATCH_TIME": "60"}
+    )
+    assert config["match"]["id"] == "7"
+    assert config["match"]["time"] == 60
+    assert config["blue"]["name"] == "Team A"
+    assert config["blue"]["rgb"] == "0 0 0.5"
+    assert config["recording"]["formats"] == ["trajectory"]
+
+
+@pytest.mark.skipif(not tomllib_installed, reason="No TOML parser")
+def test_toml_config_file(tmp_path: Path):
+    path = tmp_path / "match.toml"
+    path.write_text(
+        "[yellow]\n"
+        'name = "Team B"\n'
+        "[robot]\n"
+        "ir_range = 0.8\n"
+        "[referee]\n"
+        "asynchronous_events = true\n"
+    )
+    config = load_config({}, path)
+    assert config["yellow"]["name"] == "Team B"
+    assert config["robot"]["ir_range"] == 0.8
+    assert config["referee"]["asynchronous_events"] is True
+
+
+@pytest.mark.parametrize(
+    "data, message",
+    [
+        ({"teams": {}}, "Unknown config section"),
+        ({"blue": {"colour": "0 0 1"}}, "Unknown config key colour"),
+    ],
+)
+def test_unknown_values(tmp_path: Path, data, message):
+    path = tmp_path / "match.json"
+    path.write_text(json.dumps(data))
+    with pytest.raises(ValueError, match=message):
+        load_config({}, path)
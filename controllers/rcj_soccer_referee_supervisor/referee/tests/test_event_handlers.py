@@ -0,0 +1,155 @@
+import gzip
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from referee.event_handlers import (
+    BufferedJSONLoggerHandler,
+    DrawMessageHandler,
+    JSONLoggerHandler,
+)
+from referee.events import (
+    GoalEvent,
+    LackOfProgressEvent,
+    MatchFinishEvent,
+    MatchStartEvent,
+)
+
+EVENTS = [
+    MatchStartEvent(0, 0, 600, "Yellows", "Blues", 1, 1),
+    LackOfProgressEvent("B1"),
+    LackOfProgressEvent(),
+    GoalEvent("Blues", 0, 1),
+    MatchFinishEvent(600, 0, 1, "Yellows", "Blues"),
+]
+
+
+@pytest.fixture
+def referee() -> MagicMock:
+    referee = MagicMock()
+    referee.match_time = 600
+    referee.time = 590.5
+    return referee
+
+
+@pytest.fixture(autouse=True)
+def utcnow():
+    with patch("referee.event_handlers.datetime") as mock_datetime:
+        mock_datetime.utcnow.return_value = datetime(2022, 1, 2, 3, 4, 5, 6)
+        yield
+
+
+def log_events(handler, referee: MagicMock):
+    for event in EVENTS:
+        handler.handle(referee, event)
+
+
+def test_json_logger_format(tmp_path: Path, referee: MagicMock):
+    handler = JSONLoggerHandler(tmp_path / "reflog.jsonl")
+    handler.handle(referee, LackOfProgressEvent("B1"))
+
+    assert handler.logfile.read_text() == (
+        '{"datetime": "2022-01-02T03:04:05.000006Z", "matchtime": 9.5, '
+        '"event": "LACK_OF_PROGRESS", '
+        '"payload": {"type": "robot", "robot_name": "B1"}}\n'
+    )
+
+
+def test_buffered_logger_same_output(tmp_path: Path, referee: MagicMock):
+    expected_path = tmp_path / "expected.jsonl"
+    log_events(JSONLoggerHandler(expected_path), referee)
+
+    handler = BufferedJSONLoggerHandler(tmp_path / "buffered.jsonl")
+    log_events(handler, referee)
+    handler.close()
+
+    expected = expected_path.read_bytes()
+    assert expected.count(b"\n") == len(EVENTS)
+    assert handler.logfile.read_bytes() == expected
+
+
+def test_buffered_logger_flushes_on_match_finish(
+    tmp_path: Path, referee: MagicMock
+):
+    handler = BufferedJSONLoggerHandler(
+        tmp_path / "reflog.jsonl",
+        flush_interval=60,
+    )
+    handler.handle(referee, LackOfProgressEvent())
+    assert handler.buffer
+
+    handler.handle(referee, EVENTS[-1])
+    assert not handler.buffer
+    assert handler.logfile.read_text().count("\n") == 2
+
+    handler.close()
+
+
+def test_buffered_logger_compress(tmp_path: Path, referee: MagicMock):
+    handler = BufferedJSONLoggerHandler(
+        tmp_path / "reflog.jsonl",
+        compress=True,
+    )
+    log_events(handler, referee)
+    handler.close()
+
+    # The readers of the plain reflogs do not pick it up
+    assert handler.logfile == tmp_path / "reflog.jsonl.gz"
+    assert list(tmp_path.glob("*.jsonl")) == []
+    lines = gzip.decompress(handler.logfile.read_bytes()).splitlines()
+    assert len(lines) == len(EVENTS)
+
+
+def test_buffered_logger_rotates_uncompressed_bytes(
+    tmp_path: Path, referee: MagicMock
+):
+    path = tmp_path / "reflog.jsonl.gz"
+    handler = BufferedJSONLoggerHandler(path, compress=True)
+    log_events(handler, referee)
+    handler.close()
+    size = len(gzip.decompress(path.read_bytes()))
+
+    # Appending to the file counts what it already holds uncompressed
+    line_path = tmp_path / "line.jsonl"
+    JSONLoggerHandler(line_path).handle(referee, EVENTS[1])
+    line_size = line_path.stat().st_size
+    handler = BufferedJSONLoggerHandler(
+        path, max_bytes=size + line_size, compress=True
+    )
+    handler.handle(referee, EVENTS[1])
+    handler.close()
+
+    rotated = tmp_path / "reflog.jsonl.gz.1"
+    lines = gzip.decompress(rotated.read_bytes()).splitlines()
+    assert len(lines) == len(EVENTS) + 1
+    assert not path.exists()
+
+
+def test_buffered_logger_rotate(tmp_path: Path, referee: MagicMock):
+    handler = BufferedJSONLoggerHandler(
+        tmp_path / "reflog.jsonl",
+        max_bytes=1,
+    )
+    log_events(handler, referee)
+    handler.close()
+
+    assert not handler.logfile.exists()
+    for i in range(1, len(EVENTS) + 1):
+        rotated = tmp_path / f"reflog.jsonl.{i}"
+        assert rotated.read_text().count("\n") == 1
+
+
+@pytest.mark.parametrize(
+    "event,expected",
+    [
+        (LackOfProgressEvent("B1"), "Robot B1: Lack of progress."),
+        (LackOfProgressEvent(), "Ball: Lack of progress."),
+        (GoalEvent("Blues", 0, 1), "A goal was scored by Blues."),
+    ],
+)
+def test_draw_message(event, expected: str, referee: MagicMock):
+    DrawMessageHandler().handle(referee, event)
+
+    referee.add_event_message_to_queue.assert_called_once_with(expected)
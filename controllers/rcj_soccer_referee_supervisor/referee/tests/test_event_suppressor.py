@@ -0,0 +1,48 @@
+import pytest
+
+from referee.event_suppressor import EventSuppressor
+
+
+@pytest.fixture
+def suppressor() -> EventSuppressor:
+    return EventSuppressor(window=2)
+
+
+def test_first_trigger(suppressor: EventSuppressor):
+    assert suppressor.trigger(60)
+    assert suppressor.suppressed == 0
+    assert not suppressor.is_window_over(59)
+
+
+def test_trigger_within_window(suppressor: EventSuppressor):
+    suppressor.trigger(60)
+
+    assert not suppressor.trigger(59.5)
+    assert not suppressor.trigger(58.5)
+    assert suppressor.suppressed == 2
+
+
+def test_trigger_after_window(suppressor: EventSuppressor):
+    suppressor.trigger(60)
+
+    assert suppressor.is_window_over(58)
+    assert suppressor.trigger(58)
+    assert suppressor.suppressed == 0
+
+
+def test_no_window():
+    suppressor = EventSuppressor(window=0)
+
+    assert suppressor.trigger(60)
+    assert suppressor.trigger(59.968)
+    assert suppressor.suppressed == 0
+
+
+def test_reset(suppressor: EventSuppressor):
+    suppressor.trigger(60)
+    suppressor.trigger(59)
+    suppressor.reset()
+
+    assert suppressor.window_end is None
+    assert suppressor.suppressed == 0
+    assert suppressor.trigger(59)
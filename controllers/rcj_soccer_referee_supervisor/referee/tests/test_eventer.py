@@ -1,9 +1,14 @@
+import json
+import threading
+from pathlib import Path
 from unittest.mock import MagicMock
 
 import pytest
 
-from referee.event_handlers import EventHandler
-from referee.eventer import Eventer
+from referee.enums import GameEvents
+from referee.event_handlers import EventHandler, JSONLoggerHandler
+from referee.eventer import Eventer, RefereeSnapshot
+from referee.events import GoalEvent, KickoffEvent, MatchFinishEvent
 
 
 @pytest.fixture
@@ -32,7 +37,127 @@ def test_event(eventer: Eventer):
     eventer.subscribe(subscriber1)
     eventer.subscribe(subscriber2)
 
-    eventer.event("arg", kwarg="test")
+    referee = MagicMock()
+    event = GoalEvent("Blues", 0, 1)
+    eventer.event(referee, event)
 
-    subscriber1.handle.assert_called_with("arg", kwarg="test")
-    subscriber2.handle.assert_called_with("arg", kwarg="test")
+    subscriber1.handle.assert_called_with(referee, event)
+    subscriber2.handle.assert_called_with(referee, event)
+
+
+def test_event_routing(eventer: Eventer):
+    subscriber1 = EventHandler()
+    subscriber2 = EventHandler()
+    subscriber2.events = (GameEvents.KICKOFF,)
+    subscriber1.handle = MagicMock()
+    subscriber2.handle = MagicMock()
+    eventer.subscribe(subscriber1, [GameEvents.GOAL])
+    eventer.subscribe(subscriber2)
+
+    referee = MagicMock()
+    goal = GoalEvent("Blues", 0, 1)
+    kickoff = KickoffEvent("Y3", "Y")
+    eventer.event(referee, goal)
+    eventer.event(referee, kickoff)
+
+    subscriber1.handle.assert_called_once_with(referee, goal)
+    subscriber2.handle.assert_called_once_with(referee, kickoff)
+
+
+def test_asynchronous_event():
+    eventer = Eventer(asynchronous=True)
+    subscriber = EventHandler()
+    subscriber.handle = MagicMock()
+    eventer.subscribe(subscriber)
+
+    referee = MagicMock(match_time=600, time=590)
+    eventer.event(referee, GoalEvent("Blues", 0, 1))
+    referee.time = 580
+    eventer.close()
+
+    snapshot = subscriber.handle.call_args[0][0]
+    assert isinstance(snapshot, RefereeSnapshot)
+    assert (snapshot.match_time, snapshot.time) == (600, 590)
+    assert eventer.metrics()[0]["handled"] == 1
+
+
+def test_asynchronous_event_synchronous_subscriber():
+    eventer = Eventer(asynchronous=True)
+    subscriber = EventHandler()
+    subscriber.synchronous = True
+    subscriber.handle = MagicMock()
+    eventer.subscribe(subscriber)
+
+    referee = MagicMock()
+    event = GoalEvent("Blues", 0, 1)
+    eventer.event(referee, event)
+
+    subscriber.handle.assert_called_once_with(referee, event)
+    assert eventer.metrics()[0]["synchronous"]
+
+
+def test_asynchronous_event_full_queue():
+    eventer = Eventer(asynchronous=True, queue_size=1)
+    subscriber = EventHandler()
+    handling = threading.Event()
+    release = threading.Event()
+
+    def handle(*args, **kwargs):
+        handling.set()
+        release.wait()
+
+    subscriber.handle = handle
+    eventer.subscribe(subscriber)
+
+    referee = MagicMock()
+    event = GoalEvent("Blues", 0, 1)
+    eventer.event(referee, event)
+    handling.wait()
+    eventer.event(referee, event)
+    eventer.event(referee, event)
+
+    metrics = eventer.metrics()[0]
+    assert metrics["queue_depth"] == 1
+    assert metrics["dropped"] == 1
+
+    release.set()
+    eventer.close()
+    assert eventer.metrics()[0]["handled"] == 2
+
+
+def test_full_queue_of_a_reflog(tmp_path: Path):
+    eventer = Eventer(asynchronous=True, queue_size=1)
+    reflog = JSONLoggerHandler(tmp_path / "reflog.jsonl")
+    handling = threading.Event()
+    release = threading.Event()
+    write = reflog.handle
+
+    def handle(*args):
+        handling.set()
+        release.wait()
+        write(*args)
+
+    reflog.handle = handle
+    eventer.subscribe(reflog)
+
+    referee = MagicMock(match_time=600, time=0)
+    goal = GoalEvent("Blues", 0, 1)
+    eventer.event(referee, goal)
+    handling.wait()
+    eventer.event(referee, goal)
+
+    # The queue is full, the referee waits for the reflog
+    finish = MatchFinishEvent(600, 0, 2, "Yellows", "Blues")
+    firing = threading.Thread(target=eventer.event, args=(referee, finish))
+    firing.start()
+    firing.join(0.2)
+    assert firing.is_alive()
+
+    release.set()
+    firing.join()
+    eventer.close()
+
+    events = [json.loads(line)["event"] for line in reflog.logfile.open()]
+    assert events == ["GOAL", "GOAL", "MATCH_FINISH"]
+    metrics = eventer.metrics()[0]
+    assert (metrics["dropped"], metrics["blocked"]) == (0, 1)
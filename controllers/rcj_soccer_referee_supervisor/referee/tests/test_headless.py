@@ -0,0 +1,105 @@
+import random
+import sys
+from typing import Type
+from unittest.mock import MagicMock
+
+sys.modules["controller"] = MagicMock()
+
+from gira_soccer_referee import GIRASoccerReferee
+
+from referee.event_handlers import DrawMessageHandler, EventHandler
+from referee.headless import HeadlessReferee
+from referee.referee import RCJSoccerReferee
+
+BLUE_GOAL = [0.0, 0.8, 0.0]
+CENTER = [0.0, 0.0, 0.0]
+
+
+class EventRecorder(EventHandler):
+    synchronous = True
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+
+    def handle(self, referee, event):
+        matchtime = referee.match_time - referee.time
+        self.events.append((matchtime, event.event_type, event.payload()))
+
+
+def create_supervisor() -> MagicMock:
+    supervisor = MagicMock()
+    # The robots stand still and the ball gets into the goal twice
+    supervisor.ticks = 0
+
+    def update_positions():
+        supervisor.ticks += 1
+
+    supervisor.update_positions.side_effect = update_positions
+    supervisor.get_ball_translation.side_effect = lambda: (
+        BLUE_GOAL if supervisor.ticks in (400, 800) else CENTER
+    )
+    supervisor.get_robot_translation.return_value = [0.3, 0.3, 0.0]
+    supervisor.get_unoccupied_neutral_spots_sorted.return_value = [
+        ("center", 0.0)
+    ]
+
+    # What the robot window of the GIRA referee needs
+    supervisor.wwiReceiveText.return_value = ""
+    supervisor.getSelected.return_value = None
+    supervisor.getTime.return_value = 0.0
+    supervisor.ball_translation = CENTER
+    supervisor.robot_translation = {}
+    supervisor.robot_rotation = {}
+    return supervisor
+
+
+def play_match(referee_class: Type[RCJSoccerReferee], draw_messages: bool):
+    random.seed(1)
+    referee = referee_class(
+        supervisor=create_supervisor(),
+        match_time=60,
+        progress_check_steps=100,
+        progress_check_threshold=0.5,
+        ball_progress_check_steps=100,
+        ball_progress_check_threshold=0.5,
+        team_name_blue="Blues",
+        team_name_yellow="Yellows",
+        initial_score_blue=0,
+        initial_score_yellow=0,
+        penalty_area_allowed_time=15,
+        penalty_area_reset_after=2,
+        match_id=1,
+        half_id=1,
+    )
+    recorder = EventRecorder()
+    referee.add_event_subscriber(recorder)
+    if draw_messages:
+        referee.add_event_subscriber(DrawMessageHandler())
+
+    referee.kickoff()
+    while referee.tick():
+        pass
+    referee.eventer.close()
+    return referee, recorder.events
+
+
+def test_same_events_as_the_full_referee():
+    full_referee, expected = play_match(GIRASoccerReferee, True)
+    referee, events = play_match(HeadlessReferee, False)
+
+    assert events == expected
+    ticks = referee.sv.ticks
+    assert ticks == full_referee.sv.ticks
+    event_types = [event_type.value for _, event_type, _ in events]
+    assert event_types.count("GOAL") == 2
+    assert "LACK_OF_PROGRESS" in event_types
+    assert event_types[-1] == "MATCH_FINISH"
+
+    # Nothing is drawn or sent to the robot window
+    assert not referee.event_messages_to_draw
+    referee.sv.draw_event_messages.assert_not_called()
+    for method in ("wwiReceiveText", "wwiSendText", "getSelected"):
+        assert getattr(full_referee.sv, method).call_count >= ticks - 1
+        getattr(referee.sv, method).assert_not_called()
+    assert len(referee.sv.mock_calls) < len(full_referee.sv.mock_calls)
@@ -0,0 +1,96 @@
+import math
+
+import pytest
+
+from referee.consts import (
+    BLUE_PENALTY_AREA,
+    DISTANCE_AROUND_UNOCCUPIED_NEUTRAL_SPOT,
+    NEUTRAL_SPOTS,
+    YELLOW_PENALTY_AREA,
+)
+from referee.enums import NeutralSpotDistanceType
+from referee.placement import CANDIDATE_GRID, find_free_position
+from referee.utils import is_outside
+
+pytest.importorskip("numpy")
+
+
+def test_candidate_grid_inside_field():
+    for x, y in CANDIDATE_GRID:
+        assert not is_outside(x, y)
+        assert YELLOW_PENALTY_AREA[0] < y < BLUE_PENALTY_AREA[0]
+
+
+@pytest.mark.parametrize(
+    "distance_type",
+    [
+        NeutralSpotDistanceType.NEAREST.value,
+        NeutralSpotDistanceType.FURTHEST.value,
+    ],
+)
+def test_free_position_all_neutral_spots_occupied(distance_type: str):
+    occupied = list(NEUTRAL_SPOTS.values())
+    x, y = find_free_position(0.7, 0.0, occupied, distance_type)
+
+    for ox, oy in occupied:
+        distance = math.hypot(x - ox, y - oy)
+        assert distance >= DISTANCE_AROUND_UNOCCUPIED_NEUTRAL_SPOT
+
+
+def test_free_position_nearest():
+    position = find_free_position(
+        0.7,
+        0.0,
+        [(0.0, 0.0)],
+        NeutralSpotDistanceType.NEAREST.value,
+    )
+
+    # Next to the nearest neutral spots, not to where the object is
+    assert position == pytest.approx((0.3, -0.3))
+
+
+def test_free_position_furthest():
+    x, y = find_free_position(
+        0.5,
+        0.4,
+        [(0.0, 0.0)],
+        NeutralSpotDistanceType.FURTHEST.value,
+    )
+
+    assert (x, y) == pytest.approx((-0.3, -0.3))
+
+
+def test_surrounded_object_is_moved():
+    # A robot stuck on the center spot, with the ball and a robot right next
+    # to it and the other robots on the rest of the neutral spots
+    x, y = 0.0, 0.0
+    occupied = [(0.06, 0.0), (-0.06, 0.0)] + [
+        spot for spot in NEUTRAL_SPOTS.values() if spot != (0, 0)
+    ]
+    position = find_free_position(
+        x, y, occupied, NeutralSpotDistanceType.NEAREST.value
+    )
+
+    # Next to one of the nearest neutral spots, rather than just outside
+    # of the robots around it
+    assert math.hypot(position[0] - x, position[1] - y) > 0.15
+    spot_distances = [
+        math.hypot(position[0] - sx, position[1] - sy)
+        for sx, sy in NEUTRAL_SPOTS.values()
+    ]
+    assert min(spot_distances) <= 0.1
+    for ox, oy in occupied:
+        distance = math.hypot(position[0] - ox, position[1] - oy)
+        assert distance >= DISTANCE_AROUND_UNOCCUPIED_NEUTRAL_SPOT
+
+
+def test_free_position_everything_occupied():
+    occupied = [tuple(candidate) for candidate in CANDIDATE_GRID]
+    position = find_free_position(
+        0.0,
+        0.0,
+        occupied,
+        NeutralSpotDistanceType.NEAREST.value,
+    )
+
+    assert tuple(position) in occupied
@@ -1,16 +1,24 @@
+import math
 import sys
+from typing import Tuple
 from unittest.mock import MagicMock
 
 sys.modules["controller"] = MagicMock()
 
 import pytest
 
-from referee.consts import MAX_EVENT_MESSAGES_IN_QUEUE
-from referee.referee import RCJSoccerReferee
+from referee.consts import (
+    EVENT_SUPPRESSION_WINDOW,
+    MAX_EVENT_MESSAGES_IN_QUEUE,
+    SUPERVISOR_PACKET_VERSION,
+    TIME_STEP,
+)
+from referee.enums import GameEvents
+from referee.event_handlers import EventHandler
+from referee.referee import RCJSoccerReferee, SUPERVISOR_PACKET
 
 
-@pytest.fixture
-def referee() -> RCJSoccerReferee:
+def create_referee(**kwargs) -> RCJSoccerReferee:
     supervisor = MagicMock()
     return RCJSoccerReferee(
         supervisor=supervisor,
@@ -28,6 +36,20 @@ def referee() -> RCJSoccerReferee:
         match_id=1,
         half_id=1,
         initial_position_noise=0.15,
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def referee() -> RCJSoccerReferee:
+    return create_referee()
+
+
+@pytest.fixture
+def broadcasting_referee() -> RCJSoccerReferee:
+    return create_referee(
+        broadcast_on_change=True,
+        broadcast_keepalive_steps=3,
     )
 
 
@@ -35,6 +57,57 @@ def test_pack_packet(referee: RCJSoccerReferee):
     assert referee._pack_packet() == b"\x00"
 
 
+def test_pack_versioned_packet(broadcasting_referee: RCJSoccerReferee):
+    broadcasting_referee.broadcast_sequence = 7
+    broadcasting_referee.ball_reset_timer = 3
+
+    packet = broadcasting_referee._pack_packet()
+
+    assert SUPERVISOR_PACKET.unpack(packet) == (
+        SUPERVISOR_PACKET_VERSION,
+        7,
+        True,
+    )
+
+
+def test_emit_data_every_tick(referee: RCJSoccerReferee):
+    for _ in range(3):
+        referee.emit_data()
+
+    assert referee.sv.emit_data.call_count == 3
+
+
+def test_emit_data_on_change(broadcasting_referee: RCJSoccerReferee):
+    emit_data = broadcasting_referee.sv.emit_data
+
+    broadcasting_referee.emit_data()
+    broadcasting_referee.emit_data()
+    assert emit_data.call_count == 1
+    assert SUPERVISOR_PACKET.unpack(emit_data.call_args[0][0])[1:] == (
+        1,
+        False,
+    )
+
+    broadcasting_referee.ball_reset_timer = 3
+    broadcasting_referee.emit_data()
+    assert emit_data.call_count == 2
+    assert SUPERVISOR_PACKET.unpack(emit_data.call_args[0][0])[1:] == (
+        2,
+        True,
+    )
+
+
+def test_emit_data_keepalive(broadcasting_referee: RCJSoccerReferee):
+    emit_data = broadcasting_referee.sv.emit_data
+
+    for _ in range(7):
+        broadcasting_referee.emit_data()
+
+    assert emit_data.call_count == 3
+    packets = [args[0][0] for args in emit_data.call_args_list]
+    assert packets[0] == packets[1] == packets[2]
+
+
 def test_add_initial_position_noise(referee: RCJSoccerReferee):
     position = [0.0, 0.0, 0.0]
     new_position = referee._add_initial_position_noise(position)
@@ -45,7 +118,7 @@ def test_add_initial_position_noise(referee: RCJSoccerReferee):
 
 
 def test_add_event_message_to_queue(referee: RCJSoccerReferee):
-    assert referee.event_messages_to_draw == []
+    assert list(referee.event_messages_to_draw) == []
 
     for i in range(1, MAX_EVENT_MESSAGES_IN_QUEUE + 1):
         referee.add_event_message_to_queue(str(i))
@@ -59,3 +132,75 @@ def test_add_event_message_to_queue(referee: RCJSoccerReferee):
         str(MAX_EVENT_MESSAGES_IN_QUEUE + 1),
     )
     assert referee.event_messages_to_draw[0] == (referee.time, "2")
+
+
+def test_draw_event_messages_only_when_changed(referee: RCJSoccerReferee):
+    referee.process_and_draw_event_messages()
+    referee.sv.draw_event_messages.assert_not_called()
+
+    referee.add_event_message_to_queue("message")
+    referee.process_and_draw_event_messages()
+    referee.process_and_draw_event_messages()
+
+    referee.sv.draw_event_messages.assert_called_once_with(["10:00 - message"])
+
+
+def lack_of_progress_storm(
+    referee: RCJSoccerReferee, ticks: int
+) -> Tuple[list, list]:
+    """Keep every robot stuck outside of the field for the given ticks.
+
+    Returns:
+        tuple: The lack of progress events and the summaries of the
+        suppressed ones
+    """
+    subscriber = EventHandler()
+    subscriber.handle = MagicMock()
+    referee.add_event_subscriber(subscriber)
+
+    # The robot is stuck outside of the field with no free neutral spot
+    referee.sv.get_robot_translation.return_value = [1.0, 0.0, 0.0]
+    referee.sv.get_ball_translation.return_value = [0.0, 0.0, 0.0]
+    referee.sv.get_unoccupied_neutral_spots_sorted.return_value = []
+
+    for _ in range(ticks):
+        referee.check_progress()
+        referee.time -= TIME_STEP / 1000.0
+        referee.fire_suppressed_events()
+
+    events = [args[0][1] for args in subscriber.handle.call_args_list]
+    lack_of_progress = [
+        event
+        for event in events
+        if event.event_type == GameEvents.LACK_OF_PROGRESS
+    ]
+    suppressed = [
+        event
+        for event in events
+        if event.event_type == GameEvents.EVENTS_SUPPRESSED
+    ]
+    return lack_of_progress, suppressed
+
+
+def test_lack_of_progress_storm_suppressed(referee: RCJSoccerReferee):
+    ticks = math.ceil(EVENT_SUPPRESSION_WINDOW / (TIME_STEP / 1000.0))
+    lack_of_progress, suppressed = lack_of_progress_storm(referee, ticks)
+
+    # One event and one summary for each of the robots
+    assert len(lack_of_progress) == 6
+    assert len(suppressed) == 6
+    assert suppressed[0].payload() == {
+        "event": "LACK_OF_PROGRESS",
+        "type": "robot",
+        "robot_name": "B1",
+        "count": ticks - 1,
+    }
+
+
+def test_lack_of_progress_storm_without_suppression():
+    referee = create_referee(event_suppression_window=0)
+    lack_of_progress, suppressed = lack_of_progress_storm(referee, 10)
+
+    # Every event of each of the robots is fired
+    assert len(lack_of_progress) == 6 * 10
+    assert suppressed == []
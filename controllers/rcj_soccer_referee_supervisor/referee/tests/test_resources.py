@@ -0,0 +1,115 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from referee.resources import PROC, ProcessSample, ResourceMonitor
+
+TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+WEBOTS_PID = 100
+
+
+def write_process(
+    proc: Path,
+    pid: int,
+    cpu_time: float,
+    rss: int,
+    ppid: int = WEBOTS_PID,
+    environ: str = "",
+    cmdline: str = "python3\0robot.py\0",
+):
+    path = proc / str(pid)
+    path.mkdir(parents=True, exist_ok=True)
+    ticks = round(cpu_time * TICKS)
+    fields = ["S", str(ppid)] + ["0"] * 9 + [str(ticks), "0"]
+    fields += ["0"] * 8 + [str(rss // PAGE_SIZE), "0"]
+    (path / "stat").write_text(f"{pid} (python3 (x)) {' '.join(fields)}\n")
+    (path / "environ").write_bytes(environ.encode())
+    (path / "cmdline").write_bytes(cmdline.encode())
+
+
+def test_process_sample():
+    stat = "42 (a) b) R 7 " + " ".join(["0"] * 9) + f" {2 * TICKS} {TICKS}"
+    stat += " 0" * 8 + " 3 0"
+    sample = ProcessSample(stat)
+    assert sample.ppid == 7
+    assert sample.cpu_time == 3
+    assert sample.rss == 3 * PAGE_SIZE
+
+
+def test_report_of_the_controllers(tmp_path: Path):
+    proc = tmp_path / "proc"
+    write_process(proc, 1, 0.0, 0, ppid=0)
+    write_process(proc, 2, 1.0, PAGE_SIZE, environ="WEBOTS_ROBOT_NAME=B1\0")
+    write_process(proc, 3, 1.0, PAGE_SIZE, environ="HOME=/\0")
+    (proc / "self").mkdir()
+
+    monitor = ResourceMonitor(
+        step_budget=5.0, interval=60, parent_pid=WEBOTS_PID, proc=proc
+    )
+    monitor.sample(0.0)
+    write_process(proc, 2, 2.0, 4 * PAGE_SIZE)
+    write_process(proc, 3, 1.1, 2 * PAGE_SIZE)
+    # Too soon after the first sample
+    monitor.sample(16.0)
+    assert monitor.controllers[2].cpu_time == 1.0
+    monitor.sample(32.0, force=True)
+
+    report = monitor.write(tmp_path / "report.json")
+    assert json.loads((tmp_path / "report.json").read_text()) == report
+    assert report["sim_time"] == 32.0
+    assert report["step_budget"] == 5.0
+    by_name = {c["name"]: c for c in report["controllers"]}
+    assert list(by_name) == ["B1", "robot:3"]
+    # 1000 steps of the simulation
+    assert by_name["B1"]["cpu_time"] == 1.0
+    assert by_name["B1"]["step_time"] == 1.0
+    assert by_name["B1"]["max_rss"] == 4 * PAGE_SIZE
+    assert by_name["B1"]["over_budget"] is False
+    assert by_name["robot:3"]["step_time"] == pytest.approx(0.1)
+
+
+def test_over_budget(tmp_path: Path):
+    proc = tmp_path / "proc"
+    write_process(proc, 2, 0.0, 0, environ="WEBOTS_ROBOT_NAME=Y2\0")
+    monitor = ResourceMonitor(
+        step_budget=5.0, parent_pid=WEBOTS_PID, proc=proc
+    )
+    monitor.sample(0.0)
+    # A controller started during the half counts from its first sample
+    write_process(proc, 3, 5.0, 0)
+    write_process(proc, 2, 0.32, 0)
+    monitor.sample(0.64, force=True)
+
+    (controller, _) = monitor.report()["controllers"]
+    assert controller["name"] == "Y2"
+    assert controller["step_time"] == 16.0
+    assert controller["over_budget"] is True
+    assert monitor.report()["controllers"][1]["cpu_time"] == 0
+
+
+@pytest.mark.skipif(
+    not ResourceMonitor.is_supported(), reason="There is no /proc"
+)
+def test_sample_child_processes():
+    env = {**os.environ, "WEBOTS_ROBOT_NAME": "B3"}
+    child = subprocess.Popen(
+        [sys.executable, "-c", "import time; time.sleep(10)"], env=env
+    )
+    try:
+        # Let the child start running Python
+        time.sleep(0.2)
+        monitor = ResourceMonitor(parent_pid=os.getpid(), proc=PROC)
+        monitor.sample(0.0)
+    finally:
+        child.kill()
+        child.wait()
+
+    controller = monitor.controllers[child.pid]
+    assert controller.name == "B3"
+    assert controller.max_rss > 0
@@ -0,0 +1,109 @@
+import json
+from pathlib import Path
+from unittest.mock import call, MagicMock
+
+import pytest
+
+from referee.config import load_config
+from referee.session import load_session, SessionHalf
+
+
+def write_session(path: Path, halves: list) -> Path:
+    path.write_text(json.dumps({"halves": halves}))
+    return path
+
+
+def team(name: str, controller: str) -> dict:
+    return {"name": name, "id": name, "controller": controller}
+
+
+def test_halves_override_the_config(tmp_path: Path):
+    config = load_config({"RCJ_SIM_MATCH_TIME": "60"})
+    path = write_session(
+        tmp_path / "session.json",
+        [
+            {"match": {"id": 1}, "blue": team("A", "team_a")},
+            {"match": {"id": 1, "half": 2}, "yellow": team("A", "team_a")},
+            {"match": {"id": 2}, "blue": {"initial_score": 1}},
+        ],
+    )
+    first, second, third = load_session(path, config)
+
+    assert first.config["match"] == {**config["match"], "id": "1"}
+    assert first.config["blue"]["name"] == "A"
+    assert second.config["match"]["half"] == 2
+    assert second.config["match"]["time"] == 60
+    # The halves do not inherit from each other
+    assert second.config["blue"] == config["blue"]
+    assert third.config["blue"]["initial_score"] == 1
+    assert config["match"]["id"] == "1"
+    assert first.controllers == {"B": "team_a", "Y": None}
+
+
+def test_scores_are_carried_over_within_a_match(tmp_path: Path):
+    path = write_session(
+        tmp_path / "session.json",
+        [
+            {
+                "match": {"id": 1},
+                "blue": team("A", "a"),
+                "yellow": team("B", "b"),
+            },
+            {
+                "match": {"id": 1},
+                "blue": team("B", "b"),
+                "yellow": team("A", "a"),
+            },
+            {
+                "match": {"id": 2},
+                "blue": team("B", "b"),
+                "yellow": team("A", "a"),
+            },
+            {"match": {"id": 2}, "yellow": {"initial_score": 3}},
+        ],
+    )
+    halves = load_session(path, load_config({}))
+
+    assert [half.carries_scores for half in halves] == [
+        False,
+        True,
+        False,
+        False,
+    ]
+    # The teams swap sides
+    assert halves[1].initial_scores({"A": 2, "B": 1}) == (1, 2)
+    assert halves[2].initial_scores({"A": 2, "B": 1}) == (0, 0)
+    assert halves[3].initial_scores({"A": 2, "B": 1}) == (0, 3)
+
+
+def test_controllers_are_restarted_after_the_first_half():
+    supervisor = MagicMock()
+    half = SessionHalf(load_config({}), {"B": "team_a", "Y": None})
+
+    half.start(supervisor, first=True)
+    supervisor.set_team_controller.assert_called_once_with("B", "team_a")
+
+    supervisor.reset_mock()
+    half.start(supervisor, first=False)
+    assert supervisor.set_team_controller.call_args_list == [
+        call("B", "team_a"),
+        call("Y", None),
+    ]
+
+    # A match which is not part of a session keeps its controllers
+    supervisor.reset_mock()
+    SessionHalf(load_config({}), {}).start(supervisor, first=True)
+    supervisor.set_team_controller.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "halves, message",
+    [
+        ([], "There are no halves"),
+        ([{"match": {"round": 1}}], "Unknown config key round"),
+    ],
+)
+def test_invalid_sessions(tmp_path: Path, halves, message):
+    path = write_session(tmp_path / "session.json", halves)
+    with pytest.raises(ValueError, match=message):
+        load_session(path, load_config({}))
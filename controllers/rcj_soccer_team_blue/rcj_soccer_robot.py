@@ -5,6 +5,11 @@ TIME_STEP = 32
 ROBOT_NAMES = ["B1", "B2", "B3", "Y1", "Y2", "Y3"]
 N_ROBOTS = len(ROBOT_NAMES)
 
+# True/False telling whether the goal was scored
+LEGACY_SUPERVISOR_PACKET = struct.Struct("?")
+# Packet version, sequence number of the state and the legacy data
+SUPERVISOR_PACKET = struct.Struct("<BI?")
+
 
 class RCJSoccerRobot:
     def __init__(self, robot):
@@ -15,6 +20,9 @@ class RCJSoccerRobot:
 
         self.receiver = self.robot.getDevice("supervisor receiver")
         self.receiver.enable(TIME_STEP)
+        # The last packet received from supervisor and its parsed data
+        self.supervisor_packet = None
+        self.supervisor_data = {"waiting_for_kickoff": False}
 
         self.team_emitter = self.robot.getDevice("team emitter")
         self.team_receiver = self.robot.getDevice("team receiver")
@@ -57,9 +65,11 @@ class RCJSoccerRobot:
                     'waiting_for_kickoff': False,
                 }
         """
-        # True/False telling whether the goal was scored
-        struct_fmt = "?"
-        unpacked = struct.unpack(struct_fmt, packet)
+        if len(packet) == LEGACY_SUPERVISOR_PACKET.size:
+            unpacked = LEGACY_SUPERVISOR_PACKET.unpack(packet)
+        else:
+            # Skip the version and the sequence number of the state
+            unpacked = SUPERVISOR_PACKET.unpack(packet)[2:]
 
         data = {"waiting_for_kickoff": unpacked[0]}
         return data
@@ -67,13 +77,24 @@ class RCJSoccerRobot:
     def get_new_data(self) -> dict:
         """Read new data from supervisor
 
+        The supervisor may only send its data when it changes, so all the
+        pending packets are read and the last known data is returned even if
+        there is no new packet.
+
         Returns:
             dict: See `parse_supervisor_msg` method
         """
-        packet = self.receiver.getData()
-        self.receiver.nextPacket()
+        packet = None
+        while self.is_new_data():
+            packet = self.receiver.getData()
+            self.receiver.nextPacket()
+
+        # Only parse the packet if it differs from the last one
+        if packet is not None and packet != self.supervisor_packet:
+            self.supervisor_packet = packet
+            self.supervisor_data = self.parse_supervisor_msg(packet)
 
-        return self.parse_supervisor_msg(packet)
+        return self.supervisor_data
 
     def is_new_data(self) -> bool:
         """Check if there is new data from supervisor to be received
@@ -1,13 +1,45 @@
-def get_direction(ball_vector: list) -> int:
+import json
+import os
+
+# Tuning constants of the robots. They can be overridden with a JSON object
+# in RCJ_TEAM_PARAMS_B (for the blue robots) or RCJ_TEAM_PARAMS_Y (for the
+# yellow ones), e.g. '{"dead_band": 0.1}'
+DEFAULT_PARAMS = {
+    # How far to the side the ball can be while being straight ahead
+    "dead_band": 0.13,
+    # Speed of the motors when going forward
+    "forward_speed": 7,
+    # Speed of the motors when rotating
+    "turn_speed": 4,
+}
+
+
+def load_params(team: str) -> dict:
+    """Get the tuning constants of the robots of the team
+
+    Args:
+        team (str): 'B' for blue or 'Y' for yellow team
+
+    Returns:
+        dict: The defaults updated with the overridden values
+    """
+    params = dict(DEFAULT_PARAMS)
+    params.update(json.loads(os.environ.get(f"RCJ_TEAM_PARAMS_{team}", "{}")))
+    return params
+
+
+def get_direction(ball_vector: list, dead_band: float = 0.13) -> int:
     """Get direction to navigate robot to face the ball
 
     Args:
         ball_vector (list of floats): Current vector of the ball with respect
             to the robot.
+        dead_band (float): How far to the side the ball can be while still
+            going forward
 
     Returns:
         int: 0 = forward, -1 = right, 1 = left
     """
-    if -0.13 <= ball_vector[1] <= 0.13:
+    if -dead_band <= ball_vector[1] <= dead_band:
         return 0
     return -1 if ball_vector[1] < 0 else 1
@@ -10,46 +10,48 @@ from rcj_soccer_robot import RCJSoccerRobot, TIME_STEP
 
 class MyRobot3(RCJSoccerRobot):
     def run(self):
+        params = utils.load_params(self.team)
         while self.robot.step(TIME_STEP) != -1:
-            if self.is_new_data():
-                data = self.get_new_data()  # noqa: F841
-
-                while self.is_new_team_data():
-                    team_data = self.get_new_team_data()  # noqa: F841
-                    # Do something with team data
-
-                if self.is_new_ball_data():
-                    ball_data = self.get_new_ball_data()
-                else:
-                    # If the robot does not see the ball, stop motors
-                    self.left_motor.setVelocity(0)
-                    self.right_motor.setVelocity(0)
-                    continue
-
-                # Get data from compass
-                heading = self.get_compass_heading()  # noqa: F841
-
-                # Get GPS coordinates of the robot
-                robot_pos = self.get_gps_coordinates()  # noqa: F841
-
-                # Get data from sonars
-                sonar_values = self.get_sonar_values()  # noqa: F841
-
-                # Compute the speed for motors
-                direction = utils.get_direction(ball_data["direction"])
-
-                # If the robot has the ball right in front of it, go forward,
-                # rotate otherwise
-                if direction == 0:
-                    left_speed = 7
-                    right_speed = 7
-                else:
-                    left_speed = direction * 4
-                    right_speed = direction * -4
-
-                # Set the speed to motors
-                self.left_motor.setVelocity(left_speed)
-                self.right_motor.setVelocity(right_speed)
-
-                # Send message to team robots
-                self.send_data_to_team(self.player_id)
+            data = self.get_new_data()  # noqa: F841
+
+            while self.is_new_team_data():
+                team_data = self.get_new_team_data()  # noqa: F841
+                # Do something with team data
+
+            if self.is_new_ball_data():
+                ball_data = self.get_new_ball_data()
+            else:
+                # If the robot does not see the ball, stop motors
+                self.left_motor.setVelocity(0)
+                self.right_motor.setVelocity(0)
+                continue
+
+            # Get data from compass
+            heading = self.get_compass_heading()  # noqa: F841
+
+            # Get GPS coordinates of the robot
+            robot_pos = self.get_gps_coordinates()  # noqa: F841
+
+            # Get data from sonars
+            sonar_values = self.get_sonar_values()  # noqa: F841
+
+            # Compute the speed for motors
+            direction = utils.get_direction(
+                ball_data["direction"], params["dead_band"]
+            )
+
+            # If the robot has the ball right in front of it, go forward,
+            # rotate otherwise
+            if direction == 0:
+                left_speed = params["forward_speed"]
+                right_speed = params["forward_speed"]
+            else:
+                left_speed = direction * params["turn_speed"]
+                right_speed = direction * -params["turn_speed"]
+
+            # Set the speed to motors
+            self.left_motor.setVelocity(left_speed)
+            self.right_motor.setVelocity(right_speed)
+
+            # Send message to team robots
+            self.send_data_to_team(self.player_id)
@@ -5,6 +5,18 @@ import sys
 from pathlib import Path
 from string import Template
 
+from tournament.worlds import (
+    DEFAULT_PHYSICS,
+    generate_world,
+    is_headless,
+    physics_profile,
+    PHYSICS_PROFILES,
+    read_config_file,
+    set_world_info,
+    strip_world,
+    world_params,
+)
+
 try:
     options, _ = getopt.getopt(
         sys.argv[1:],
@@ -18,6 +30,10 @@ try:
             "controller_blue=",
             "controller_yellow=",
             "ir_range=",
+            "config=",
+            "cache_dir=",
+            "headless",
+            "physics=",
         ],
     )
 except getopt.GetoptError as err:
@@ -26,18 +42,46 @@ except getopt.GetoptError as err:
 
 
 template_path = None
+cache_dir = None
+headless = False
+physics = None
 # Default params
 params = {"ir_range": "0.6"}
+options_params = {}
 for option, value in options:
-    if option == "--template":
+    if option == "--config":
+        config = read_config_file(Path(value))
+        params = world_params(config)
+        headless = headless or is_headless(config)
+        physics = physics or physics_profile(config)
+    elif option == "--template":
         template_path = Path(value)
+    elif option == "--cache_dir":
+        cache_dir = Path(value)
+    elif option == "--headless":
+        headless = True
+    elif option == "--physics":
+        physics = value
     else:
         clean_key = option.replace("--", "")
-        params[clean_key] = value
+        options_params[clean_key] = value
+# The options given on the command line take precedence over the config
+params.update(options_params)
 
 if template_path is None or not template_path.exists():
     print(f"ERROR: Provided path {template_path} does not exist")
     sys.exit(1)
 
+physics = physics or DEFAULT_PHYSICS
+if physics not in PHYSICS_PROFILES:
+    print(f"ERROR: Unknown physics profile {physics}")
+    sys.exit(1)
+
+if cache_dir is not None:
+    # Print the path of the (already) generated world instead
+    print(generate_world(params, template_path, cache_dir, headless, physics))
+    sys.exit(0)
+
 s = Template(template_path.read_text())
-print(s.substitute(params), end="")
+world = set_world_info(s.substitute(params), PHYSICS_PROFILES[physics])
+print(strip_world(world) if headless else world, end="")
@@ -0,0 +1,387 @@
+"""Adaptive scheduling of the matches of a round robin.
+
+Instead of a fixed number of matches, every pairing of two teams plays
+matches (of two halves, one on each side) until a sequential probability
+ratio test (SPRT) tells which of the teams is better, or until it played
+`max_matches`. The matches are played on one pool of simulators: whenever
+a simulator is free, it plays the next match of the undecided pairing with
+the fewest matches, and the test is checked as soon as a match is over, so
+the simulators only spend time on the undecided pairings.
+
+The test looks at a statistic of each match, either its `result` for the
+first team of the pairing (1 for a win, 0 for a draw and -1 for a loss) or
+its goal difference (`goals`), read from the `MATCH_FINISH` of the reflog.
+The statistic is modelled as normally distributed with the variance of the
+matches played so far, and the hypotheses are that its mean is `delta` (the
+first team is better) or `-delta` (the second team is better). `alpha` and
+`beta` are the probabilities of calling the wrong team the better one when
+the difference is at least `delta`.
+"""
+import argparse
+import copy
+import itertools
+import json
+import math
+import shlex
+import statistics
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from tournament.runner import (
+    available_cpus,
+    DEFAULT_SIMULATOR,
+    DEFAULT_WORLD,
+    FINISHED,
+    Fixture,
+    MatchResult,
+    TournamentRunner,
+)
+from tournament.worlds import read_config_file, WORLDS_DIR
+
+
+def match_result(goal_difference: int) -> int:
+    return (goal_difference > 0) - (goal_difference < 0)
+
+
+# The statistic of a match from the goal difference of the first team
+STATISTICS: Dict[str, Callable[[int], int]] = {
+    "result": match_result,
+    "goals": int,
+}
+DEFAULT_DELTAS = {"result": 0.25, "goals": 0.5}
+RESULTS_FILE = "adaptive.json"
+
+
+class SequentialTest:
+    """SPRT of whether the mean of the statistic is `delta` or `-delta`.
+
+    Args:
+        delta (float): The smallest difference of the mean worth telling
+        alpha (float): Probability of deciding for the first team while the
+            second one is better
+        beta (float): Probability of deciding for the second team while the
+            first one is better
+        min_matches (int): Matches to play before deciding, so that the
+            variance can be estimated
+    """
+
+    def __init__(
+        self,
+        delta: float,
+        alpha: float = 0.05,
+        beta: float = 0.05,
+        min_matches: int = 3,
+    ):
+        self.delta = delta
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+        self.min_matches = min_matches
+        self.samples: List[float] = []
+
+    def add(self, sample: float):
+        self.samples.append(sample)
+
+    @property
+    def llr(self) -> float:
+        """Log-likelihood ratio of the first team being the better one."""
+        if len(self.samples) < 2:
+            return 0.0
+        # A few equal samples do not make the variance vanish
+        variance = max(statistics.pvariance(self.samples), self.delta ** 2)
+        return 2 * self.delta * sum(self.samples) / variance
+
+    def decision(self) -> int:
+        """Get the decision of the test.
+
+        Returns:
+            int: 1 if the first team is better, -1 if the second one is
+            better, 0 if it is not decided yet
+        """
+        if len(self.samples) < self.min_matches:
+            return 0
+        llr = self.llr
+        if llr >= self.upper:
+            return 1
+        if llr <= self.lower:
+            return -1
+        return 0
+
+
+class Pairing:
+    """Two teams playing each other until the test decides."""
+
+    def __init__(self, first: str, second: str, test: SequentialTest):
+        self.teams = first, second
+        self.test = test
+        self.matches = 0
+        self.failed = 0
+        # Matches which are being played
+        self.in_flight = 0
+        self.goal_difference = 0
+        # Set once the test decides, the matches which were already being
+        # played by then do not change it
+        self.winner: Optional[str] = None
+
+    @property
+    def scheduled(self) -> int:
+        return self.matches + self.failed + self.in_flight
+
+    def is_open(self, max_matches: int) -> bool:
+        """Whether the pairing needs another match."""
+        return self.winner is None and self.scheduled < max_matches
+
+    def update(self, result: MatchResult, statistic: Callable[[int], int]):
+        """Add the outcome of the last half of a match."""
+        self.in_flight -= 1
+        if result.status != FINISHED:
+            self.failed += 1
+            return
+        first, second = self.teams
+        goal_difference = result.goal_difference(first)
+        self.matches += 1
+        self.goal_difference += goal_difference
+        if self.winner is None:
+            self.test.add(statistic(goal_difference))
+            decision = self.test.decision()
+            if decision != 0:
+                self.winner = first if decision > 0 else second
+
+    def to_dict(self) -> dict:
+        return {
+            "teams": list(self.teams),
+            "matches": self.matches,
+            "failed": self.failed,
+            "goal_difference": self.goal_difference,
+            "llr": round(self.test.llr, 3),
+            "winner": self.winner,
+        }
+
+
+def side_config(
+    base: dict, blue: str, yellow: str, teams: Dict[str, str]
+) -> dict:
+    """Get the match config of a half with the teams on the sides."""
+    config = copy.deepcopy(base)
+    for section, name in (("blue", blue), ("yellow", yellow)):
+        config.setdefault(section, {}).update(
+            name=name, id=name, controller=teams[name]
+        )
+    config.setdefault("referee", {}).setdefault("headless", True)
+    return config
+
+
+class AdaptiveScheduler:
+    """Play the round robin of the teams on one pool of simulators.
+
+    Args:
+        teams (dict): The controller of each team (by its name)
+        output_dir (Path): Directory the matches are played in
+        simulator (list): Command which starts the simulator
+        mode (str): The statistic of the test, `result` or `goals`
+        delta (float, optional): The smallest difference worth telling,
+            depends on the mode by default
+        alpha (float): Probability of calling the worse team the better one
+        beta (float): Probability of calling the better team the worse one
+        min_matches (int): Matches of a pairing before it can be decided
+        max_matches (int): Matches after which a pairing stays undecided
+        base_config (dict): Match config the teams are set in
+        cache_dir (Path): Directory of the generated worlds
+        **runner_args: Passed to the `TournamentRunner`
+    """
+
+    def __init__(
+        self,
+        teams: Dict[str, str],
+        output_dir: Path,
+        simulator: Sequence[str] = (DEFAULT_SIMULATOR,),
+        mode: str = "result",
+        delta: Optional[float] = None,
+        alpha: float = 0.05,
+        beta: float = 0.05,
+        min_matches: int = 3,
+        max_matches: int = 20,
+        base_config: Optional[dict] = None,
+        cache_dir: Path = WORLDS_DIR,
+        **runner_args,
+    ):
+        self.teams = teams
+        self.output_dir = output_dir
+        self.simulator = simulator
+        self.statistic = STATISTICS[mode]
+        self.max_matches = max_matches
+        self.base_config = base_config or {}
+        self.cache_dir = cache_dir
+        self.runner_args = runner_args
+        if delta is None:
+            delta = DEFAULT_DELTAS[mode]
+        self.pairings = [
+            Pairing(
+                first,
+                second,
+                SequentialTest(delta, alpha, beta, min_matches),
+            )
+            for first, second in itertools.combinations(teams, 2)
+        ]
+        self.next_match_id = 1
+        # The pairing of each match being played
+        self.playing: Dict[int, Pairing] = {}
+
+    def write_config(self, blue: str, yellow: str) -> Path:
+        name = f"{blue}_vs_{yellow}".replace(" ", "_")
+        path = self.output_dir / "configs" / f"{name}.json"
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            config = side_config(self.base_config, blue, yellow, self.teams)
+            path.write_text(json.dumps(config, indent=2))
+        return path
+
+    def match_fixtures(self, pairing: Pairing) -> Tuple[Fixture, Fixture]:
+        """Get the halves of the next match of the pairing."""
+        first, second = pairing.teams
+        match_id = self.next_match_id
+        self.next_match_id += 1
+        # Every pairing plays the same seeds, one after another
+        env = {"RCJ_SIM_SEED": str(pairing.scheduled + 1)}
+        return (
+            Fixture(
+                match_id,
+                first,
+                second,
+                half=1,
+                env=env,
+                config=str(self.write_config(first, second)),
+            ),
+            Fixture(
+                match_id,
+                second,
+                first,
+                half=2,
+                env=env,
+                config=str(self.write_config(second, first)),
+            ),
+        )
+
+    def next_fixtures(self) -> List[Fixture]:
+        """Get the halves of the next match of the open pairing with the
+        fewest matches, none if every pairing is decided or scheduled up to
+        the maximum."""
+        pairings = [p for p in self.pairings if p.is_open(self.max_matches)]
+        if not pairings:
+            return []
+        pairing = min(pairings, key=lambda p: p.scheduled)
+        fixtures = self.match_fixtures(pairing)
+        pairing.in_flight += 1
+        self.playing[fixtures[0].match_id] = pairing
+        return list(fixtures)
+
+    def on_result(self, result: MatchResult):
+        # The second half (played, failed or skipped) is the end of the
+        # match, and its result is the one of the whole match
+        if result.fixture.half == 2:
+            pairing = self.playing.pop(result.fixture.match_id)
+            pairing.update(result, self.statistic)
+
+    def run(self) -> List[Pairing]:
+        """Play until every pairing is decided or out of matches.
+
+        Returns:
+            list: The pairings of the round robin
+        """
+        runner = TournamentRunner(
+            [],
+            self.output_dir / "matches",
+            self.simulator,
+            # Only a fallback, every fixture has its config
+            self.cache_dir / DEFAULT_WORLD.name,
+            on_result=self.on_result,
+            next_fixtures=self.next_fixtures,
+            **self.runner_args,
+        )
+        runner.run()
+        return self.pairings
+
+
+def write_results(
+    output_dir: Path, pairings: List[Pairing], max_matches: int
+) -> dict:
+    """Write the outcome of the pairings and the matches they saved.
+
+    Returns:
+        dict: The written results
+    """
+    played = sum(p.matches + p.failed for p in pairings)
+    summary = {
+        "pairings": [pairing.to_dict() for pairing in pairings],
+        "matches": played,
+        "max_matches": max_matches * len(pairings),
+    }
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / RESULTS_FILE).write_text(json.dumps(summary, indent=2))
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Play a round robin until each pairing is decided."
+    )
+    parser.add_argument(
+        "teams",
+        type=Path,
+        help="JSON object of the controller of each team",
+    )
+    parser.add_argument("output", type=Path, help="output directory")
+    parser.add_argument("--config", type=Path, help="base match config")
+    parser.add_argument(
+        "--simulator",
+        default=DEFAULT_SIMULATOR,
+        help="command which starts the simulator",
+    )
+    parser.add_argument("--mode", choices=list(STATISTICS), default="result")
+    parser.add_argument(
+        "--delta", type=float, help="smallest difference worth telling"
+    )
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--min-matches", type=int, default=3)
+    parser.add_argument("--max-matches", type=int, default=20)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(len(available_cpus()) // 2, 1),
+        help="matches played at the same time",
+    )
+    parser.add_argument("--timeout", type=float, default=3600)
+    parser.add_argument("--cache-dir", type=Path, default=WORLDS_DIR)
+    args = parser.parse_args(argv)
+
+    scheduler = AdaptiveScheduler(
+        json.loads(args.teams.read_text()),
+        args.output,
+        shlex.split(args.simulator),
+        args.mode,
+        args.delta,
+        args.alpha,
+        args.beta,
+        args.min_matches,
+        args.max_matches,
+        read_config_file(args.config) if args.config else None,
+        args.cache_dir,
+        workers=args.workers,
+        timeout=args.timeout,
+    )
+    pairings = scheduler.run()
+    summary = write_results(args.output, pairings, args.max_matches)
+
+    print("pairing\tmatches\tgoal difference\tLLR\twinner")
+    for pairing in summary["pairings"]:
+        first, second = pairing["teams"]
+        print(
+            f"{first} vs {second}\t{pairing['matches']}\t"
+            f"{pairing['goal_difference']}\t{pairing['llr']}\t"
+            f"{pairing['winner'] or 'undecided'}"
+        )
+    print(f"matches played: {summary['matches']}/{summary['max_matches']}")
+
+
+if __name__ == "__main__":
+    main()
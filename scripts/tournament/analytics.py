@@ -0,0 +1,506 @@
+import argparse
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MANIFEST = "manifest.json"
+CHUNKS_DIR = "chunks"
+STORE_VERSION = 2
+# Chunks after which they are merged into one, so that a query does not open
+# the files of every ingestion
+MAX_CHUNKS = 8
+
+# Code of a missing value in the dictionary encoded columns
+MISSING = -1
+
+EVENT_COLUMNS = {
+    "event": np.int8,
+    "match": np.int32,
+    "half": np.int8,
+    "time": np.float32,
+    "robot": np.int8,
+    "team": np.int32,
+    # Number of events the row stands for, more than one for the events
+    # which the referee suppressed
+    "weight": np.int32,
+}
+HALF_COLUMNS = {
+    "match": np.int32,
+    "half": np.int8,
+    "team_blue": np.int32,
+    "team_yellow": np.int32,
+}
+# The dictionary which encodes the values of each column
+DICTIONARIES = {
+    "event": "event",
+    "match": "match",
+    "robot": "robot",
+    "team": "team",
+    "team_blue": "team",
+    "team_yellow": "team",
+}
+
+
+def find_reflogs(paths: Iterable[Path]) -> Iterator[Path]:
+    """Find the JSON reflogs in the given files and directories.
+
+    Args:
+        paths (list): Reflog files or directories containing them
+
+    Yields:
+        Path: Path of each reflog
+    """
+    for path in paths:
+        if path.is_dir():
+            yield from sorted(path.glob("*.jsonl"))
+        else:
+            yield path
+
+
+def group_count(
+    columns: Sequence[np.ndarray],
+    weights: Optional[np.ndarray] = None,
+) -> Tuple[List[np.ndarray], np.ndarray]:
+    """Count the rows of each distinct combination of integer columns.
+
+    Args:
+        columns (list): Integer columns of the same length
+        weights (np.ndarray, optional): Number each row counts as, one by
+            default
+
+    Returns:
+        tuple: The distinct values of each column and the count of each of
+        the combinations
+    """
+    # Combine the columns into a single key, each column being one digit of a
+    # mixed radix number
+    keys = np.zeros(len(columns[0]), dtype=np.int64)
+    radixes = []
+    for column in columns:
+        values = column.astype(np.int64) - MISSING
+        radix = int(values.max()) + 1 if len(values) else 1
+        keys = keys * radix + values
+        radixes.append(radix)
+
+    unique, inverse, counts = np.unique(
+        keys, return_inverse=True, return_counts=True
+    )
+    if weights is not None:
+        counts = np.bincount(
+            inverse.ravel(), weights=weights, minlength=len(unique)
+        ).astype(np.int64)
+
+    groups = []
+    for radix in reversed(radixes):
+        groups.append(unique % radix + MISSING)
+        unique = unique // radix
+    return groups[::-1], counts
+
+
+class ReflogTables:
+    """Columnar tables of the events and halves in the store."""
+
+    def __init__(
+        self,
+        events: Dict[str, np.ndarray],
+        halves: Dict[str, np.ndarray],
+        dictionaries: Dict[str, List[str]],
+    ):
+        self.events = events
+        self.halves = halves
+        self.dictionaries = dictionaries
+
+    def code(self, dictionary: str, value: str) -> int:
+        try:
+            return self.dictionaries[dictionary].index(value)
+        except ValueError:
+            return MISSING
+
+    def decode(self, column: str, codes: np.ndarray) -> List[Optional[str]]:
+        values = self.dictionaries[DICTIONARIES[column]]
+        return [None if code == MISSING else values[code] for code in codes]
+
+    def event_mask(self, event: str) -> np.ndarray:
+        return self.events["event"] == self.code("event", event)
+
+    def halves_played(self) -> Dict[int, int]:
+        """Count the halves played by each team.
+
+        Returns:
+            dict: Number of halves for each team code
+        """
+        teams = np.concatenate(
+            (self.halves["team_blue"], self.halves["team_yellow"])
+        )
+        teams = teams[teams != MISSING]
+        codes, counts = np.unique(teams, return_counts=True)
+        return dict(zip(codes.tolist(), counts.tolist()))
+
+    def count(
+        self,
+        by: Sequence[str],
+        event: Optional[str] = None,
+    ) -> List[tuple]:
+        """Count the events grouped by the given columns.
+
+        Args:
+            by (list): Names of the columns to group by
+            event (str, optional): Only count the events of this type
+
+        Returns:
+            list: Tuples of the values of the columns and the count
+        """
+        mask = np.ones(len(self.events["event"]), dtype=bool)
+        if event is not None:
+            mask = self.event_mask(event)
+
+        weights = self.events["weight"][mask]
+        if not by:
+            return [(int(weights.sum()),)]
+
+        columns = [self.events[column][mask] for column in by]
+        groups, counts = group_count(columns, weights)
+
+        decoded = []
+        for column, values in zip(by, groups):
+            if column in DICTIONARIES:
+                decoded.append(self.decode(column, values))
+            else:
+                decoded.append(values.tolist())
+        return list(zip(*decoded, counts.tolist()))
+
+    def goals_per_minute(self) -> List[tuple]:
+        """Count the goals scored in each minute of the halves.
+
+        Returns:
+            list: Tuples of the minute, the number of goals and the average
+            number of goals per half
+        """
+        mask = self.event_mask("GOAL")
+        minutes = (self.events["time"][mask] // 60).astype(np.int64)
+        groups, counts = group_count([minutes], self.events["weight"][mask])
+        halves = max(len(self.halves["match"]), 1)
+        return [
+            (minute, count, count / halves)
+            for minute, count in zip(groups[0].tolist(), counts.tolist())
+        ]
+
+    def lack_of_progress_rate(self) -> List[tuple]:
+        """Count the lack of progress events (including the suppressed ones)
+        of the robots of each team.
+
+        Returns:
+            list: Tuples of the team name, the number of events and the
+            average number of events per half played
+        """
+        mask = self.event_mask("LACK_OF_PROGRESS")
+        mask &= self.events["team"] != MISSING
+        groups, counts = group_count(
+            [self.events["team"][mask]], self.events["weight"][mask]
+        )
+        halves = self.halves_played()
+        return [
+            (team, count, count / max(halves.get(code, 0), 1))
+            for code, team, count in zip(
+                groups[0].tolist(),
+                self.decode("team", groups[0]),
+                counts.tolist(),
+            )
+        ]
+
+    def penalties_per_robot(self) -> List[tuple]:
+        """Count the penalty area violations of each robot.
+
+        Returns:
+            list: Tuples of the team name, the robot name and the count
+        """
+        return self.count(["team", "robot"], "INSIDE_PENALTY_FOR_TOO_LONG")
+
+
+class ReflogStore:
+    """Append-only columnar store of the events from JSON reflogs.
+
+    Every ingestion appends a chunk with one `.npy` file per column, and the
+    chunks are merged into one once there are more than `MAX_CHUNKS`. The
+    manifest keeps the dictionaries of the encoded columns as well as how
+    far each reflog has been read, so that only new events get ingested.
+
+    The events which the referee suppressed are stored as a single row of
+    their type, weighted by their number.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        manifest_path = path / MANIFEST
+        if manifest_path.exists():
+            self.manifest = json.loads(manifest_path.read_text())
+            if self.manifest["version"] != STORE_VERSION:
+                raise ValueError(f"Unsupported store version in {path}")
+        else:
+            self.manifest = {
+                "version": STORE_VERSION,
+                "dictionaries": {
+                    name: [] for name in set(DICTIONARIES.values())
+                },
+                "files": {},
+                "chunks": [],
+            }
+
+        self.codes = {
+            name: {value: code for code, value in enumerate(values)}
+            for name, values in self.manifest["dictionaries"].items()
+        }
+
+    def encode(self, dictionary: str, value: Optional[str]) -> int:
+        """Get the code of the value, adding it to the dictionary if needed."""
+        if value is None:
+            return MISSING
+
+        codes = self.codes[dictionary]
+        if value not in codes:
+            codes[value] = len(codes)
+            self.manifest["dictionaries"][dictionary].append(value)
+        return codes[value]
+
+    def _event_team(
+        self,
+        event: str,
+        payload: dict,
+        robot: Optional[str],
+        state: dict,
+    ) -> int:
+        """Get the code of the team the event is about."""
+        if event == "GOAL":
+            return self.encode("team", payload.get("team_name"))
+
+        side = payload.get("team_name") if event == "KICKOFF" else robot
+        if side and side[0] == "B":
+            return state["team_blue"]
+        if side and side[0] == "Y":
+            return state["team_yellow"]
+        return MISSING
+
+    def _add_event(
+        self,
+        data: dict,
+        state: dict,
+        events: Dict[str, list],
+        halves: Dict[str, list],
+    ):
+        event = data["event"]
+        payload = data.get("payload") or {}
+        weight = 1
+        if event == "EVENTS_SUPPRESSED":
+            event, weight = payload["event"], payload["count"]
+
+        if event == "MATCH_START":
+            state["match"] = self.encode("match", str(payload["match_id"]))
+            state["half"] = int(payload["halftime"])
+            state["team_blue"] = self.encode("team", payload["team_name_blue"])
+            state["team_yellow"] = self.encode(
+                "team", payload["team_name_yellow"]
+            )
+            for column in HALF_COLUMNS:
+                halves[column].append(state[column])
+
+        robot = payload.get("robot_name")
+        if robot is None and payload.get("type") == "ball":
+            robot = "ball"
+
+        events["event"].append(self.encode("event", event))
+        events["match"].append(state["match"])
+        events["half"].append(state["half"])
+        events["time"].append(data["matchtime"])
+        events["robot"].append(self.encode("robot", robot))
+        events["team"].append(self._event_team(event, payload, robot, state))
+        events["weight"].append(weight)
+
+    def ingest(self, paths: Iterable[Path]) -> int:
+        """Ingest the events which were appended to the reflogs since the
+        last ingestion.
+
+        Args:
+            paths (list): Reflog files or directories containing them
+
+        Returns:
+            int: Number of ingested events
+        """
+        events = {column: [] for column in EVENT_COLUMNS}
+        halves = {column: [] for column in HALF_COLUMNS}
+
+        for path in find_reflogs(paths):
+            key = str(path.resolve())
+            state = self.manifest["files"].get(key)
+            if state is None:
+                state = {
+                    "offset": 0,
+                    "match": MISSING,
+                    "half": 0,
+                    "team_blue": MISSING,
+                    "team_yellow": MISSING,
+                }
+
+            if path.stat().st_size < state["offset"]:
+                print(f"WARNING: {path} got truncated, skipping it")
+                continue
+
+            with path.open("rb") as infile:
+                infile.seek(state["offset"])
+                data = infile.read()
+
+            # Only ingest complete lines, the rest is read next time
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                if line.strip():
+                    self._add_event(json.loads(line), state, events, halves)
+
+            state["offset"] += end
+            self.manifest["files"][key] = state
+
+        if events["event"] or halves["match"]:
+            self._write_chunk(events, halves)
+        if len(self.manifest["chunks"]) > MAX_CHUNKS:
+            self.compact()
+        else:
+            self._save_manifest()
+
+        return len(events["event"])
+
+    def compact(self):
+        """Merge the chunks into a single one."""
+        merged = list(self.manifest["chunks"])
+        if len(merged) < 2:
+            self._save_manifest()
+            return
+
+        self._write_chunk(
+            self._load_table("events", EVENT_COLUMNS),
+            self._load_table("halves", HALF_COLUMNS),
+        )
+        self.manifest["chunks"] = self.manifest["chunks"][-1:]
+        # The merged chunks are only removed once the manifest no longer
+        # refers to them
+        self._save_manifest()
+        for name in merged:
+            shutil.rmtree(self.path / CHUNKS_DIR / name)
+
+    def _write_chunk(
+        self,
+        events: Dict[str, Sequence],
+        halves: Dict[str, Sequence],
+    ):
+        chunks = self.manifest["chunks"]
+        name = "%06d" % (int(chunks[-1]) + 1 if chunks else 1)
+        chunk = self.path / CHUNKS_DIR / name
+        chunk.mkdir(parents=True, exist_ok=True)
+
+        for column, dtype in EVENT_COLUMNS.items():
+            array = np.asarray(events[column], dtype=dtype)
+            np.save(chunk / f"events_{column}.npy", array)
+        for column, dtype in HALF_COLUMNS.items():
+            array = np.asarray(halves[column], dtype=dtype)
+            np.save(chunk / f"halves_{column}.npy", array)
+
+        self.manifest["chunks"].append(name)
+
+    def _save_manifest(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path / f"{MANIFEST}.tmp"
+        tmp_path.write_text(json.dumps(self.manifest))
+        os.replace(tmp_path, self.path / MANIFEST)
+
+    def _load_table(self, prefix: str, columns: dict) -> Dict[str, np.ndarray]:
+        table = {}
+        for column, dtype in columns.items():
+            arrays = [
+                np.load(
+                    self.path / CHUNKS_DIR / chunk / f"{prefix}_{column}.npy"
+                )
+                for chunk in self.manifest["chunks"]
+            ]
+            table[column] = (
+                np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
+            )
+        return table
+
+    def load(self) -> ReflogTables:
+        """Load the tables of the store.
+
+        Returns:
+            ReflogTables: The events and halves in the store
+        """
+        return ReflogTables(
+            self._load_table("events", EVENT_COLUMNS),
+            self._load_table("halves", HALF_COLUMNS),
+            self.manifest["dictionaries"],
+        )
+
+
+def print_rows(header: Sequence[str], rows: List[tuple]):
+    print("\t".join(header))
+    for row in rows:
+        print(
+            "\t".join(
+                "%.3f" % v if isinstance(v, float) else str(v) for v in row
+            )
+        )
+
+
+QUERIES = {
+    "goals-per-minute": (
+        ("minute", "goals", "goals_per_half"),
+        ReflogTables.goals_per_minute,
+    ),
+    "lack-of-progress-rate": (
+        ("team", "events", "events_per_half"),
+        ReflogTables.lack_of_progress_rate,
+    ),
+    "penalties-per-robot": (
+        ("team", "robot", "violations"),
+        ReflogTables.penalties_per_robot,
+    ),
+}
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Ingest reflogs into a columnar store and query them."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest = subparsers.add_parser("ingest", help="ingest new events")
+    ingest.add_argument("store", type=Path)
+    ingest.add_argument("reflogs", type=Path, nargs="+")
+
+    query = subparsers.add_parser("query", help="query the store")
+    query.add_argument("store", type=Path)
+    query.add_argument("query", choices=[*QUERIES, "count"])
+    query.add_argument("--event", help="only count events of this type")
+    query.add_argument(
+        "--by",
+        default="event",
+        help="comma separated columns to group the count by",
+    )
+
+    args = parser.parse_args(argv)
+    store = ReflogStore(args.store)
+
+    if args.command == "ingest":
+        print(f"Ingested {store.ingest(args.reflogs)} events")
+        return
+
+    tables = store.load()
+    if args.query == "count":
+        by = [column for column in args.by.split(",") if column]
+        print_rows([*by, "count"], tables.count(by, args.event))
+    else:
+        header, query_function = QUERIES[args.query]
+        print_rows(header, query_function(tables))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Benchmark of the full and the headless world of a match config.
+
+The time a simulator takes to play a match is modelled as the time it takes
+to load the world (and start the controllers) plus the match time divided
+by the real-time factor of the fast mode. Both are estimated by a least
+squares fit of the wall times of matches of different lengths.
+"""
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from tournament.runner import DEFAULT_SIMULATOR, simulator_command
+from tournament.worlds import (
+    generate_world,
+    read_config_file,
+    world_params,
+    WORLDS_DIR,
+)
+
+# Lengths of the benchmarked matches, in seconds of simulated time
+MATCH_TIMES = (10, 60)
+
+
+def fit_timing(samples: Sequence[Tuple[float, float]]) -> Dict[str, float]:
+    """Estimate the load time and the real-time factor of the simulator.
+
+    Args:
+        samples (list): Pairs of the match time and the wall time it took
+
+    Returns:
+        dict: The `load_time` in seconds and the `real_time_factor`
+
+    Raises:
+        ValueError: If the matches are not of at least two lengths
+    """
+    n = len(samples)
+    mean_match = sum(m for m, _ in samples) / n
+    mean_wall = sum(w for _, w in samples) / n
+    variance = sum((m - mean_match) ** 2 for m, _ in samples)
+    if variance == 0:
+        raise ValueError("The matches need to be of different lengths")
+
+    covariance = sum((m - mean_match) * (w - mean_wall) for m, w in samples)
+    # Wall seconds per simulated second
+    slope = covariance / variance
+    return {
+        "load_time": mean_wall - slope * mean_match,
+        "real_time_factor": 1 / slope if slope > 0 else float("inf"),
+    }
+
+
+def time_match(
+    command: List[str],
+    match_time: float,
+    output_dir: Path,
+    timeout: Optional[float] = None,
+) -> float:
+    """Play a match in the automatic mode.
+
+    Returns:
+        float: Wall time of the whole run of the simulator, in seconds
+
+    Raises:
+        subprocess.CalledProcessError: If the simulator fails
+    """
+    env = {
+        **os.environ,
+        "RCJ_SIM_AUTO_MODE": "1",
+        "RCJ_SIM_MATCH_TIME": str(match_time),
+        "RCJ_SIM_OUTPUT_PATH": str(output_dir),
+    }
+    start = time.perf_counter()
+    subprocess.run(
+        command,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        timeout=timeout,
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def benchmark_world(
+    simulator: List[str],
+    world: Path,
+    match_times: Sequence[float] = MATCH_TIMES,
+    repeats: int = 3,
+    timeout: Optional[float] = None,
+) -> Dict[str, float]:
+    """Time the matches played in the world.
+
+    Returns:
+        dict: The estimated `load_time` and `real_time_factor`
+    """
+    command = simulator_command(simulator, world)
+    samples = []
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeats):
+            for match_time in match_times:
+                wall = time_match(
+                    command, match_time, Path(output_dir), timeout
+                )
+                samples.append((match_time, wall))
+    return fit_timing(samples)
+
+
+def benchmark(
+    config: dict,
+    simulator: List[str],
+    cache_dir: Path = WORLDS_DIR,
+    **kwargs,
+) -> Dict[str, Dict[str, float]]:
+    """Benchmark the full and the headless world of the match config.
+
+    Returns:
+        dict: The results of `benchmark_world` of each variant
+    """
+    params = world_params(config)
+    return {
+        variant: benchmark_world(
+            simulator,
+            generate_world(params, cache_dir=cache_dir, headless=headless),
+            **kwargs,
+        )
+        for variant, headless in (("full", False), ("headless", True))
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Compare the full and the headless world of a match."
+    )
+    parser.add_argument(
+        "config", type=Path, nargs="?", help="TOML or JSON match config"
+    )
+    parser.add_argument(
+        "--simulator",
+        default=DEFAULT_SIMULATOR,
+        help="command which starts the simulator",
+    )
+    parser.add_argument("--cache-dir", type=Path, default=WORLDS_DIR)
+    parser.add_argument(
+        "--match-times",
+        type=float,
+        nargs="+",
+        default=MATCH_TIMES,
+        help="seconds of simulated time of the benchmarked matches",
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=None)
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args(argv)
+
+    results = benchmark(
+        read_config_file(args.config) if args.config else {},
+        shlex.split(args.simulator),
+        args.cache_dir,
+        match_times=args.match_times,
+        repeats=args.repeats,
+        timeout=args.timeout,
+    )
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("world\tload time (s)\treal-time factor")
+    for variant, result in results.items():
+        print(
+            f"{variant}\t{result['load_time']:.2f}\t"
+            f"{result['real_time_factor']:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
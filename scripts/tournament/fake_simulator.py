@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Stand-in for Webots which plays a match instantly.
+
+It reads the same environment variables as the referee supervisor, writes
+a reflog with the start, the goals and the finish of the match into
+`RCJ_SIM_OUTPUT_PATH` and touches the `.done` marker next to it. The
+command line arguments (meant for Webots) are ignored.
+
+Its behavior can be changed with the following environment variables:
+
+- `FAKE_SIM_GOALS_BLUE`, `FAKE_SIM_GOALS_YELLOW`: Goals scored in the half
+- `FAKE_SIM_TEAM_GOALS`: JSON object of the goals scored in the half by the
+  teams (by their names), whichever side they play on
+- `FAKE_SIM_DURATION`: Seconds the match takes
+- `FAKE_SIM_SPEED`: If set, the match also takes `RCJ_SIM_MATCH_TIME`
+  divided by this real-time factor
+- `FAKE_SIM_HANG`: If set, never finish the match
+- `FAKE_SIM_BUSY_CONTROLLER`: If set, start a child process which keeps the
+  CPU busy, like a controller, until it gets killed
+- `FAKE_SIM_LINGER`: Seconds the process keeps running after marking the
+  match as done, as if it was finishing the recordings
+- `FAKE_SIM_CRASH_ONCE`: Path of a file, crash if it does not exist yet
+  (and create it)
+- `FAKE_SIM_AFFINITY`: If set, write the CPUs the process may run on to
+  `affinity.json` in the output directory
+- `FAKE_SIM_ARGS`: If set, write the command line arguments to `args.json`
+  in the output directory
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+MATCH_TIME = 600
+
+
+def write_event(outfile, matchtime: float, event: str, payload: dict):
+    data = {
+        "datetime": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "matchtime": matchtime,
+        "event": event,
+        "payload": payload,
+    }
+    outfile.write(json.dumps(data) + "\n")
+    outfile.flush()
+
+
+def simulate(env):
+    """Take as long as the match does."""
+    if "FAKE_SIM_BUSY_CONTROLLER" in env:
+        subprocess.Popen([sys.executable, "-c", "while True: pass"])
+    if "FAKE_SIM_HANG" in env:
+        while True:
+            time.sleep(1)
+    duration = float(env.get("FAKE_SIM_DURATION", 0))
+    if "FAKE_SIM_SPEED" in env:
+        match_time = float(env.get("RCJ_SIM_MATCH_TIME", MATCH_TIME))
+        duration += match_time / float(env["FAKE_SIM_SPEED"])
+    time.sleep(duration)
+
+
+def main():
+    env = os.environ
+    team_blue = env.get("RCJ_SIM_TEAM_BLUE_NAME", "The Blues")
+    team_yellow = env.get("RCJ_SIM_TEAM_YELLOW_NAME", "The Yellows")
+    team_blue_id = env.get("RCJ_SIM_TEAM_BLUE_ID", team_blue)
+    team_yellow_id = env.get("RCJ_SIM_TEAM_YELLOW_ID", team_yellow)
+    score_blue = int(env.get("RCJ_SIM_TEAM_B_INITIAL_SCORE") or 0)
+    score_yellow = int(env.get("RCJ_SIM_TEAM_Y_INITIAL_SCORE") or 0)
+    match_id = env.get("RCJ_SIM_MATCH_ID", "1")
+    half_id = int(env.get("RCJ_SIM_HALF_ID", 1))
+    directory = Path(env.get("RCJ_SIM_OUTPUT_PATH", "reflog"))
+    directory.mkdir(parents=True, exist_ok=True)
+
+    if "FAKE_SIM_AFFINITY" in env and hasattr(os, "sched_getaffinity"):
+        affinity = sorted(os.sched_getaffinity(0))
+        (directory / "affinity.json").write_text(json.dumps(affinity))
+
+    if "FAKE_SIM_ARGS" in env:
+        (directory / "args.json").write_text(json.dumps(sys.argv[1:]))
+
+    crash_marker = env.get("FAKE_SIM_CRASH_ONCE")
+    if crash_marker and not Path(crash_marker).exists():
+        Path(crash_marker).touch()
+        sys.exit(1)
+
+    now_str = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    blue = team_blue_id.replace(" ", "_")
+    yellow = team_yellow_id.replace(" ", "_")
+    name = f"{match_id}_-_{half_id}_-_{blue}_vs_{yellow}-{now_str}"
+    reflog_path = directory / f"{name}.jsonl"
+
+    with reflog_path.open("w") as outfile:
+        write_event(
+            outfile,
+            0.0,
+            "MATCH_START",
+            {
+                "score_yellow": score_yellow,
+                "score_blue": score_blue,
+                "total_match_time": MATCH_TIME,
+                "team_name_yellow": team_yellow,
+                "team_name_blue": team_blue,
+                "match_id": int(match_id),
+                "halftime": half_id,
+            },
+        )
+
+        simulate(env)
+
+        team_goals = json.loads(env.get("FAKE_SIM_TEAM_GOALS", "{}"))
+        # The side of each goal, a team may play against itself
+        goals = ["blue"] * (
+            int(env.get("FAKE_SIM_GOALS_BLUE", 0))
+            + team_goals.get(team_blue, 0)
+        )
+        goals += ["yellow"] * (
+            int(env.get("FAKE_SIM_GOALS_YELLOW", 0))
+            + team_goals.get(team_yellow, 0)
+        )
+        for n, side in enumerate(goals):
+            if side == "blue":
+                team = team_blue
+                score_blue += 1
+            else:
+                team = team_yellow
+                score_yellow += 1
+            write_event(
+                outfile,
+                (n + 1) * MATCH_TIME / (len(goals) + 1),
+                "GOAL",
+                {
+                    "team_name": team,
+                    "score_yellow": score_yellow,
+                    "score_blue": score_blue,
+                },
+            )
+
+        write_event(
+            outfile,
+            MATCH_TIME,
+            "MATCH_FINISH",
+            {
+                "total_match_time": MATCH_TIME,
+                "score_yellow": score_yellow,
+                "score_blue": score_blue,
+                "team_name_yellow": team_yellow,
+                "team_name_blue": team_blue,
+            },
+        )
+
+    reflog_path.with_suffix(".done").touch()
+    time.sleep(float(env.get("FAKE_SIM_LINGER", 0)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""Accuracy of the physics profiles against their speed.
+
+The same seeded scenarios (a match config played with each of the seeds) are
+played in the world of every physics profile. For each profile, the report
+gives its real-time factor and how far its outcomes diverge from the ones of
+the reference profile, so that the cheapest profile which is still accurate
+enough can be chosen.
+
+The robots are not synchronized with the simulation, so even the same
+profile does not play a seeded scenario exactly the same way twice. With
+`--baseline`, the reference profile is played again to show this noise.
+"""
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from tournament.runner import DEFAULT_SIMULATOR, simulator_command
+from tournament.scoreboard import ReflogTail
+from tournament.worlds import (
+    DEFAULT_PHYSICS,
+    generate_world,
+    is_headless,
+    PHYSICS_PROFILES,
+    read_config_file,
+    world_params,
+    WORLDS_DIR,
+)
+
+# Seconds of simulated time of each scenario
+MATCH_TIME = 120
+DEFAULT_SEEDS = (1, 2, 3, 4, 5)
+LACK_OF_PROGRESS = "LACK_OF_PROGRESS"
+
+
+def read_outcome(reflog: Path) -> Optional[Dict[str, int]]:
+    """Get the outcome of the match in the reflog.
+
+    Returns:
+        dict: The final scores and the number of lack of progress calls
+        (including the suppressed ones), None if the match did not finish
+    """
+    lack_of_progress = 0
+    for data in ReflogTail(reflog).read_events():
+        event, payload = data["event"], data["payload"]
+        if event == LACK_OF_PROGRESS:
+            lack_of_progress += 1
+        elif (
+            event == "EVENTS_SUPPRESSED"
+            and payload["event"] == LACK_OF_PROGRESS
+        ):
+            lack_of_progress += payload["count"]
+        elif event == "MATCH_FINISH":
+            return {
+                "score_blue": payload["score_blue"],
+                "score_yellow": payload["score_yellow"],
+                "lack_of_progress": lack_of_progress,
+            }
+    return None
+
+
+def play_scenario(
+    command: List[str],
+    seed: int,
+    output_dir: Path,
+    config: Optional[Path] = None,
+    match_time: int = MATCH_TIME,
+    timeout: Optional[float] = None,
+) -> dict:
+    """Play the seeded scenario in the automatic mode.
+
+    Returns:
+        dict: The outcome of the match and its `wall_time` in seconds
+
+    Raises:
+        RuntimeError: If the match did not finish
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    env = {
+        **os.environ,
+        "RCJ_SIM_AUTO_MODE": "1",
+        "RCJ_SIM_SEED": str(seed),
+        "RCJ_SIM_MATCH_TIME": str(match_time),
+        "RCJ_SIM_OUTPUT_PATH": str(output_dir),
+    }
+    if config is not None:
+        env["RCJ_SIM_CONFIG"] = str(config)
+
+    start = time.perf_counter()
+    subprocess.run(
+        command,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        timeout=timeout,
+    )
+    wall_time = time.perf_counter() - start
+
+    reflogs = sorted(output_dir.glob("*.jsonl"))
+    outcome = read_outcome(reflogs[-1]) if reflogs else None
+    if outcome is None:
+        raise RuntimeError(f"The scenario in {output_dir} did not finish")
+    return {**outcome, "wall_time": wall_time}
+
+
+def sign(value: int) -> int:
+    return (value > 0) - (value < 0)
+
+
+def compare(
+    reference: Sequence[dict],
+    outcomes: Sequence[dict],
+    match_time: int = MATCH_TIME,
+) -> Dict[str, float]:
+    """Compare the outcomes of a profile with the ones of the reference.
+
+    Args:
+        reference (list): Outcomes of the scenarios in the reference profile
+        outcomes (list): Outcomes of the same scenarios in the profile
+        match_time (float): Seconds of simulated time of each scenario
+
+    Returns:
+        dict: The `real_time_factor` of the profile (including the time it
+        takes to load the world), the mean absolute differences of the goals
+        of both teams (`goal_divergence`) and of the lack of progress calls
+        (`lack_of_progress_divergence`) and the share of the scenarios with
+        the same winner (`agreement`)
+    """
+    n = len(outcomes)
+    goals = lack_of_progress = agreement = 0
+    for expected, outcome in zip(reference, outcomes):
+        goals += abs(outcome["score_blue"] - expected["score_blue"])
+        goals += abs(outcome["score_yellow"] - expected["score_yellow"])
+        lack_of_progress += abs(
+            outcome["lack_of_progress"] - expected["lack_of_progress"]
+        )
+        agreement += sign(
+            outcome["score_blue"] - outcome["score_yellow"]
+        ) == sign(expected["score_blue"] - expected["score_yellow"])
+
+    wall_time = sum(outcome["wall_time"] for outcome in outcomes)
+    return {
+        "real_time_factor": n * match_time / wall_time,
+        "goal_divergence": goals / n,
+        "lack_of_progress_divergence": lack_of_progress / n,
+        "agreement": agreement / n,
+    }
+
+
+def evaluate_profiles(
+    simulator: List[str],
+    output_dir: Path,
+    config: Optional[Path] = None,
+    profiles: Sequence[str] = tuple(PHYSICS_PROFILES),
+    seeds: Sequence[int] = DEFAULT_SEEDS,
+    match_time: int = MATCH_TIME,
+    baseline: bool = False,
+    cache_dir: Path = WORLDS_DIR,
+    timeout: Optional[float] = None,
+) -> Dict[str, Dict[str, float]]:
+    """Play the scenarios under each profile, the first one being the
+    reference.
+
+    Returns:
+        dict: The comparison of each profile with the reference
+    """
+    match_config = read_config_file(config) if config else {}
+    params = world_params(match_config)
+    runs: List[Tuple[str, str]] = [(profile, profile) for profile in profiles]
+    if baseline:
+        runs.insert(1, (f"{profiles[0]} (again)", profiles[0]))
+
+    outcomes: Dict[str, List[dict]] = {}
+    for name, profile in runs:
+        world = generate_world(
+            params,
+            cache_dir=cache_dir,
+            headless=is_headless(match_config),
+            physics=profile,
+        )
+        command = simulator_command(simulator, world)
+        outcomes[name] = [
+            play_scenario(
+                command,
+                seed,
+                output_dir / name.replace(" ", "_") / str(seed),
+                config,
+                match_time,
+                timeout,
+            )
+            for seed in seeds
+        ]
+
+    reference = outcomes[profiles[0]]
+    return {
+        name: compare(reference, profile_outcomes, match_time)
+        for name, profile_outcomes in outcomes.items()
+    }
+
+
+def cheapest_acceptable(
+    report: Dict[str, Dict[str, float]],
+    max_goal_divergence: float,
+    min_agreement: float,
+    max_lack_of_progress_divergence: float = float("inf"),
+) -> Optional[str]:
+    """Get the quickest profile whose outcomes are close enough to the
+    reference.
+
+    Returns:
+        str: The profile, None if none of them is acceptable
+    """
+    acceptable = [
+        name
+        for name, result in report.items()
+        if result["goal_divergence"] <= max_goal_divergence
+        and result["agreement"] >= min_agreement
+        and result["lack_of_progress_divergence"]
+        <= max_lack_of_progress_divergence
+    ]
+    return max(
+        acceptable,
+        key=lambda name: report[name]["real_time_factor"],
+        default=None,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Compare the speed and the accuracy of the physics."
+    )
+    parser.add_argument("output", type=Path, help="output directory")
+    parser.add_argument("--config", type=Path, help="TOML or JSON config")
+    parser.add_argument(
+        "--simulator",
+        default=DEFAULT_SIMULATOR,
+        help="command which starts the simulator",
+    )
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        choices=list(PHYSICS_PROFILES),
+        default=list(PHYSICS_PROFILES),
+        help=f"the first one is the reference, {DEFAULT_PHYSICS} by default",
+    )
+    parser.add_argument(
+        "--seeds", type=int, nargs="+", default=list(DEFAULT_SEEDS)
+    )
+    parser.add_argument("--match-time", type=int, default=MATCH_TIME)
+    parser.add_argument(
+        "--baseline",
+        action="store_true",
+        help="play the reference profile twice",
+    )
+    parser.add_argument("--max-goal-divergence", type=float, default=0.5)
+    parser.add_argument("--min-agreement", type=float, default=0.8)
+    parser.add_argument("--cache-dir", type=Path, default=WORLDS_DIR)
+    parser.add_argument("--timeout", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    report = evaluate_profiles(
+        shlex.split(args.simulator),
+        args.output,
+        args.config,
+        args.profiles,
+        args.seeds,
+        args.match_time,
+        args.baseline,
+        args.cache_dir,
+        args.timeout,
+    )
+    args.output.mkdir(parents=True, exist_ok=True)
+    (args.output / "fidelity.json").write_text(json.dumps(report, indent=2))
+
+    print("profile\treal-time factor\tgoals\tlack of progress\tagreement")
+    for name, result in report.items():
+        print(
+            f"{name}\t{result['real_time_factor']:.1f}\t"
+            f"{result['goal_divergence']:.2f}\t"
+            f"{result['lack_of_progress_divergence']:.2f}\t"
+            f"{result['agreement']:.0%}"
+        )
+
+    # The baseline is the reference profile again
+    profiles = {
+        name: result
+        for name, result in report.items()
+        if name in PHYSICS_PROFILES
+    }
+    choice = cheapest_acceptable(
+        profiles, args.max_goal_divergence, args.min_agreement
+    )
+    print(f"cheapest acceptable profile: {choice or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,652 @@
+import argparse
+import json
+import os
+import resource
+import shlex
+import signal
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable, Dict, IO, List, Optional, Sequence
+
+from tournament.scoreboard import ReflogTail, Scoreboard, write_snapshot
+from tournament.worlds import (
+    generate_world,
+    is_headless,
+    physics_profile,
+    read_config_file,
+    world_params,
+)
+
+DEFAULT_SIMULATOR = "webots"
+# Arguments passed to the simulator, {world} and {port} are filled in
+SIMULATOR_ARGS = (
+    "--mode=fast",
+    "--no-rendering",
+    "--batch",
+    "--minimize",
+    "--stdout",
+    "--stderr",
+    "--port={port}",
+    "{world}",
+)
+DEFAULT_WORLD = Path(__file__).parents[2] / "worlds" / "soccer.wbt"
+# The first port of the simulators, every running simulator uses its own
+BASE_PORT = 1234
+PROC = Path("/proc")
+
+RESULTS_FILE = "results.json"
+
+FINISHED = "finished"
+FAILED = "failed"
+TIMEOUT = "timeout"
+SKIPPED = "skipped"
+
+
+def simulator_command(
+    simulator: List[str], world: Path, port: int = BASE_PORT
+) -> List[str]:
+    """Get the command which plays a match in the world, with the simulator
+    listening on the port."""
+    args = [arg.format(world=world, port=port) for arg in SIMULATOR_ARGS]
+    return simulator + args
+
+
+class Fixture:
+    """A half of a match to be played."""
+
+    def __init__(
+        self,
+        match_id: int,
+        team_blue: str,
+        team_yellow: str,
+        half: int = 1,
+        team_blue_id: Optional[str] = None,
+        team_yellow_id: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        config: Optional[str] = None,
+    ):
+        self.match_id = match_id
+        self.half = half
+        self.team_blue = team_blue
+        self.team_yellow = team_yellow
+        self.team_blue_id = team_blue_id or team_blue
+        self.team_yellow_id = team_yellow_id or team_yellow
+        self.env = env or {}
+        # The match config, which also sets the world the half is played in
+        self.config = Path(config).resolve() if config else None
+
+    @property
+    def name(self) -> str:
+        return f"{self.match_id}_-_{self.half}"
+
+    def environment(self, scores: Dict[str, int]) -> Dict[str, str]:
+        """Get the environment variables for the referee supervisor.
+
+        Args:
+            scores (dict): Initial scores of the `blue` and the `yellow` side,
+                carried over from the previous half
+
+        Returns:
+            dict: The environment variables
+        """
+        env = {
+            "RCJ_SIM_TEAM_BLUE_NAME": self.team_blue,
+            "RCJ_SIM_TEAM_BLUE_ID": self.team_blue_id,
+            "RCJ_SIM_TEAM_YELLOW_NAME": self.team_yellow,
+            "RCJ_SIM_TEAM_YELLOW_ID": self.team_yellow_id,
+            "RCJ_SIM_TEAM_B_INITIAL_SCORE": str(scores.get("blue", 0)),
+            "RCJ_SIM_TEAM_Y_INITIAL_SCORE": str(scores.get("yellow", 0)),
+            "RCJ_SIM_MATCH_ID": str(self.match_id),
+            "RCJ_SIM_HALF_ID": str(self.half),
+            "RCJ_SIM_AUTO_MODE": "1",
+        }
+        if self.config is not None:
+            env["RCJ_SIM_CONFIG"] = str(self.config)
+        return {**env, **self.env}
+
+
+def load_fixtures(path: Path) -> List[Fixture]:
+    """Load the fixtures from a JSON file.
+
+    The file contains a list of objects with the `match_id`, `team_blue`,
+    `team_yellow` and optionally the `half` (1 by default), the
+    `team_blue_id`, the `team_yellow_id`, the match `config` file and
+    additional `env` variables.
+
+    Args:
+        path (Path): Path of the fixtures file
+
+    Returns:
+        list: The fixtures
+    """
+    return [Fixture(**fixture) for fixture in json.loads(path.read_text())]
+
+
+def read_result(reflog: Path) -> Optional[dict]:
+    """Get the payload of the finish of the match in the reflog.
+
+    Returns:
+        dict: The payload, None if the match did not finish
+    """
+    for data in ReflogTail(reflog).read_events():
+        if data["event"] == "MATCH_FINISH":
+            return data["payload"]
+    return None
+
+
+def split_cpus(cpus: Sequence[int], workers: int) -> List[List[int]]:
+    """Split the CPUs between the workers.
+
+    Every worker gets its own CPUs if there are enough of them, otherwise
+    the CPUs are shared round-robin.
+
+    Returns:
+        list: The CPUs of each worker
+    """
+    cpus = sorted(cpus)
+    if workers >= len(cpus):
+        return [[cpus[i % len(cpus)]] for i in range(workers)]
+
+    size = len(cpus) // workers
+    groups = []
+    for i in range(workers):
+        start = i * size
+        end = start + size
+        groups.append(cpus[start:end])
+    return groups
+
+
+def children_cpu_time() -> float:
+    """Get the CPU seconds used by the reaped child processes (and the
+    processes they reaped in turn, such as the controllers)."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def process_group_cpu_time(pgid: int, proc: Path = PROC) -> float:
+    """Get the CPU seconds used by the processes of the group (and their
+    reaped children) but its leader.
+
+    The controllers get orphaned when the simulator is killed, so their CPU
+    time has to be read before, as it never adds to the one of the reaped
+    children.
+    """
+    cpu_time = 0.0
+    ticks = os.sysconf("SC_CLK_TCK")
+    for path in proc.glob("[0-9]*"):
+        try:
+            stat = (path / "stat").read_text()
+        except OSError:
+            continue
+        # The name of the executable may contain spaces and parentheses
+        start = stat.rindex(")") + 2
+        fields = stat[start:].split()
+        if int(fields[2]) != pgid or int(path.name) == pgid:
+            continue
+        # User, system and the user and system time of the reaped children
+        cpu_time += sum(int(value) for value in fields[11:15]) / ticks
+    return cpu_time
+
+
+def available_cpus() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+class MatchResult:
+    """Outcome of a fixture."""
+
+    def __init__(self, fixture: Fixture):
+        self.fixture = fixture
+        self.status = SKIPPED
+        self.attempts = 0
+        self.reflog: Optional[Path] = None
+        # Keyed by the side, a team may play against itself
+        self.scores: Dict[str, int] = {}
+        self.duration = 0.0
+        self.cpu_time = 0.0
+
+    def goal_difference(self, team: str) -> int:
+        """Get the goals of the team minus the ones of its opponent, the
+        team being the blue one if it plays on both sides."""
+        difference = self.scores["blue"] - self.scores["yellow"]
+        return difference if team == self.fixture.team_blue else -difference
+
+    def to_dict(self) -> dict:
+        return {
+            "match_id": self.fixture.match_id,
+            "half": self.fixture.half,
+            "team_blue": self.fixture.team_blue,
+            "team_yellow": self.fixture.team_yellow,
+            "status": self.status,
+            "attempts": self.attempts,
+            "reflog": str(self.reflog) if self.reflog else None,
+            "scores": self.scores,
+            "duration": round(self.duration, 3),
+            "cpu_time": round(self.cpu_time, 3),
+        }
+
+
+class Attempt:
+    """A running simulator process."""
+
+    def __init__(
+        self,
+        result: MatchResult,
+        process: subprocess.Popen,
+        output_dir: Path,
+        log: IO,
+        port: int,
+        cpus: Optional[List[int]] = None,
+    ):
+        self.result = result
+        self.process = process
+        self.output_dir = output_dir
+        self.log = log
+        self.port = port
+        self.cpus = cpus
+        self.started = time.monotonic()
+        self.timed_out = False
+        # The results to report once the simulator is reaped
+        self.reports: List[MatchResult] = []
+
+    def is_done(self) -> bool:
+        """Whether the simulator marked the simulation as over, while it
+        may still be finishing the recordings."""
+        return any(self.output_dir.glob("*.done"))
+
+
+class TournamentRunner:
+    """Play the fixtures on a bounded pool of simulator processes.
+
+    Every simulator is pinned to its own CPUs and uses its own port, and
+    every attempt gets its own output directory. The halves of a match are
+    played one after another, each starting with the scores the previous
+    one finished with, while the different matches run in parallel. A half
+    whose reflog does not reach the finish of the match (because the
+    simulator crashed or did not finish in time) is retried.
+
+    The slot of a simulator gets free as soon as it marks the simulation as
+    over (with the `.done` file next to the reflog), so that the next half
+    is played while the recordings of the previous one are finalized. The
+    simulator is reaped (or killed after the timeout) in the background, and
+    keeps its port and its CPUs until then, so that a pinned half only
+    starts once there are free CPUs for it. The result of the half is
+    reported once the simulator is reaped, with all of its CPU time.
+
+    The processes are polled from a single thread, so that they can be
+    safely pinned to the CPUs while being started.
+    """
+
+    def __init__(
+        self,
+        fixtures: List[Fixture],
+        output_dir: Path,
+        simulator: Sequence[str] = (DEFAULT_SIMULATOR,),
+        world: Path = DEFAULT_WORLD,
+        workers: int = 1,
+        timeout: float = 3600,
+        retries: int = 1,
+        pin_cpus: bool = True,
+        poll_interval: float = 0.5,
+        on_result: Optional[Callable[[MatchResult], None]] = None,
+        next_fixtures: Optional[Callable[[], List[Fixture]]] = None,
+    ):
+        """
+        Args:
+            fixtures (list): The halves to be played
+            output_dir (Path): Directory the outputs are written to
+            simulator (list): Command which starts the simulator
+            world (Path): World the matches are played in
+            workers (int): Number of matches played at the same time
+            timeout (float): Seconds after which a simulator gets killed
+            retries (int): Number of times a failed half is played again
+            pin_cpus (bool): Whether to pin the simulators to the CPUs
+            poll_interval (float): Seconds between polling the processes
+            on_result (callable, optional): Called with the result of every
+                half which is done
+            next_fixtures (callable, optional): Called for more fixtures
+                whenever a worker is free and nothing is queued, the run is
+                over once nothing is being played and it returns none
+        """
+        self.output_dir = output_dir.resolve()
+        self.simulator = list(simulator)
+        self.world = world.resolve()
+        self.workers = workers
+        self.timeout = timeout
+        self.retries = retries
+        self.poll_interval = poll_interval
+        self.on_result = on_result
+        self.next_fixtures = next_fixtures
+
+        # The CPUs which are not used by any simulator, if they are pinned
+        self.free_cpus: Optional[List[List[int]]] = None
+        if pin_cpus and hasattr(os, "sched_setaffinity"):
+            self.free_cpus = split_cpus(available_cpus(), workers)
+
+        self.results: List[MatchResult] = []
+        # The halves of each match, in the order they are played
+        self.matches: Dict[int, List[MatchResult]] = {}
+        self.queue: List[MatchResult] = []
+        self.add(fixtures)
+        self.running: Dict[int, Attempt] = {}
+        # The simulators which are over but still finishing the recordings
+        self.reaping: List[Attempt] = []
+        # The generated world of each match config
+        self.worlds: Dict[Path, Path] = {}
+
+    def add(self, fixtures: List[Fixture]):
+        """Queue the fixtures of new matches."""
+        results = [MatchResult(fixture) for fixture in fixtures]
+        self.results += results
+        new_matches = []
+        for result in results:
+            match_id = result.fixture.match_id
+            if match_id not in self.matches:
+                new_matches.append(match_id)
+            self.matches.setdefault(match_id, []).append(result)
+        for match_id in new_matches:
+            halves = self.matches[match_id]
+            halves.sort(key=lambda result: result.fixture.half)
+            self.queue.append(halves[0])
+
+    def world_of(self, fixture: Fixture) -> Path:
+        """Get the world of the fixture, generating it from its config if
+        it is not generated yet."""
+        if fixture.config is None:
+            return self.world
+        if fixture.config not in self.worlds:
+            config = read_config_file(fixture.config)
+            self.worlds[fixture.config] = generate_world(
+                world_params(config),
+                cache_dir=self.world.parent,
+                headless=is_headless(config),
+                physics=physics_profile(config),
+            )
+        return self.worlds[fixture.config]
+
+    def command(self, port: int, world: Path) -> List[str]:
+        return simulator_command(self.simulator, world, port)
+
+    def free_port(self) -> int:
+        """Get the first port which no simulator uses."""
+        used = {a.port for a in [*self.running.values(), *self.reaping]}
+        port = BASE_PORT
+        while port in used:
+            port += 1
+        return port
+
+    def can_start(self) -> bool:
+        return self.free_cpus is None or bool(self.free_cpus)
+
+    def start(self, slot: int, result: MatchResult):
+        """Start an attempt to play the half in the worker slot."""
+        fixture = result.fixture
+        result.attempts += 1
+        output_dir = self.output_dir / fixture.name / f"{result.attempts}"
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        scores = self.previous_scores(result)
+        env = {
+            **os.environ,
+            **fixture.environment(scores),
+            "RCJ_SIM_OUTPUT_PATH": str(output_dir),
+        }
+
+        port = self.free_port()
+        cpus = self.free_cpus.pop(0) if self.free_cpus is not None else None
+
+        def pin():
+            if cpus is not None:
+                os.sched_setaffinity(0, cpus)
+
+        log = open(output_dir / "simulator.log", "wb")
+        process = subprocess.Popen(
+            self.command(port, self.world_of(fixture)),
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            # The simulator starts the controllers as its children, they are
+            # killed together with it
+            start_new_session=True,
+            preexec_fn=pin,
+        )
+        self.running[slot] = Attempt(
+            result, process, output_dir, log, port, cpus
+        )
+
+    def previous_scores(self, result: MatchResult) -> Dict[str, int]:
+        """Get the scores of the sides of the half from the previous one."""
+        halves = self.matches[result.fixture.match_id]
+        index = halves.index(result)
+        if not index:
+            return {}
+        fixture, previous = result.fixture, halves[index - 1]
+        # The teams swap the sides between the halves, unless the previous
+        # half tells otherwise
+        if (
+            previous.fixture.team_blue_id == fixture.team_blue_id
+            and fixture.team_blue_id != fixture.team_yellow_id
+        ):
+            return previous.scores
+        return {
+            "blue": previous.scores.get("yellow", 0),
+            "yellow": previous.scores.get("blue", 0),
+        }
+
+    def kill(self, attempt: Attempt):
+        pgid = attempt.process.pid
+        attempt.result.cpu_time += process_group_cpu_time(pgid)
+        try:
+            os.killpg(attempt.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        attempt.process.wait()
+
+    def reap(self, attempt: Attempt) -> bool:
+        """Reap the simulator if it exited, killing it after the timeout.
+
+        Returns:
+            bool: Whether the simulator is gone
+        """
+        # Only the process being reaped adds to the CPU time of the children
+        cpu_time = children_cpu_time()
+        if attempt.process.poll() is None:
+            if time.monotonic() - attempt.started <= self.timeout:
+                return False
+            attempt.timed_out = True
+            self.kill(attempt)
+        attempt.result.cpu_time += children_cpu_time() - cpu_time
+        attempt.log.close()
+        if attempt.cpus is not None:
+            self.free_cpus.append(attempt.cpus)
+        for result in attempt.reports:
+            self.report(result)
+        return True
+
+    def check(self, slot: int) -> bool:
+        """Check whether the attempt in the slot is over.
+
+        Returns:
+            bool: Whether the slot got free
+        """
+        attempt = self.running[slot]
+        reaped = self.reap(attempt)
+        if not reaped and not attempt.is_done():
+            return False
+
+        del self.running[slot]
+        attempt.reports = self.finish(attempt, attempt.timed_out)
+        if reaped:
+            for result in attempt.reports:
+                self.report(result)
+        else:
+            self.reaping.append(attempt)
+        return True
+
+    def finish(self, attempt: Attempt, timed_out: bool) -> List[MatchResult]:
+        """Get the outcome of the attempt and queue what is played next.
+
+        Returns:
+            list: The results to report once the simulator is reaped
+        """
+        result = attempt.result
+        result.duration += time.monotonic() - attempt.started
+
+        # The match counts as played once it finished, even if the simulator
+        # did not manage to quit (e.g. while processing the recordings)
+        for reflog in sorted(attempt.output_dir.glob("*.jsonl")):
+            payload = read_result(reflog)
+            if payload is not None:
+                result.status = FINISHED
+                result.reflog = reflog
+                result.scores = {
+                    "blue": payload["score_blue"],
+                    "yellow": payload["score_yellow"],
+                }
+                break
+        else:
+            result.status = TIMEOUT if timed_out else FAILED
+
+        if result.status != FINISHED and result.attempts <= self.retries:
+            self.queue.insert(0, result)
+            return []
+
+        halves = self.matches[result.fixture.match_id]
+        start = halves.index(result) + 1
+        following = halves[start:]
+        if result.status == FINISHED and following:
+            self.queue.insert(0, following[0])
+            return [result]
+        return [result, *following]
+
+    def report(self, result: MatchResult):
+        if self.on_result is not None:
+            self.on_result(result)
+
+    def poll_slot(self, slot: int):
+        """Start the next half in the slot if it is free."""
+        if slot in self.running and not self.check(slot):
+            return
+        if not self.can_start():
+            return
+        if not self.queue and self.next_fixtures is not None:
+            self.add(self.next_fixtures())
+        if self.queue:
+            self.start(slot, self.queue.pop(0))
+
+    def run(self) -> List[MatchResult]:
+        """Play all of the fixtures.
+
+        Returns:
+            list: The results, in the order of the fixtures
+        """
+        try:
+            while True:
+                self.reaping = [a for a in self.reaping if not self.reap(a)]
+                for slot in range(self.workers):
+                    self.poll_slot(slot)
+                if not (self.queue or self.running or self.reaping):
+                    break
+                time.sleep(self.poll_interval)
+        finally:
+            for attempt in [*self.running.values(), *self.reaping]:
+                self.kill(attempt)
+                attempt.log.close()
+
+        return self.results
+
+
+def write_results(output_dir: Path, results: List[MatchResult]) -> dict:
+    """Write the results and the standings of the finished matches.
+
+    Returns:
+        dict: The written results
+    """
+    scoreboard = Scoreboard()
+    ordered = sorted(
+        results, key=lambda r: (str(r.fixture.match_id), r.fixture.half)
+    )
+    for result in ordered:
+        if result.reflog is not None:
+            scoreboard.update(result.reflog)
+
+    summary = {
+        "fixtures": [result.to_dict() for result in results],
+        "standings": scoreboard.snapshot()["standings"],
+    }
+    output_dir.mkdir(parents=True, exist_ok=True)
+    write_snapshot(output_dir / RESULTS_FILE, summary)
+    return summary
+
+
+def print_result(result: MatchResult):
+    fixture = result.fixture
+    scores = " ".join(
+        f"{team}={result.scores[side]}"
+        for team, side in (
+            (fixture.team_blue, "blue"),
+            (fixture.team_yellow, "yellow"),
+        )
+        if side in result.scores
+    )
+    print(
+        f"{fixture.name}\t{fixture.team_blue} vs {fixture.team_yellow}\t"
+        f"{result.status}\t{result.attempts} attempt(s)\t{scores}"
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Play the fixtures on parallel headless simulators."
+    )
+    parser.add_argument("fixtures", type=Path, help="JSON fixtures file")
+    parser.add_argument("output", type=Path, help="output directory")
+    parser.add_argument(
+        "--simulator",
+        default=DEFAULT_SIMULATOR,
+        help="command which starts the simulator",
+    )
+    parser.add_argument("--world", type=Path, default=DEFAULT_WORLD)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(len(available_cpus()) // 2, 1),
+        help="matches played at the same time",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=3600,
+        help="seconds after which a simulator gets killed",
+    )
+    parser.add_argument(
+        "--retries", type=int, default=1, help="retries of a failed half"
+    )
+    parser.add_argument(
+        "--no-pinning",
+        action="store_true",
+        help="do not pin the workers to the CPUs",
+    )
+    args = parser.parse_args(argv)
+
+    runner = TournamentRunner(
+        load_fixtures(args.fixtures),
+        args.output,
+        shlex.split(args.simulator),
+        args.world,
+        args.workers,
+        args.timeout,
+        args.retries,
+        pin_cpus=not args.no_pinning,
+        on_result=print_result,
+    )
+    results = runner.run()
+    write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+watchdog_installed = False
+try:
+    from watchdog.events import PatternMatchingEventHandler
+    from watchdog.observers import Observer
+
+    watchdog_installed = True
+except Exception:
+    print(
+        "Watchdog module not installed, falling back to polling the"
+        " reflogs. To enable, run 'pip install watchdog'"
+    )
+
+POINTS_WIN = 3
+POINTS_DRAW = 1
+
+
+class ReflogTail:
+    """Read the complete lines appended to a reflog since the last read."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.offset = 0
+
+    def read_events(self) -> List[dict]:
+        """Read the new events.
+
+        Only the bytes appended since the last read are parsed. An incomplete
+        line at the end of the file is left for the next read. A file which
+        got shorter than what was already read is read from its start again.
+
+        Returns:
+            list: The new events
+        """
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return []
+
+        # The reflog was truncated or replaced by a new one
+        if size < self.offset:
+            self.offset = 0
+        if size == self.offset:
+            return []
+
+        with self.path.open("rb") as infile:
+            infile.seek(self.offset)
+            data = infile.read(size - self.offset)
+
+        end = data.rfind(b"\n") + 1
+        self.offset += end
+        return [json.loads(line) for line in data[:end].splitlines() if line]
+
+
+class MatchState:
+    """Live state of a single match."""
+
+    def __init__(self, match_id: str):
+        self.match_id = match_id
+        self.half = 0
+        self.team_blue: Optional[str] = None
+        self.team_yellow: Optional[str] = None
+        # Keyed by the side, a team may play against itself
+        self.scores: Dict[str, int] = {}
+        self.matchtime = 0.0
+        self.finished = False
+
+    def set_scores(self, payload: dict):
+        self.scores = {
+            "blue": payload["score_blue"],
+            "yellow": payload["score_yellow"],
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "match_id": self.match_id,
+            "half": self.half,
+            "team_blue": self.team_blue,
+            "team_yellow": self.team_yellow,
+            "scores": self.scores,
+            "matchtime": self.matchtime,
+            "finished": self.finished,
+        }
+
+
+def new_standing() -> dict:
+    return {
+        "played": 0,
+        "won": 0,
+        "drawn": 0,
+        "lost": 0,
+        "goals_for": 0,
+        "goals_against": 0,
+        "points": 0,
+    }
+
+
+class Scoreboard:
+    """Standings and live match states, updated from the events appended to
+    the reflogs.
+
+    The standings only count the matches whose latest half is finished. Every
+    update only adds or removes the result of the affected match.
+    """
+
+    def __init__(self):
+        self.tails: Dict[Path, ReflogTail] = {}
+        # The match each reflog belongs to
+        self.file_matches: Dict[Path, str] = {}
+        self.matches: Dict[str, MatchState] = {}
+        self.standings: Dict[str, dict] = {}
+
+    def update(self, path: Path) -> bool:
+        """Apply the events appended to the reflog since the last update.
+
+        Args:
+            path (Path): Path of the reflog
+
+        Returns:
+            bool: Whether there were any new events
+        """
+        if path not in self.tails:
+            self.tails[path] = ReflogTail(path)
+
+        events = self.tails[path].read_events()
+        for data in events:
+            self.apply(path, data)
+        return bool(events)
+
+    def _count_result(self, match: MatchState, sign: int):
+        """Add (sign=1) or remove (sign=-1) the result of the match from the
+        standings."""
+        blue, yellow = match.scores["blue"], match.scores["yellow"]
+        for team, goals_for, goals_against in (
+            (match.team_blue, blue, yellow),
+            (match.team_yellow, yellow, blue),
+        ):
+            standing = self.standings.setdefault(team, new_standing())
+            standing["played"] += sign
+            standing["goals_for"] += sign * goals_for
+            standing["goals_against"] += sign * goals_against
+            if goals_for > goals_against:
+                standing["won"] += sign
+                standing["points"] += sign * POINTS_WIN
+            elif goals_for == goals_against:
+                standing["drawn"] += sign
+                standing["points"] += sign * POINTS_DRAW
+            else:
+                standing["lost"] += sign
+
+    def apply(self, path: Path, data: dict):
+        """Apply a single event of the reflog.
+
+        Args:
+            path (Path): Path of the reflog
+            data (dict): The event
+        """
+        event = data["event"]
+        payload = data.get("payload") or {}
+
+        if event == "MATCH_START":
+            match_id = str(payload["match_id"])
+            self.file_matches[path] = match_id
+            match = self.matches.setdefault(match_id, MatchState(match_id))
+            if match.finished:
+                self._count_result(match, -1)
+                match.finished = False
+
+            match.half = payload["halftime"]
+            match.team_blue = payload["team_name_blue"]
+            match.team_yellow = payload["team_name_yellow"]
+            match.set_scores(payload)
+
+        # Events of a reflog without the start of the match are ignored
+        if path not in self.file_matches:
+            return
+
+        match = self.matches[self.file_matches[path]]
+        match.matchtime = data["matchtime"]
+
+        if event == "GOAL":
+            match.set_scores(payload)
+        elif event == "MATCH_FINISH" and not match.finished:
+            match.set_scores(payload)
+            match.finished = True
+            self._count_result(match, 1)
+
+    def snapshot(self) -> dict:
+        """Get the current standings and states of the matches.
+
+        Returns:
+            dict: The standings ordered by points, goal difference and goals
+            scored, and the states of the matches
+        """
+        standings = sorted(
+            ({"team": team, **s} for team, s in self.standings.items()),
+            key=lambda s: (
+                -s["points"],
+                s["goals_against"] - s["goals_for"],
+                -s["goals_for"],
+                s["team"],
+            ),
+        )
+        return {
+            "standings": standings,
+            "matches": [match.to_dict() for match in self.matches.values()],
+        }
+
+
+def write_snapshot(path: Path, snapshot: dict):
+    """Atomically replace the file with the snapshot."""
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(json.dumps(snapshot, indent=2))
+    os.replace(tmp_path, path)
+
+
+class SnapshotRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.sendall(self.server.snapshot)
+
+
+class SnapshotServer(socketserver.ThreadingTCPServer):
+    """Local server sending the latest snapshot as JSON to every client."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int):
+        super().__init__(("127.0.0.1", port), SnapshotRequestHandler)
+        self.snapshot = b"{}"
+
+    def publish(self, snapshot: dict):
+        self.snapshot = json.dumps(snapshot).encode("utf8")
+
+
+class ReflogWatcher:
+    """Report the reflogs which might have changed.
+
+    Uses filesystem notifications if watchdog is installed, otherwise (and
+    also as a safety net for missed notifications) the reflogs are polled
+    every `poll_interval` seconds.
+    """
+
+    def __init__(self, directory: Path, poll_interval: float = 1.0):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.changed: "queue.Queue[Path]" = queue.Queue()
+        self.observer = None
+
+    def start(self):
+        if not watchdog_installed:
+            return
+
+        def on_any_event(event):
+            self.changed.put(Path(event.src_path))
+
+        event_handler = PatternMatchingEventHandler(
+            patterns=["*.jsonl"], ignore_patterns=[], ignore_directories=True
+        )
+        event_handler.on_any_event = on_any_event
+
+        self.observer = Observer()
+        self.observer.schedule(event_handler, str(self.directory))
+        self.observer.start()
+
+    def stop(self):
+        if self.observer is not None:
+            self.observer.stop()
+
+    def wait(self) -> List[Path]:
+        """Wait for changes.
+
+        Returns:
+            list: Paths of the reflogs which might have changed
+        """
+        try:
+            paths = {self.changed.get(timeout=self.poll_interval)}
+        except queue.Empty:
+            return sorted(self.directory.glob("*.jsonl"))
+
+        while not self.changed.empty():
+            paths.add(self.changed.get_nowait())
+        return sorted(paths)
+
+
+def follow(
+    directory: Path,
+    output: Optional[Path] = None,
+    server: Optional[SnapshotServer] = None,
+    poll_interval: float = 1.0,
+    stop: Optional[threading.Event] = None,
+) -> Scoreboard:
+    """Follow the reflogs in the directory and publish the scoreboard every
+    time it changes.
+
+    Args:
+        directory (Path): Directory with the reflogs
+        output (Path, optional): File to write the snapshot to
+        server (SnapshotServer, optional): Server to publish the snapshot to
+        poll_interval (float): Seconds between polling the reflogs
+        stop (threading.Event, optional): Event which stops the following
+
+    Returns:
+        Scoreboard: The scoreboard after the following stopped
+    """
+    stop = stop or threading.Event()
+    scoreboard = Scoreboard()
+    watcher = ReflogWatcher(directory, poll_interval)
+    watcher.start()
+
+    paths = sorted(directory.glob("*.jsonl"))
+    try:
+        while not stop.is_set():
+            changed = [path for path in paths if scoreboard.update(path)]
+            if changed:
+                snapshot = scoreboard.snapshot()
+                if output is not None:
+                    write_snapshot(output, snapshot)
+                if server is not None:
+                    server.publish(snapshot)
+            paths = watcher.wait()
+    finally:
+        watcher.stop()
+
+    return scoreboard
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Follow the reflogs and publish the live scoreboard."
+    )
+    parser.add_argument("directory", type=Path, help="directory of reflogs")
+    parser.add_argument("--output", type=Path, help="file to write to")
+    parser.add_argument("--port", type=int, help="local port to serve on")
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=1.0,
+        help="seconds between polling the reflogs",
+    )
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.port is not None:
+        server = SnapshotServer(args.port)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        follow(args.directory, args.output, server, args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
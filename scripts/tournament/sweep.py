@@ -0,0 +1,469 @@
+"""Parameter sweep of the constants of the sample team.
+
+Every candidate set of constants (the dead band of `utils.get_direction`,
+the forward and the turning speed, see `DEFAULT_PARAMS` in the `utils.py` of
+the teams) plays a match of two halves against the defaults for each seed,
+once on each side, passed to the robots in `RCJ_TEAM_PARAMS_B` and
+`RCJ_TEAM_PARAMS_Y`. The matches of a batch of candidates are played in
+parallel headless simulators. The candidates are ranked by the goals they
+scored more than the defaults per CPU-minute their matches took, or by their
+goal difference per match (`rank_key="score"`), the ones ranked the same by
+the CPU-minutes.
+
+The candidates are drawn either at random or by a cross-entropy method,
+which keeps a mean and a spread for each constant and moves them towards the
+best candidates of every batch (a CMA-ES with a diagonal covariance matrix).
+Both stop early once `patience` batches in a row brought no better
+candidate.
+"""
+import argparse
+import json
+import random
+import shlex
+import statistics
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from tournament.runner import (
+    available_cpus,
+    DEFAULT_SIMULATOR,
+    FINISHED,
+    Fixture,
+    MatchResult,
+    TournamentRunner,
+)
+from tournament.worlds import (
+    DEFAULT_PHYSICS,
+    generate_world,
+    PHYSICS_PROFILES,
+    world_params,
+    WORLDS_DIR,
+)
+
+# Default, lowest and highest value of each constant
+PARAMETERS: Dict[str, Tuple[float, float, float]] = {
+    "dead_band": (0.13, 0.02, 0.4),
+    # The motors of the robots go up to 10 rad/s
+    "forward_speed": (7, 2, 10),
+    "turn_speed": (4, 1, 10),
+}
+DEFAULTS = {name: default for name, (default, _, _) in PARAMETERS.items()}
+
+CANDIDATE = "candidate"
+BASELINE = "baseline"
+# Seconds of simulated time of each half
+MATCH_TIME = 120
+DEFAULT_SEEDS = (1, 2)
+RESULTS_FILE = "sweep.json"
+# Keys of the summaries the candidates can be ranked by
+RANK_KEYS = ("goals_per_cpu_minute", "score")
+DEFAULT_RANK_KEY = "goals_per_cpu_minute"
+
+Evaluate = Callable[[List[Dict[str, float]]], List[dict]]
+
+
+def params_env(params: Dict[str, float], team: str) -> Dict[str, str]:
+    return {f"RCJ_TEAM_PARAMS_{team}": json.dumps(params)}
+
+
+def candidate_fixtures(
+    params: Dict[str, float],
+    first_match_id: int,
+    seeds: Sequence[int],
+    match_time: int = MATCH_TIME,
+) -> List[Fixture]:
+    """Get the halves the candidate plays against the defaults.
+
+    Returns:
+        list: Two halves for each seed, the candidate being blue in the
+        first and yellow in the second one
+    """
+    fixtures = []
+    for n, seed in enumerate(seeds):
+        match_id = first_match_id + n
+        env = {
+            "RCJ_SIM_SEED": str(seed),
+            "RCJ_SIM_MATCH_TIME": str(match_time),
+            "RCJ_SIM_HEADLESS": "1",
+        }
+        fixtures.append(
+            Fixture(
+                match_id,
+                CANDIDATE,
+                BASELINE,
+                half=1,
+                env={**env, **params_env(params, "B")},
+            )
+        )
+        fixtures.append(
+            Fixture(
+                match_id,
+                BASELINE,
+                CANDIDATE,
+                half=2,
+                env={**env, **params_env(params, "Y")},
+            )
+        )
+    return fixtures
+
+
+def summarize(params: Dict[str, float], results: List[MatchResult]) -> dict:
+    """Get the outcome of the matches of the candidate.
+
+    Only the matches whose last half finished count towards the goal
+    difference, while the CPU time of all of the halves counts.
+
+    Returns:
+        dict: The `params`, the number of finished `matches`, the
+        `goal_difference`, the `cpu_minutes`, the `score` (the goal
+        difference per match, None if no match finished) and the
+        `goals_per_cpu_minute`
+    """
+    goal_difference = matches = 0
+    last_halves: Dict[int, MatchResult] = {}
+    for result in results:
+        last = last_halves.get(result.fixture.match_id)
+        if last is None or result.fixture.half > last.fixture.half:
+            last_halves[result.fixture.match_id] = result
+    for result in last_halves.values():
+        if result.status == FINISHED:
+            matches += 1
+            goal_difference += result.goal_difference(CANDIDATE)
+
+    cpu_minutes = sum(result.cpu_time for result in results) / 60
+    return {
+        "params": params,
+        "matches": matches,
+        "goal_difference": goal_difference,
+        "cpu_minutes": cpu_minutes,
+        "score": goal_difference / matches if matches else None,
+        # Guards against a CPU time too short to be measured
+        "goals_per_cpu_minute": goal_difference / max(cpu_minutes, 1e-6),
+    }
+
+
+class MatchEvaluator:
+    """Play the matches of the batches of candidates.
+
+    Args:
+        output_dir (Path): Directory the batches are played in
+        simulator (list): Command which starts the simulator
+        world (Path): World the matches are played in
+        seeds (list): Seed of each match a candidate plays
+        match_time (int): Seconds of simulated time of each half
+        **runner_args: Passed to the `TournamentRunner`
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        simulator: Sequence[str],
+        world: Path,
+        seeds: Sequence[int] = DEFAULT_SEEDS,
+        match_time: int = MATCH_TIME,
+        **runner_args,
+    ):
+        self.output_dir = output_dir
+        self.simulator = simulator
+        self.world = world
+        self.seeds = seeds
+        self.match_time = match_time
+        self.runner_args = runner_args
+        self.batches = 0
+        self.next_match_id = 1
+
+    def __call__(self, batch: List[Dict[str, float]]) -> List[dict]:
+        self.batches += 1
+        fixtures: List[List[Fixture]] = []
+        for params in batch:
+            # The match IDs are unique within the whole sweep
+            fixtures.append(
+                candidate_fixtures(
+                    params, self.next_match_id, self.seeds, self.match_time
+                )
+            )
+            self.next_match_id += len(self.seeds)
+
+        runner = TournamentRunner(
+            [fixture for halves in fixtures for fixture in halves],
+            self.output_dir / f"batch-{self.batches}",
+            self.simulator,
+            self.world,
+            **self.runner_args,
+        )
+        results = runner.run()
+        summaries = []
+        start = 0
+        for params, halves in zip(batch, fixtures):
+            end = start + len(halves)
+            summaries.append(summarize(params, results[start:end]))
+            start = end
+        return summaries
+
+
+def rank_value(result: dict, key: str) -> Optional[float]:
+    """Get the value the candidate is ranked by, None if none of its
+    matches finished."""
+    return None if result["score"] is None else result[key]
+
+
+def rank(results: List[dict], key: str = DEFAULT_RANK_KEY) -> List[dict]:
+    """Sort the candidates from the best value of the `key`, the cheaper one
+    first if the values are the same and the ones without a finished match
+    last.
+
+    Dividing a negative goal difference by the CPU-minutes favours the slow
+    candidates among the losing ones, which the `score` key avoids.
+    """
+
+    def sort_key(result: dict) -> Tuple[bool, float, float]:
+        value = rank_value(result, key)
+        return value is not None, value or 0, -result["cpu_minutes"]
+
+    return sorted(results, key=sort_key, reverse=True)
+
+
+def best_score(
+    results: List[dict], key: str = DEFAULT_RANK_KEY
+) -> Optional[float]:
+    values = [rank_value(r, key) for r in results]
+    return max((v for v in values if v is not None), default=None)
+
+
+def to_params(point: Sequence[float]) -> Dict[str, float]:
+    """Map a point of the unit cube to the values of the constants."""
+    params = {}
+    for (name, (_, low, high)), x in zip(PARAMETERS.items(), point):
+        x = min(max(x, 0.0), 1.0)
+        params[name] = round(low + x * (high - low), 4)
+    return params
+
+
+def to_point(params: Dict[str, float]) -> List[float]:
+    return [
+        (params[name] - low) / (high - low)
+        for name, (_, low, high) in PARAMETERS.items()
+    ]
+
+
+class EarlyStopping:
+    """Count the batches in a row which brought no better score."""
+
+    def __init__(self, patience: int, key: str = DEFAULT_RANK_KEY):
+        self.patience = patience
+        self.key = key
+        self.best: Optional[float] = None
+        self.stale = 0
+
+    def update(self, results: List[dict]) -> bool:
+        """Check the results after another batch.
+
+        Returns:
+            bool: Whether the search should stop
+        """
+        score = best_score(results, self.key)
+        if score is not None and (self.best is None or score > self.best):
+            self.best = score
+            self.stale = 0
+        else:
+            self.stale += 1
+        return self.stale >= self.patience
+
+
+def random_search(
+    evaluate: Evaluate,
+    budget: int,
+    batch_size: int,
+    patience: int = 3,
+    rng: Optional[random.Random] = None,
+    rank_key: str = DEFAULT_RANK_KEY,
+) -> List[dict]:
+    """Evaluate random candidates, the defaults being the first one.
+
+    Args:
+        evaluate (callable): Plays a batch of candidates and returns their
+            summaries
+        budget (int): Maximum number of candidates
+        batch_size (int): Candidates evaluated in parallel
+        patience (int): Batches without a better candidate to stop after
+        rank_key (str): Key of the summaries the candidates are ranked by
+
+    Returns:
+        list: The ranked summaries of the candidates
+    """
+    rng = rng or random.Random()
+    stopping = EarlyStopping(patience, rank_key)
+    results: List[dict] = []
+    while len(results) < budget:
+        size = min(batch_size, budget - len(results))
+        batch = [
+            to_params([rng.random() for _ in PARAMETERS]) for _ in range(size)
+        ]
+        if not results:
+            batch[0] = dict(DEFAULTS)
+        results += evaluate(batch)
+        if stopping.update(results):
+            break
+    return rank(results, rank_key)
+
+
+def cma_search(
+    evaluate: Evaluate,
+    budget: int,
+    batch_size: int,
+    patience: int = 3,
+    rng: Optional[random.Random] = None,
+    sigma: float = 0.3,
+    min_sigma: float = 0.02,
+    rank_key: str = DEFAULT_RANK_KEY,
+) -> List[dict]:
+    """Refine the candidates by the cross-entropy method, starting around
+    the defaults.
+
+    Every batch is drawn from a normal distribution of each constant (scaled
+    to its range). The mean and the spread of the next batch are the ones of
+    the best half of the candidates so far.
+
+    Args:
+        evaluate (callable): Plays a batch of candidates and returns their
+            summaries
+        budget (int): Maximum number of candidates
+        batch_size (int): Candidates evaluated in parallel
+        patience (int): Batches without a better candidate to stop after
+        sigma (float): Initial spread of each constant
+        min_sigma (float): Spread of every constant to stop at
+        rank_key (str): Key of the summaries the candidates are ranked by
+
+    Returns:
+        list: The ranked summaries of the candidates
+    """
+    rng = rng or random.Random()
+    stopping = EarlyStopping(patience, rank_key)
+    mean = to_point(DEFAULTS)
+    sigmas = [sigma] * len(mean)
+    elite_size = max(batch_size // 2, 2)
+    results: List[dict] = []
+    while len(results) < budget and max(sigmas) >= min_sigma:
+        size = min(batch_size, budget - len(results))
+        batch = [
+            to_params([rng.gauss(m, s) for m, s in zip(mean, sigmas)])
+            for _ in range(size)
+        ]
+        results += evaluate(batch)
+        if stopping.update(results):
+            break
+
+        elite = [
+            to_point(r["params"])
+            for r in rank(results, rank_key)[:elite_size]
+            if rank_value(r, rank_key) is not None
+        ]
+        if len(elite) < 2:
+            continue
+        columns = list(zip(*elite))
+        mean = [statistics.mean(column) for column in columns]
+        sigmas = [statistics.pstdev(column) for column in columns]
+    return rank(results, rank_key)
+
+
+SEARCHES = {"random": random_search, "cma": cma_search}
+
+
+def write_results(output_dir: Path, results: List[dict]):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / RESULTS_FILE).write_text(json.dumps(results, indent=2))
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Tune the constants of the sample team."
+    )
+    parser.add_argument("output", type=Path, help="output directory")
+    parser.add_argument(
+        "--simulator",
+        default=DEFAULT_SIMULATOR,
+        help="command which starts the simulator",
+    )
+    parser.add_argument("--search", choices=list(SEARCHES), default="cma")
+    parser.add_argument(
+        "--rank-by",
+        choices=RANK_KEYS,
+        default=DEFAULT_RANK_KEY,
+        help="ranks by the goal difference per CPU-minute or per match"
+        " (score)",
+    )
+    parser.add_argument(
+        "--budget", type=int, default=40, help="maximum candidates"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=max(len(available_cpus()) // 2, 2),
+        help="candidates evaluated in parallel",
+    )
+    parser.add_argument(
+        "--patience",
+        type=int,
+        default=3,
+        help="batches without a better candidate to stop after",
+    )
+    parser.add_argument(
+        "--seeds", type=int, nargs="+", default=list(DEFAULT_SEEDS)
+    )
+    parser.add_argument("--match-time", type=int, default=MATCH_TIME)
+    parser.add_argument(
+        "--physics", choices=list(PHYSICS_PROFILES), default=DEFAULT_PHYSICS
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(len(available_cpus()) // 2, 1),
+        help="matches played at the same time",
+    )
+    parser.add_argument("--timeout", type=float, default=3600)
+    parser.add_argument("--cache-dir", type=Path, default=WORLDS_DIR)
+    parser.add_argument("--random-seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    world = generate_world(
+        world_params({}),
+        cache_dir=args.cache_dir,
+        headless=True,
+        physics=args.physics,
+    )
+    evaluate = MatchEvaluator(
+        args.output,
+        shlex.split(args.simulator),
+        world,
+        args.seeds,
+        args.match_time,
+        workers=args.workers,
+        timeout=args.timeout,
+    )
+    results = SEARCHES[args.search](
+        evaluate,
+        args.budget,
+        args.batch_size,
+        args.patience,
+        random.Random(args.random_seed),
+        rank_key=args.rank_by,
+    )
+    write_results(args.output, results)
+
+    print(
+        "goals per match\tgoal difference\tCPU minutes\t"
+        "goals per CPU minute\tmatches\tparams"
+    )
+    for result in results:
+        score = result["score"]
+        print(
+            f"{'-' if score is None else f'{score:.2f}'}\t"
+            f"{result['goal_difference']}\t"
+            f"{result['cpu_minutes']:.2f}\t"
+            f"{result['goals_per_cpu_minute']:.2f}\t{result['matches']}\t"
+            f"{json.dumps(result['params'])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from tournament import fake_simulator
+from tournament.adaptive import (
+    AdaptiveScheduler,
+    main,
+    RESULTS_FILE,
+    SequentialTest,
+    side_config,
+)
+
+FAKE_SIMULATOR = [sys.executable, fake_simulator.__file__]
+TEAMS = {"A": "team_a", "B": "team_b", "C": "team_c"}
+
+
+def test_sequential_test_decides():
+    test = SequentialTest(0.25)
+    for sample in (1, 1):
+        test.add(sample)
+    # Not before the minimum number of matches
+    assert test.decision() == 0
+    test.add(1)
+    assert test.decision() == 1
+
+    test = SequentialTest(0.25)
+    for sample in (-1, 0, -1, -1, 0, -1):
+        test.add(sample)
+    assert test.decision() == -1
+
+
+def test_sequential_test_stays_open_for_equal_teams():
+    test = SequentialTest(0.25)
+    for sample in (1, -1, 0) * 10:
+        test.add(sample)
+        assert test.decision() == 0
+    assert test.llr == pytest.approx(0)
+
+
+def test_confidence_needs_more_matches():
+    def matches_to_decide(alpha):
+        test = SequentialTest(0.25, alpha, alpha)
+        while test.decision() == 0:
+            test.add((1, 1, 0, 1, -1)[len(test.samples) % 5])
+        return len(test.samples)
+
+    assert matches_to_decide(0.2) < matches_to_decide(0.01)
+
+
+def test_side_config():
+    base = {"match": {"time": 60}, "blue": {"rgb": "0 0 1"}}
+    config = side_config(base, "B", "A", TEAMS)
+    assert config["blue"] == {
+        "rgb": "0 0 1",
+        "name": "B",
+        "id": "B",
+        "controller": "team_b",
+    }
+    assert config["yellow"]["controller"] == "team_a"
+    assert config["referee"]["headless"] is True
+    assert "name" not in base["blue"]
+
+
+def test_undecided_pairings_get_the_matches(tmp_path: Path, monkeypatch):
+    # A beats everyone, B and C draw
+    monkeypatch.setenv("FAKE_SIM_TEAM_GOALS", json.dumps({"A": 1}))
+    scheduler = AdaptiveScheduler(
+        TEAMS,
+        tmp_path / "output",
+        FAKE_SIMULATOR,
+        max_matches=6,
+        cache_dir=tmp_path,
+        workers=3,
+        pin_cpus=False,
+        poll_interval=0.01,
+    )
+    open_pairing = scheduler.pairings[2]
+    in_flight = []
+    next_fixtures = scheduler.next_fixtures
+
+    def record_next_fixtures():
+        fixtures = next_fixtures()
+        in_flight.append(open_pairing.in_flight)
+        return fixtures
+
+    scheduler.next_fixtures = record_next_fixtures
+    pairings = {p.teams: p for p in scheduler.run()}
+
+    assert pairings["A", "B"].winner == "A"
+    assert pairings["A", "C"].winner == "A"
+    assert pairings["B", "C"].winner is None
+    # The matches which were being played when the test decided still count
+    assert 3 <= pairings["A", "B"].matches < 6
+    assert pairings["A", "B"].goal_difference == 2 * pairings["A", "B"].matches
+    assert pairings["B", "C"].matches == 6
+    # The free workers play the open pairing in parallel
+    assert max(in_flight) > 1
+    assert all(p.in_flight == 0 for p in pairings.values())
+    # Every side of every pairing has its world
+    assert len(list(tmp_path.glob("soccer-headless-*.wbt"))) == 6
+
+
+def test_cli(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setenv("FAKE_SIM_TEAM_GOALS", json.dumps({"B": 2}))
+    teams_path = tmp_path / "teams.json"
+    teams_path.write_text(json.dumps({"A": "team_a", "B": "team_b"}))
+    main(
+        [
+            str(teams_path),
+            str(tmp_path / "output"),
+            "--simulator",
+            " ".join(FAKE_SIMULATOR),
+            "--mode",
+            "goals",
+            "--min-matches",
+            "2",
+            "--workers",
+            "1",
+            "--cache-dir",
+            str(tmp_path),
+        ]
+    )
+    summary = json.loads((tmp_path / "output" / RESULTS_FILE).read_text())
+    (pairing,) = summary["pairings"]
+    assert pairing["winner"] == "B"
+    assert pairing["goal_difference"] == -8
+    assert (summary["matches"], summary["max_matches"]) == (2, 20)
+    out = capsys.readouterr().out
+    assert "A vs B\t2\t-8\t" in out
+    assert out.splitlines()[-1] == "matches played: 2/20"
@@ -0,0 +1,229 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from tournament.analytics import (
+    CHUNKS_DIR,
+    group_count,
+    main,
+    MAX_CHUNKS,
+    MISSING,
+    ReflogStore,
+)
+
+
+def event(matchtime, type, payload=None):
+    data = {
+        "datetime": "2022-01-01T10:00:00.000000Z",
+        "matchtime": matchtime,
+        "event": type,
+    }
+    if payload is not None:
+        data["payload"] = payload
+    return json.dumps(data) + "\n"
+
+
+def match_start(match_id, halftime, blue="Blues", yellow="Yellows"):
+    return event(
+        0.0,
+        "MATCH_START",
+        {
+            "score_yellow": 0,
+            "score_blue": 0,
+            "total_match_time": 600,
+            "team_name_yellow": yellow,
+            "team_name_blue": blue,
+            "match_id": match_id,
+            "halftime": halftime,
+        },
+    )
+
+
+def write_reflog(path: Path, match_id=1, halftime=1):
+    path.write_text(
+        match_start(match_id, halftime)
+        + event(10.0, "KICKOFF", {"robot_name": "B1", "team_name": "B"})
+        + event(
+            30.5,
+            "GOAL",
+            {"team_name": "Blues", "score_yellow": 0, "score_blue": 1},
+        )
+        + event(70.0, "LACK_OF_PROGRESS", {"type": "ball"})
+        + event(
+            80.0, "LACK_OF_PROGRESS", {"type": "robot", "robot_name": "Y2"}
+        )
+        + event(
+            90.0,
+            "INSIDE_PENALTY_FOR_TOO_LONG",
+            {"type": "robot", "robot_name": "B3"},
+        )
+        + event(
+            100.0,
+            "GOAL",
+            {"team_name": "Yellows", "score_yellow": 1, "score_blue": 1},
+        )
+    )
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> ReflogStore:
+    return ReflogStore(tmp_path / "store")
+
+
+def test_group_count():
+    groups, counts = group_count(
+        [np.array([1, 0, 1, 1, MISSING]), np.array([2, 2, 2, 0, 5])]
+    )
+
+    rows = list(zip(groups[0].tolist(), groups[1].tolist(), counts.tolist()))
+    assert rows == [(-1, 5, 1), (0, 2, 1), (1, 0, 1), (1, 2, 2)]
+
+    groups, counts = group_count(
+        [np.array([1, 0, 1])], np.array([2, 5, 3], dtype=np.int32)
+    )
+    assert groups[0].tolist() == [0, 1]
+    assert counts.tolist() == [5, 5]
+
+
+def test_ingest_columns(tmp_path: Path, store: ReflogStore):
+    write_reflog(tmp_path / "match.jsonl")
+
+    assert store.ingest([tmp_path]) == 7
+
+    tables = store.load()
+    assert tables.decode("event", tables.events["event"][:3]) == [
+        "MATCH_START",
+        "KICKOFF",
+        "GOAL",
+    ]
+    assert tables.decode("team", tables.events["team"]) == [
+        None,
+        "Blues",
+        "Blues",
+        None,
+        "Yellows",
+        "Blues",
+        "Yellows",
+    ]
+    assert tables.decode("robot", tables.events["robot"][3:6]) == [
+        "ball",
+        "Y2",
+        "B3",
+    ]
+    assert tables.events["half"].tolist() == [1] * 7
+    assert tables.events["time"][2] == pytest.approx(30.5)
+    assert tables.decode("team_blue", tables.halves["team_blue"]) == ["Blues"]
+
+
+def test_ingest_is_incremental(tmp_path: Path, store: ReflogStore):
+    reflog = tmp_path / "match.jsonl"
+    write_reflog(reflog)
+    store.ingest([reflog])
+
+    # Nothing new to ingest, even after reopening the store
+    store = ReflogStore(store.path)
+    assert store.ingest([reflog]) == 0
+
+    # Only complete lines are ingested
+    with reflog.open("a") as outfile:
+        line = event(200.0, "GOAL", {"team_name": "Blues"})
+        outfile.write(line + line[:10])
+    assert store.ingest([reflog]) == 1
+
+    with reflog.open("a") as outfile:
+        outfile.write(line[10:])
+    assert store.ingest([reflog]) == 1
+
+    tables = ReflogStore(store.path).load()
+    assert len(tables.events["event"]) == 9
+    # The state of the match is kept between the ingestions
+    assert tables.events["half"][-1] == 1
+    assert tables.decode("match", tables.events["match"][-1:]) == ["1"]
+
+
+def test_chunks_are_merged(tmp_path: Path, store: ReflogStore):
+    matches = 3 * MAX_CHUNKS + 1
+    for match_id in range(1, matches + 1):
+        reflog = tmp_path / f"match_{match_id}.jsonl"
+        write_reflog(reflog, match_id)
+        # The matches are ingested as they finish
+        ReflogStore(store.path).ingest([reflog])
+
+    chunks = ReflogStore(store.path).manifest["chunks"]
+    assert len(chunks) <= MAX_CHUNKS
+    assert (
+        sorted(path.name for path in (store.path / CHUNKS_DIR).iterdir())
+        == chunks
+    )
+
+    tables = ReflogStore(store.path).load()
+    assert len(tables.halves["match"]) == matches
+    assert tables.count([], "GOAL") == [(2 * matches,)]
+    assert tables.decode("match", tables.halves["match"]) == [
+        str(match_id) for match_id in range(1, matches + 1)
+    ]
+
+
+def test_queries(tmp_path: Path, store: ReflogStore):
+    write_reflog(tmp_path / "match_1.jsonl", halftime=1)
+    write_reflog(tmp_path / "match_2.jsonl", halftime=2)
+    store.ingest([tmp_path])
+    tables = store.load()
+
+    assert tables.goals_per_minute() == [(0, 2, 1.0), (1, 2, 1.0)]
+    assert tables.lack_of_progress_rate() == [("Yellows", 2, 1.0)]
+    assert tables.penalties_per_robot() == [("Blues", "B3", 2)]
+    assert tables.count(["half"], "GOAL") == [(1, 2), (2, 2)]
+    assert tables.count([], "KICKOFF") == [(2,)]
+
+
+def test_suppressed_events(tmp_path: Path, store: ReflogStore):
+    write_reflog(tmp_path / "match.jsonl")
+    with (tmp_path / "match.jsonl").open("a") as outfile:
+        outfile.write(
+            event(
+                110.0,
+                "EVENTS_SUPPRESSED",
+                {
+                    "event": "LACK_OF_PROGRESS",
+                    "type": "robot",
+                    "robot_name": "Y1",
+                    "count": 4,
+                },
+            )
+        )
+    store.ingest([tmp_path])
+    tables = store.load()
+
+    assert tables.lack_of_progress_rate() == [("Yellows", 5, 5.0)]
+    assert tables.count(["robot"], "LACK_OF_PROGRESS") == [
+        ("ball", 1),
+        ("Y2", 1),
+        ("Y1", 4),
+    ]
+    assert tables.count([], "LACK_OF_PROGRESS") == [(6,)]
+
+
+def test_empty_store(store: ReflogStore):
+    tables = store.load()
+
+    assert tables.goals_per_minute() == []
+    assert tables.count(["team"]) == []
+
+
+def test_cli(tmp_path: Path, capsys):
+    write_reflog(tmp_path / "match.jsonl")
+    store_path = str(tmp_path / "store")
+
+    main(["ingest", store_path, str(tmp_path / "match.jsonl")])
+    main(["query", store_path, "count", "--event", "GOAL", "--by", "team"])
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == [
+        "Ingested 7 events",
+        "team\tcount",
+        "Blues\t1",
+        "Yellows\t1",
+    ]
@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from tournament import fake_simulator
+from tournament.benchmark import benchmark, fit_timing, main
+
+FAKE_SIMULATOR = [sys.executable, fake_simulator.__file__]
+
+
+def test_fit_timing():
+    samples = [(10, 3.0), (60, 8.0), (10, 3.0), (60, 8.0)]
+    result = fit_timing(samples)
+    assert result["load_time"] == pytest.approx(2.0)
+    assert result["real_time_factor"] == pytest.approx(10.0)
+
+    # Noise makes the longer match quicker
+    assert fit_timing([(10, 3.0), (60, 2.0)])["real_time_factor"] > 1e9
+
+    with pytest.raises(ValueError, match="different lengths"):
+        fit_timing([(10, 3.0), (10, 3.5)])
+
+
+def test_benchmark_with_fake_simulator(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_SIM_SPEED", "10")
+    results = benchmark(
+        {"robot": {"ir_range": 0.8}},
+        FAKE_SIMULATOR,
+        tmp_path,
+        match_times=(1, 6),
+        repeats=1,
+    )
+
+    assert list(results) == ["full", "headless"]
+    for result in results.values():
+        assert result["real_time_factor"] == pytest.approx(10, rel=0.3)
+        assert 0 <= result["load_time"] < 1
+    assert len(list(tmp_path.glob("soccer-headless-*.wbt"))) == 1
+
+
+def test_cli(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setenv("FAKE_SIM_SPEED", "100")
+    main(
+        [
+            "--simulator",
+            " ".join(FAKE_SIMULATOR),
+            "--cache-dir",
+            str(tmp_path),
+            "--match-times",
+            "1",
+            "2",
+            "--repeats",
+            "1",
+        ]
+    )
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("world\t")
+    assert [line.split("\t")[0] for line in lines[1:]] == ["full", "headless"]
@@ -0,0 +1,143 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+from tournament import fake_simulator
+from tournament.fidelity import (
+    cheapest_acceptable,
+    compare,
+    evaluate_profiles,
+    main,
+    read_outcome,
+)
+
+FAKE_SIMULATOR = [sys.executable, fake_simulator.__file__]
+
+
+def outcome(blue: int, yellow: int, lack_of_progress: int = 0) -> dict:
+    return {
+        "score_blue": blue,
+        "score_yellow": yellow,
+        "lack_of_progress": lack_of_progress,
+        "wall_time": 6.0,
+    }
+
+
+def test_read_outcome(tmp_path: Path):
+    events = [
+        ("MATCH_START", {}),
+        ("LACK_OF_PROGRESS", {"type": "ball"}),
+        ("EVENTS_SUPPRESSED", {"event": "LACK_OF_PROGRESS", "count": 3}),
+        ("EVENTS_SUPPRESSED", {"event": "INSIDE_PENALTY", "count": 2}),
+        ("MATCH_FINISH", {"score_blue": 2, "score_yellow": 1}),
+    ]
+    reflog = tmp_path / "match.jsonl"
+    reflog.write_text(
+        "".join(
+            json.dumps({"event": event, "payload": payload}) + "\n"
+            for event, payload in events
+        )
+    )
+    assert read_outcome(reflog) == {
+        "score_blue": 2,
+        "score_yellow": 1,
+        "lack_of_progress": 4,
+    }
+
+    reflog.write_text(json.dumps({"event": "MATCH_START", "payload": {}}))
+    assert read_outcome(reflog) is None
+
+
+def test_compare():
+    reference = [outcome(2, 1, 10), outcome(0, 0, 4)]
+    result = compare(reference, [outcome(1, 1, 12), outcome(0, 1, 4)], 60)
+
+    assert result == {
+        "real_time_factor": 10.0,
+        "goal_divergence": 1.0,
+        "lack_of_progress_divergence": 1.0,
+        "agreement": 0.0,
+    }
+    assert compare(reference, reference, 60)["agreement"] == 1.0
+
+
+def test_cheapest_acceptable():
+    report = {
+        "competition": compare([outcome(1, 0)], [outcome(1, 0)]),
+        "fast": compare([outcome(1, 0)], [outcome(2, 0)]),
+        "screening": compare([outcome(1, 0)], [outcome(0, 1)]),
+    }
+    report["fast"]["real_time_factor"] *= 2
+    report["screening"]["real_time_factor"] *= 4
+
+    assert cheapest_acceptable(report, 1, 0.8) == "fast"
+    assert cheapest_acceptable(report, 0, 0.8) == "competition"
+    assert cheapest_acceptable(report, 2, 0) == "screening"
+    assert cheapest_acceptable(report, 0, 0.8, -1) is None
+
+
+def test_profiles_with_fake_simulator(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_SIM_GOALS_BLUE", "1")
+    report = evaluate_profiles(
+        FAKE_SIMULATOR,
+        tmp_path / "output",
+        seeds=(1, 2),
+        baseline=True,
+        cache_dir=tmp_path / "worlds",
+    )
+
+    assert list(report) == [
+        "competition",
+        "competition (again)",
+        "fast",
+        "screening",
+    ]
+    for result in report.values():
+        assert result["goal_divergence"] == 0
+        assert result["agreement"] == 1
+    worlds = sorted(path.name for path in (tmp_path / "worlds").iterdir())
+    assert [name.rsplit("-", 1)[0] for name in worlds] == [
+        "soccer",
+        "soccer-fast",
+        "soccer-screening",
+    ]
+    assert (tmp_path / "output" / "fast" / "2").is_dir()
+
+
+def test_unfinished_scenario(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_SIM_CRASH_ONCE", str(tmp_path / "crashed"))
+    with pytest.raises(RuntimeError, match="did not finish"):
+        evaluate_profiles(
+            FAKE_SIMULATOR,
+            tmp_path / "output",
+            profiles=["fast"],
+            seeds=(1,),
+            cache_dir=tmp_path / "worlds",
+        )
+
+
+def test_cli(tmp_path: Path, capsys):
+    main(
+        [
+            str(tmp_path / "output"),
+            "--simulator",
+            " ".join(FAKE_SIMULATOR),
+            "--profiles",
+            "competition",
+            "fast",
+            "--seeds",
+            "1",
+            "--cache-dir",
+            str(tmp_path / "worlds"),
+        ]
+    )
+    # Both of them play the same with the fake simulator
+    out = capsys.readouterr().out
+    assert out.splitlines()[-1] in (
+        "cheapest acceptable profile: competition",
+        "cheapest acceptable profile: fast",
+    )
+    report = json.loads((tmp_path / "output" / "fidelity.json").read_text())
+    assert list(report) == ["competition", "fast"]
@@ -0,0 +1,281 @@
+import json
+import os
+import shlex
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from tournament import fake_simulator
+from tournament.runner import (
+    available_cpus,
+    FAILED,
+    FINISHED,
+    Fixture,
+    load_fixtures,
+    main,
+    process_group_cpu_time,
+    RESULTS_FILE,
+    SKIPPED,
+    split_cpus,
+    TIMEOUT,
+    TournamentRunner,
+    write_results,
+)
+
+FAKE_SIMULATOR = [sys.executable, fake_simulator.__file__]
+
+
+def run(fixtures, tmp_path: Path, **kwargs):
+    runner = TournamentRunner(
+        fixtures,
+        tmp_path / "output",
+        FAKE_SIMULATOR,
+        poll_interval=0.01,
+        **kwargs,
+    )
+    return runner.run()
+
+
+@pytest.mark.parametrize(
+    "cpus, workers, expected",
+    [
+        ([0, 1, 2, 3], 2, [[0, 1], [2, 3]]),
+        ([3, 1, 2, 0, 4], 2, [[0, 1], [2, 3]]),
+        ([0, 1], 3, [[0], [1], [0]]),
+        ([5], 1, [[5]]),
+    ],
+)
+def test_split_cpus(cpus, workers, expected):
+    assert split_cpus(cpus, workers) == expected
+
+
+def test_halves_carry_the_scores(tmp_path: Path):
+    fixtures = [
+        Fixture(1, "A", "B", env={"FAKE_SIM_GOALS_BLUE": "2"}),
+        Fixture(2, "C", "D", env={"FAKE_SIM_GOALS_YELLOW": "1"}),
+        Fixture(1, "B", "A", half=2, env={"FAKE_SIM_GOALS_YELLOW": "1"}),
+        Fixture(2, "D", "C", half=2),
+    ]
+    done = []
+    results = run(fixtures, tmp_path, workers=2, on_result=done.append)
+
+    assert [r.status for r in results] == [FINISHED] * 4
+    assert len(done) == 4
+    assert results[2].scores == {"blue": 0, "yellow": 3}
+    assert results[3].scores == {"blue": 1, "yellow": 0}
+    # The fake simulator takes some CPU time to start
+    assert all(r.cpu_time > 0 for r in results)
+
+    reflogs = {r.reflog.parent for r in results}
+    assert len(reflogs) == 4
+
+    summary = write_results(tmp_path / "output", results)
+    assert json.loads((tmp_path / "output" / RESULTS_FILE).read_text()) == (
+        summary
+    )
+    standings = {s["team"]: s["points"] for s in summary["standings"]}
+    assert standings == {"A": 3, "B": 0, "C": 0, "D": 3}
+
+
+def test_fixtures_are_fed_while_running(tmp_path: Path):
+    fed = []
+
+    def next_fixtures():
+        if len(fed) == 3:
+            return []
+        fed.append(len(fed) + 1)
+        return [Fixture(fed[-1], "A", "B"), Fixture(fed[-1], "B", "A", 2)]
+
+    results = run([], tmp_path, workers=2, next_fixtures=next_fixtures)
+
+    assert len(results) == 6
+    assert [r.status for r in results] == [FINISHED] * 6
+    assert [(r.fixture.match_id, r.fixture.half) for r in results[:2]] == [
+        (1, 1),
+        (1, 2),
+    ]
+
+
+def test_crashed_half_is_retried(tmp_path: Path):
+    marker = tmp_path / "crashed"
+    fixtures = [Fixture(1, "A", "B", env={"FAKE_SIM_CRASH_ONCE": str(marker)})]
+    (result,) = run(fixtures, tmp_path, retries=1)
+
+    assert result.status == FINISHED
+    assert result.attempts == 2
+    assert result.reflog.parent.name == "2"
+
+
+def test_team_playing_against_itself(tmp_path: Path):
+    fixtures = [
+        Fixture(1, "A", "A", env={"FAKE_SIM_GOALS_BLUE": "2"}),
+        Fixture(1, "A", "A", half=2, env={"FAKE_SIM_GOALS_YELLOW": "1"}),
+    ]
+    results = run(fixtures, tmp_path)
+
+    # The sides swap, so the blue goals of the first half are yellow ones
+    assert results[0].scores == {"blue": 2, "yellow": 0}
+    assert results[1].scores == {"blue": 0, "yellow": 3}
+    assert results[1].goal_difference("A") == -3
+
+
+def test_timed_out_half_skips_the_rest_of_the_match(tmp_path: Path):
+    fixtures = [
+        Fixture(1, "A", "B", env={"FAKE_SIM_HANG": "1"}),
+        Fixture(1, "B", "A", half=2),
+        Fixture(2, "C", "D"),
+    ]
+    results = run(fixtures, tmp_path, timeout=0.5, retries=1, workers=2)
+
+    assert [r.status for r in results] == [TIMEOUT, SKIPPED, FINISHED]
+    assert results[0].attempts == 2
+    assert results[1].attempts == 0
+
+
+def test_slot_is_free_once_the_match_is_done(tmp_path: Path):
+    linger = {"FAKE_SIM_LINGER": "1", "FAKE_SIM_ARGS": "1"}
+    fixtures = [
+        Fixture(1, "A", "B", env=linger),
+        Fixture(1, "B", "A", half=2, env=linger),
+        Fixture(2, "C", "D", env=linger),
+    ]
+    reported = []
+
+    def on_result(result):
+        reported.append(time.monotonic() - start)
+
+    start = time.monotonic()
+    results = run(
+        fixtures, tmp_path, workers=1, pin_cpus=False, on_result=on_result
+    )
+    elapsed = time.monotonic() - start
+
+    assert [r.status for r in results] == [FINISHED] * 3
+    # The next half starts while the previous simulator is still running
+    assert elapsed < 2.5
+    # But the run waits for all of them
+    assert elapsed >= 1
+    # The halves are reported once their simulators are reaped
+    assert min(reported) >= 1
+    # The simulators which run at the same time use different ports
+    first, second = [
+        json.loads((r.reflog.parent / "args.json").read_text())[-2]
+        for r in results[:2]
+    ]
+    assert first != second
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_setaffinity"),
+    reason="CPU pinning is not supported",
+)
+def test_cpus_are_reused_once_reaped(tmp_path: Path):
+    env = {"FAKE_SIM_LINGER": "0.5", "FAKE_SIM_AFFINITY": "1"}
+    fixtures = [Fixture(1, "A", "B", env=env), Fixture(2, "C", "D", env=env)]
+    start = time.monotonic()
+    results = run(fixtures, tmp_path, workers=1)
+
+    # The second half waits for the CPUs of the lingering simulator
+    assert time.monotonic() - start >= 1
+    first, second = [
+        json.loads((r.reflog.parent / "affinity.json").read_text())
+        for r in results
+    ]
+    assert first == second
+
+
+def test_lingering_simulator_is_killed(tmp_path: Path):
+    fixtures = [Fixture(1, "A", "B", env={"FAKE_SIM_LINGER": "60"})]
+    start = time.monotonic()
+    (result,) = run(fixtures, tmp_path, timeout=0.5)
+
+    assert time.monotonic() - start < 10
+    assert result.status == FINISHED
+    assert result.attempts == 1
+
+
+def test_cpu_time_of_killed_controllers(tmp_path: Path):
+    env = {"FAKE_SIM_HANG": "1", "FAKE_SIM_BUSY_CONTROLLER": "1"}
+    fixtures = [Fixture(1, "A", "B", env=env)]
+    (result,) = run(fixtures, tmp_path, timeout=1, retries=0)
+
+    assert result.status == TIMEOUT
+    # The controller is never reaped by the killed simulator
+    assert result.cpu_time > 0.5
+
+
+def test_process_group_cpu_time(tmp_path: Path):
+    ticks = os.sysconf("SC_CLK_TCK")
+    for pid, pgid, times in [
+        (10, 10, [ticks] * 4),
+        (11, 10, [ticks, ticks, 2 * ticks, 0]),
+        (12, 20, [ticks] * 4),
+    ]:
+        fields = ["S", "1", str(pgid)] + ["0"] * 8 + [str(t) for t in times]
+        (tmp_path / str(pid)).mkdir()
+        stat = f"{pid} (a (b)) {' '.join(fields)} 0 0"
+        (tmp_path / str(pid) / "stat").write_text(stat)
+    (tmp_path / "self").mkdir()
+
+    # The leader is reaped by the runner itself
+    assert process_group_cpu_time(10, tmp_path) == 4
+
+
+def test_failed_without_retries(tmp_path: Path):
+    marker = tmp_path / "crashed"
+    fixtures = [Fixture(1, "A", "B", env={"FAKE_SIM_CRASH_ONCE": str(marker)})]
+    (result,) = run(fixtures, tmp_path, retries=0)
+
+    assert result.status == FAILED
+    assert result.attempts == 1
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_setaffinity"),
+    reason="CPU pinning is not supported",
+)
+def test_workers_are_pinned(tmp_path: Path):
+    fixtures = [
+        Fixture(n, "A", "B", env={"FAKE_SIM_AFFINITY": "1"}) for n in (1, 2)
+    ]
+    results = run(fixtures, tmp_path, workers=2)
+
+    expected = split_cpus(available_cpus(), 2)
+    for slot, result in enumerate(results):
+        affinity_path = result.reflog.parent / "affinity.json"
+        assert json.loads(affinity_path.read_text()) == expected[slot]
+
+
+def test_cli(tmp_path: Path, capsys):
+    fixtures_path = tmp_path / "fixtures.json"
+    fixtures_path.write_text(
+        json.dumps(
+            [
+                {"match_id": 1, "team_blue": "A", "team_yellow": "B"},
+                {
+                    "match_id": 1,
+                    "half": 2,
+                    "team_blue": "B",
+                    "team_yellow": "A",
+                    "env": {"FAKE_SIM_GOALS_BLUE": "1"},
+                },
+            ]
+        )
+    )
+    assert [f.half for f in load_fixtures(fixtures_path)] == [1, 2]
+
+    main(
+        [
+            str(fixtures_path),
+            str(tmp_path / "output"),
+            "--simulator",
+            shlex.join(FAKE_SIMULATOR),
+            "--workers",
+            "1",
+        ]
+    )
+    assert "1_-_2\tB vs A\tfinished" in capsys.readouterr().out
+    results = json.loads((tmp_path / "output" / RESULTS_FILE).read_text())
+    assert results["standings"][0]["team"] == "B"
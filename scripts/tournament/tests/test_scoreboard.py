@@ -0,0 +1,224 @@
+import json
+import socket
+import threading
+from pathlib import Path
+
+from tournament.scoreboard import (
+    follow,
+    ReflogTail,
+    Scoreboard,
+    SnapshotServer,
+    write_snapshot,
+)
+
+
+def event(matchtime, type, payload):
+    data = {
+        "datetime": "2022-01-01T10:00:00.000000Z",
+        "matchtime": matchtime,
+        "event": type,
+        "payload": payload,
+    }
+    return json.dumps(data) + "\n"
+
+
+def match_start(match_id, halftime, blue, yellow, score_blue, score_yellow):
+    return event(
+        0.0,
+        "MATCH_START",
+        {
+            "score_yellow": score_yellow,
+            "score_blue": score_blue,
+            "total_match_time": 600,
+            "team_name_yellow": yellow,
+            "team_name_blue": blue,
+            "match_id": match_id,
+            "halftime": halftime,
+        },
+    )
+
+
+def goal(matchtime, team, score_blue, score_yellow):
+    payload = {
+        "team_name": team,
+        "score_yellow": score_yellow,
+        "score_blue": score_blue,
+    }
+    return event(matchtime, "GOAL", payload)
+
+
+def match_finish(blue, yellow, score_blue, score_yellow):
+    payload = {
+        "total_match_time": 600,
+        "score_yellow": score_yellow,
+        "score_blue": score_blue,
+        "team_name_yellow": yellow,
+        "team_name_blue": blue,
+    }
+    return event(600.0, "MATCH_FINISH", payload)
+
+
+def append(path: Path, text: str):
+    with path.open("a") as outfile:
+        outfile.write(text)
+
+
+def test_tail_reads_only_complete_lines(tmp_path: Path):
+    path = tmp_path / "match.jsonl"
+    line = goal(10.0, "A", 1, 0)
+    tail = ReflogTail(path)
+
+    assert tail.read_events() == []
+
+    append(path, line + line[:20])
+    assert len(tail.read_events()) == 1
+    assert tail.read_events() == []
+
+    append(path, line[20:])
+    assert len(tail.read_events()) == 1
+    assert tail.offset == 2 * len(line)
+
+
+def test_tail_of_truncated_reflog(tmp_path: Path):
+    path = tmp_path / "match.jsonl"
+    tail = ReflogTail(path)
+    append(path, goal(10.0, "A", 1, 0) + goal(20.0, "A", 2, 0))
+    assert len(tail.read_events()) == 2
+
+    # The reflog of a retried half replaces the one of the failed attempt
+    path.write_text(goal(30.0, "B", 0, 1))
+    events = tail.read_events()
+    assert [event["matchtime"] for event in events] == [30.0]
+
+
+def test_scoreboard_two_halves(tmp_path: Path):
+    first = tmp_path / "1_-_1.jsonl"
+    second = tmp_path / "1_-_2.jsonl"
+    scoreboard = Scoreboard()
+
+    append(first, match_start(1, 1, "A", "B", 0, 0))
+    append(first, goal(30.0, "A", 1, 0))
+    assert scoreboard.update(first)
+    assert not scoreboard.update(first)
+
+    match = scoreboard.matches["1"]
+    assert match.scores == {"blue": 1, "yellow": 0}
+    assert match.matchtime == 30.0
+    assert scoreboard.standings == {}
+
+    append(first, match_finish("A", "B", 1, 0))
+    scoreboard.update(first)
+    assert scoreboard.standings["A"]["points"] == 3
+    assert scoreboard.standings["B"]["lost"] == 1
+
+    # The teams swap sides in the second half, which removes the result of
+    # the first half from the standings
+    append(second, match_start(1, 2, "B", "A", 0, 1))
+    scoreboard.update(second)
+    assert not match.finished
+    assert scoreboard.standings["A"]["played"] == 0
+
+    append(second, goal(50.0, "B", 1, 1))
+    append(second, match_finish("B", "A", 1, 1))
+    scoreboard.update(second)
+
+    snapshot = scoreboard.snapshot()
+    assert [s["team"] for s in snapshot["standings"]] == ["A", "B"]
+    for standing in snapshot["standings"]:
+        assert standing["played"] == 1
+        assert standing["drawn"] == 1
+        assert standing["points"] == 1
+        assert standing["goals_for"] == 1
+    assert snapshot["matches"][0]["half"] == 2
+    assert snapshot["matches"][0]["finished"]
+
+
+def test_team_playing_against_itself(tmp_path: Path):
+    path = tmp_path / "1_-_1.jsonl"
+    scoreboard = Scoreboard()
+    append(path, match_start(1, 1, "A", "A", 0, 0))
+    append(path, goal(30.0, "A", 1, 0))
+    append(path, match_finish("A", "A", 1, 0))
+    scoreboard.update(path)
+
+    assert scoreboard.matches["1"].scores == {"blue": 1, "yellow": 0}
+    standing = scoreboard.standings["A"]
+    assert standing["played"] == 2
+    assert standing["won"] == standing["lost"] == 1
+    assert standing["goals_for"] == standing["goals_against"] == 1
+    assert standing["points"] == 3
+
+
+def test_standings_order(tmp_path: Path):
+    scoreboard = Scoreboard()
+    for match_id, blue, yellow, score_blue, score_yellow in (
+        (1, "A", "B", 1, 0),
+        (2, "C", "D", 5, 0),
+        (3, "E", "F", 2, 2),
+    ):
+        path = tmp_path / f"{match_id}.jsonl"
+        append(path, match_start(match_id, 1, blue, yellow, 0, 0))
+        append(path, match_finish(blue, yellow, score_blue, score_yellow))
+        scoreboard.update(path)
+
+    standings = scoreboard.snapshot()["standings"]
+    assert [s["team"] for s in standings] == ["C", "A", "E", "F", "B", "D"]
+
+
+def test_write_snapshot(tmp_path: Path):
+    path = tmp_path / "scoreboard.json"
+
+    write_snapshot(path, {"standings": []})
+
+    assert json.loads(path.read_text()) == {"standings": []}
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_snapshot_server():
+    server = SnapshotServer(0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.publish({"standings": [], "matches": []})
+
+    with socket.create_connection(server.server_address) as client:
+        data = b""
+        while True:
+            chunk = client.recv(1024)
+            if not chunk:
+                break
+            data += chunk
+
+    server.shutdown()
+    server.server_close()
+    assert json.loads(data) == {"standings": [], "matches": []}
+
+
+def test_follow(tmp_path: Path):
+    output = tmp_path / "out" / "scoreboard.json"
+    output.parent.mkdir()
+    stop = threading.Event()
+    result = {}
+
+    def run():
+        result["scoreboard"] = follow(
+            tmp_path, output, poll_interval=0.01, stop=stop
+        )
+
+    thread = threading.Thread(target=run)
+    thread.start()
+
+    reflog = tmp_path / "1_-_1.jsonl"
+    append(reflog, match_start(1, 1, "A", "B", 0, 0))
+    append(reflog, match_finish("A", "B", 0, 2))
+
+    for _ in range(500):
+        if output.exists():
+            snapshot = json.loads(output.read_text())
+            if snapshot["standings"]:
+                break
+        stop.wait(0.01)
+
+    stop.set()
+    thread.join()
+
+    assert snapshot["standings"][0]["team"] == "B"
+    assert result["scoreboard"].standings["B"]["won"] == 1
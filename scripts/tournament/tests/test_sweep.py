@@ -0,0 +1,202 @@
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+from tournament import fake_simulator
+from tournament.runner import FINISHED, Fixture, MatchResult
+from tournament.sweep import (
+    BASELINE,
+    CANDIDATE,
+    candidate_fixtures,
+    cma_search,
+    DEFAULTS,
+    main,
+    MatchEvaluator,
+    PARAMETERS,
+    random_search,
+    rank,
+    RANK_KEYS,
+    RESULTS_FILE,
+    summarize,
+    to_params,
+    to_point,
+)
+from tournament.worlds import generate_world, world_params
+
+FAKE_SIMULATOR = [sys.executable, fake_simulator.__file__]
+OPTIMUM = {"dead_band": 0.2, "forward_speed": 9.0, "turn_speed": 5.0}
+
+
+def evaluate_distance(batch):
+    """Scores the candidates by how close they are to the optimum."""
+    results = []
+    for params in batch:
+        distance = sum(
+            (a - b) ** 2 for a, b in zip(to_point(params), to_point(OPTIMUM))
+        )
+        results.append(
+            {
+                "params": params,
+                "matches": 1,
+                "goal_difference": 0,
+                "cpu_minutes": 1.0,
+                "score": -distance,
+                "goals_per_cpu_minute": -distance,
+            }
+        )
+    return results
+
+
+def test_params_within_bounds():
+    assert to_params(to_point(DEFAULTS)) == DEFAULTS
+    params = to_params([-1.0, 0.5, 2.0])
+    assert params["dead_band"] == PARAMETERS["dead_band"][1]
+    assert params["turn_speed"] == PARAMETERS["turn_speed"][2]
+
+
+def test_candidate_plays_on_both_sides():
+    params = {"dead_band": 0.1, "forward_speed": 8, "turn_speed": 3}
+    fixtures = candidate_fixtures(params, 5, [1, 2], match_time=60)
+
+    assert [(f.match_id, f.half) for f in fixtures] == [
+        (5, 1),
+        (5, 2),
+        (6, 1),
+        (6, 2),
+    ]
+    first, second = fixtures[:2]
+    assert (first.team_blue, second.team_yellow) == (CANDIDATE, CANDIDATE)
+    assert json.loads(first.env["RCJ_TEAM_PARAMS_B"]) == params
+    assert json.loads(second.env["RCJ_TEAM_PARAMS_Y"]) == params
+    assert "RCJ_TEAM_PARAMS_Y" not in first.env
+    assert first.env["RCJ_SIM_MATCH_TIME"] == "60"
+    assert fixtures[2].env["RCJ_SIM_SEED"] == "2"
+
+
+@pytest.mark.parametrize("search", [random_search, cma_search])
+def test_search_finds_better_candidates(search):
+    results = search(evaluate_distance, 60, 6, rng=random.Random(1))
+
+    assert len(results) <= 60
+    scores = [r["score"] for r in results]
+    assert scores == sorted(scores, reverse=True)
+    defaults = evaluate_distance([DEFAULTS])[0]["score"]
+    assert scores[0] > defaults
+
+
+def test_cma_search_converges():
+    results = cma_search(
+        evaluate_distance, 200, 8, patience=20, rng=random.Random(1)
+    )
+    assert results[0]["score"] > -0.01
+    # It stops once the spread is small
+    assert len(results) < 200
+
+
+def test_early_stopping():
+    batches = []
+
+    def evaluate_constant(batch):
+        batches.append(batch)
+        return [
+            dict(r, score=1.0, goals_per_cpu_minute=1.0)
+            for r in evaluate_distance(batch)
+        ]
+
+    random_search(evaluate_constant, 100, 4, patience=2)
+    # The first batch sets the best score, the next two do not improve it
+    assert len(batches) == 3
+    assert batches[0][0] == DEFAULTS
+
+
+@pytest.mark.parametrize("key", RANK_KEYS)
+def test_rank_puts_unfinished_last(key):
+    results = [
+        {"score": None, "goals_per_cpu_minute": 0.0, "cpu_minutes": 0.1},
+        {"score": -1.0, "goals_per_cpu_minute": -1.0, "cpu_minutes": 1.0},
+        {"score": 2.0, "goals_per_cpu_minute": 2.0, "cpu_minutes": 1.0},
+    ]
+    assert [r["score"] for r in rank(results, key)] == [2.0, -1.0, None]
+
+
+def test_rank_by_goals_per_cpu_minute():
+    cheap = {"score": 1.0, "goals_per_cpu_minute": 2.0, "cpu_minutes": 1.0}
+    costly = {"score": 2.0, "goals_per_cpu_minute": 1.0, "cpu_minutes": 4.0}
+    assert rank([costly, cheap]) == [cheap, costly]
+    assert rank([cheap, costly], "score") == [costly, cheap]
+
+
+def test_rank_losing_candidates():
+    def result(goal_difference, cpu_time):
+        match = MatchResult(Fixture(1, BASELINE, CANDIDATE, half=2))
+        match.status = FINISHED
+        match.scores = {"blue": -goal_difference, "yellow": 0}
+        match.cpu_time = cpu_time
+        return summarize({"cpu_time": cpu_time}, [match])
+
+    slow, quick, draw = result(-2, 120), result(-2, 30), result(0, 240)
+    assert slow["goals_per_cpu_minute"] > quick["goals_per_cpu_minute"]
+    # Burning more CPU time does not make a loss any better by score
+    assert rank([slow, quick, draw], "score") == [draw, quick, slow]
+    assert rank([slow, quick, draw]) == [draw, slow, quick]
+
+
+def test_evaluator_with_fake_simulator(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv("FAKE_SIM_GOALS_BLUE", "1")
+    world = generate_world(world_params({}), cache_dir=tmp_path)
+    evaluate = MatchEvaluator(
+        tmp_path / "output",
+        FAKE_SIMULATOR,
+        world,
+        seeds=[1, 2],
+        workers=2,
+        pin_cpus=False,
+        poll_interval=0.01,
+    )
+    batch = [DEFAULTS, to_params([0.5, 0.5, 0.5])]
+    first = evaluate(batch)
+    second = evaluate(batch[:1])
+
+    for result in first + second:
+        # Each team scores once as blue in each match
+        assert result["matches"] == 2
+        assert result["goal_difference"] == 0
+        assert result["cpu_minutes"] > 0
+        assert result["score"] == 0
+    assert first[1]["params"] == batch[1]
+    assert len(list((tmp_path / "output").glob("batch-*/*_-_*"))) == 12
+
+
+def test_cli(tmp_path: Path, monkeypatch, capsys):
+    monkeypatch.setenv("FAKE_SIM_GOALS_YELLOW", "1")
+    main(
+        [
+            str(tmp_path / "sweep"),
+            "--simulator",
+            " ".join(FAKE_SIMULATOR),
+            "--search",
+            "random",
+            "--budget",
+            "3",
+            "--batch-size",
+            "3",
+            "--seeds",
+            "1",
+            "--cache-dir",
+            str(tmp_path),
+            "--random-seed",
+            "1",
+            "--rank-by",
+            "score",
+        ]
+    )
+    results = json.loads((tmp_path / "sweep" / RESULTS_FILE).read_text())
+    assert len(results) == 3
+    assert {r["matches"] for r in results} == {1}
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith("goals per match\t")
+    assert len(lines) == 4
+    assert len(list(tmp_path.glob("soccer-headless-*.wbt"))) == 1
@@ -0,0 +1,270 @@
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+from string import Template
+
+import pytest
+
+from tournament.runner import Fixture, TournamentRunner
+from tournament.worlds import (
+    CONFIG_KEYS,
+    DEFAULT_PHYSICS,
+    generate_world,
+    main,
+    PHYSICS_PROFILES,
+    read_config_file,
+    REFEREE_DIR,
+    set_world_info,
+    strip_world,
+    TEMPLATE,
+    WORLD_DEFAULTS,
+    world_params,
+)
+
+# The robots of the supervisor (referee/consts.py)
+ROBOT_NAMES = ["B1", "B2", "B3", "Y1", "Y2", "Y3"]
+
+
+def write_template(path: Path, text: str = "range $ir_range\n") -> Path:
+    path.write_text(
+        text + "".join(f"# ${param}\n" for param in WORLD_DEFAULTS)
+    )
+    return path
+
+
+def referee_config(path: Path) -> tuple:
+    """Get the default config of the referee and the config file as read by
+    the referee, in its own package."""
+    code = (
+        "import json, sys\n"
+        "from pathlib import Path\n"
+        "from referee.config import DEFAULT_CONFIG, read_config_file\n"
+        "print(json.dumps(DEFAULT_CONFIG))\n"
+        "print(json.dumps(read_config_file(Path(sys.argv[1]))))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code, str(path)],
+        cwd=REFEREE_DIR,
+        check=True,
+        stdout=subprocess.PIPE,
+    ).stdout
+    defaults, config = output.decode().splitlines()
+    return json.loads(defaults), json.loads(config)
+
+
+def test_same_config_as_the_referee(tmp_path: Path):
+    path = tmp_path / "match.json"
+    path.write_text(json.dumps({"blue": {"rgb": "0 0 0.5"}}))
+    defaults, config = referee_config(path)
+
+    # The world of a match without a config is the one the referee expects
+    assert WORLD_DEFAULTS == {
+        param: str(defaults[section][key])
+        for param, (section, key) in CONFIG_KEYS.items()
+    }
+    assert DEFAULT_PHYSICS == defaults["world"]["physics"]
+    assert read_config_file(path) == config
+
+
+def test_world_params():
+    assert world_params({}) == WORLD_DEFAULTS
+
+    params = world_params(
+        {
+            "blue": {"rgb": "0 0 0.5", "name": "Team A"},
+            "robot": {"ir_range": 0.8},
+            "match": {"time": 60},
+        }
+    )
+    assert params["blue_rgb"] == "0 0 0.5"
+    assert params["ir_range"] == "0.8"
+    assert params["yellow_rgb"] == WORLD_DEFAULTS["yellow_rgb"]
+
+
+def test_worlds_are_cached(tmp_path: Path):
+    template = write_template(tmp_path / "soccer.wbt.template")
+    cache_dir = tmp_path / "worlds"
+
+    path = generate_world(WORLD_DEFAULTS, template, cache_dir)
+    assert path.read_text().startswith("range 0.6\n")
+
+    # The cached world is not generated again
+    path.write_text("cached")
+    assert generate_world(dict(WORLD_DEFAULTS), template, cache_dir) == path
+    assert path.read_text() == "cached"
+
+    params = {**WORLD_DEFAULTS, "ir_range": "0.8"}
+    other_path = generate_world(params, template, cache_dir)
+    assert other_path != path
+    assert other_path.read_text().startswith("range 0.8\n")
+
+    # A change of the template invalidates the cache
+    write_template(template, "ir $ir_range\n")
+    assert generate_world(WORLD_DEFAULTS, template, cache_dir) != path
+    assert not list(cache_dir.glob("*.tmp"))
+
+
+def test_sample_template_is_complete(tmp_path: Path):
+    path = generate_world(WORLD_DEFAULTS, TEMPLATE, tmp_path)
+    assert 'controller "rcj_soccer_team_blue"' in path.read_text()
+
+
+def test_runner_plays_in_the_world_of_the_config(tmp_path: Path):
+    config = tmp_path / "match.json"
+    config.write_text(json.dumps({"robot": {"ir_range": 0.8}}))
+    headless_config = tmp_path / "headless.json"
+    headless_config.write_text(json.dumps({"referee": {"headless": True}}))
+    world = tmp_path / "worlds" / "soccer.wbt"
+
+    fixtures = [
+        Fixture(1, "A", "B", config=str(config)),
+        Fixture(1, "B", "A", half=2, config=str(config)),
+        Fixture(2, "C", "D"),
+        Fixture(3, "C", "D", config=str(headless_config)),
+    ]
+    runner = TournamentRunner(fixtures, tmp_path / "output", world=world)
+    first, second, third, fourth = [runner.world_of(f) for f in fixtures]
+
+    assert first == second
+    assert first.parent == world.parent
+    assert "range 0.8" in first.read_text()
+    assert third == world
+    assert fourth.name.startswith("soccer-headless-")
+    assert runner.command(1237, first)[-2:] == ["--port=1237", str(first)]
+    assert fixtures[0].environment({})["RCJ_SIM_CONFIG"] == str(config)
+
+
+def test_cli(tmp_path: Path, capsys):
+    config = tmp_path / "match.json"
+    config.write_text(json.dumps({"blue": {"controller": "p_12345"}}))
+    main([str(config), "--cache-dir", str(tmp_path)])
+
+    path = Path(capsys.readouterr().out.strip())
+    assert 'controller "p_12345"' in path.read_text()
+
+
+def test_headless_world_keeps_what_the_simulation_needs():
+    world = Template(TEMPLATE.read_text()).substitute(WORLD_DEFAULTS)
+    headless = strip_world(world)
+
+    for removed in ("appearance", "ImageTexture", "TexturedBackground"):
+        assert removed in world
+        assert removed not in headless
+
+    # The nodes the supervisor looks up and the bounding boxes are kept
+    for name in ROBOT_NAMES + ["BALL", "SOCCER_FIELD", "GROUND"]:
+        assert f"DEF {name} " in headless
+    bboxes = re.findall(r"DEF \w+_BBOX ", world)
+    assert len(bboxes) == 16
+    assert re.findall(r"DEF \w+_BBOX ", headless) == bboxes
+
+    # So are the physics and the devices of the robots
+    for node in (
+        "Physics {",
+        "boundingObject ",
+        "DistanceSensor {",
+        "Receiver {",
+        "Emitter {",
+        "GPS {",
+        "Compass {",
+        "RotationalMotor {",
+    ):
+        assert headless.count(node) == world.count(node)
+    # The ground, the ball and the body and the wheels of each robot
+    assert headless.count("Shape {") == 2 + 3 * len(ROBOT_NAMES)
+    assert len(headless) < len(world) * 2 / 3
+
+
+def test_bounding_objects_are_not_stripped():
+    world = (
+        "Robot {\n"
+        "  children [\n"
+        "    Shape {\n"
+        "      geometry Box {\n"
+        "      }\n"
+        "    }\n"
+        "    Solid {\n"
+        "      boundingObject Shape {\n"
+        "        appearance USE LOOK\n"
+        "        geometry Sphere {\n"
+        "        }\n"
+        "      }\n"
+        "    }\n"
+        "  ]\n"
+        "}\n"
+    )
+    headless = strip_world(world)
+    assert "Box" not in headless
+    assert "boundingObject Shape {\n        geometry Sphere" in headless
+
+    with pytest.raises(ValueError, match="not closed"):
+        strip_world("Shape {\n  geometry Box {\n  }\n")
+    with pytest.raises(ValueError, match="BOX"):
+        strip_world(
+            "Shape {\n"
+            "  geometry DEF BOX Box {\n"
+            "  }\n"
+            "}\n"
+            "Solid {\n"
+            "  boundingObject USE BOX\n"
+            "}\n"
+        )
+
+
+def test_headless_worlds_are_cached_apart(tmp_path: Path):
+    template = write_template(
+        tmp_path / "soccer.wbt.template",
+        "Shape {\n  appearance USE LOOK\n}\nRobot {\n  range $ir_range\n}\n",
+    )
+    path = generate_world(WORLD_DEFAULTS, template, tmp_path)
+    headless_path = generate_world(
+        WORLD_DEFAULTS, template, tmp_path, headless=True
+    )
+
+    assert headless_path != path
+    assert headless_path.name.startswith("soccer-headless-")
+    assert "Shape" in path.read_text()
+    assert headless_path.read_text().startswith("Robot {\n  range 0.6\n}")
+
+
+def test_physics_profiles(tmp_path: Path):
+    world = (
+        "#VRML_SIM R2022a utf8\n"
+        "WorldInfo {\n"
+        "  info [\n"
+        '    "optimalThreadCount 8"\n'
+        "  ]\n"
+        "  optimalThreadCount 8\n"
+        "}\n"
+        "Robot {\n"
+        "}\n"
+    )
+    assert set_world_info(world, {}) == world
+    assert set_world_info(world, PHYSICS_PROFILES["fast"]) == (
+        "#VRML_SIM R2022a utf8\n"
+        "WorldInfo {\n"
+        "  info [\n"
+        '    "optimalThreadCount 8"\n'
+        "  ]\n"
+        "  optimalThreadCount 1\n"
+        "  physicsDisableTime 1\n"
+        "}\n"
+        "Robot {\n"
+        "}\n"
+    )
+
+    path = generate_world(WORLD_DEFAULTS, TEMPLATE, tmp_path)
+    screening = generate_world(
+        WORLD_DEFAULTS, TEMPLATE, tmp_path, physics="screening"
+    )
+    assert screening.name.startswith("soccer-screening-")
+    text = screening.read_text()
+    assert "maxContactJoints 2" in text
+    assert text.count("optimalThreadCount") == 1
+    # The rest of the world is the same
+    assert text.split("Viewpoint")[1] == path.read_text().split("Viewpoint")[1]
+
+    with pytest.raises(ValueError, match="Unknown physics profile"):
+        generate_world(WORLD_DEFAULTS, TEMPLATE, tmp_path, physics="exact")
@@ -0,0 +1,335 @@
+"""Generation of the worlds from the match config, cached by their parameters.
+
+The generated worlds are stored next to the sample world (so that the
+textures and the controllers are found relative to them) and named after
+the hash of the template and of the parameters, so that a world is only
+generated once for all of the matches which are played in it.
+
+The physics of the world can be relaxed by one of the PHYSICS_PROFILES,
+which are cheaper to simulate but less faithful than the competition one.
+
+The matches which are played headless get a variant of the world without
+the appearances, textures and purely visual shapes, which only keeps what
+the physics, the devices and the supervisor need.
+
+The config files are read and the worlds defaulted by the referee's own
+`referee/config_file.py`, which is loaded by its path.
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import re
+from pathlib import Path
+from string import Template
+from types import ModuleType
+from typing import Dict, List, Optional, Sequence, Set
+
+TEMPLATE = Path(__file__).parents[1] / "templates" / "soccer.wbt.template"
+WORLDS_DIR = Path(__file__).parents[2] / "worlds"
+WORLD_PREFIX = "soccer-"
+HEADLESS_WORLD_PREFIX = "soccer-headless-"
+REFEREE_DIR = (
+    Path(__file__).parents[2] / "controllers" / "rcj_soccer_referee_supervisor"
+)
+
+
+def load_referee_module(name: str) -> ModuleType:
+    """Load a module of the referee, whose package is not importable from the
+    scripts, by its path. The module must only import the standard library.
+    """
+    path = REFEREE_DIR / "referee" / f"{name}.py"
+    spec = importlib.util.spec_from_file_location(f"referee_{name}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+config_file = load_referee_module("config_file")
+read_config_file = config_file.read_config_file
+
+# The WorldInfo fields set by each physics profile. The basicTimeStep stays
+# at the default 32 ms, which is the step of the referee and the robots.
+DEFAULT_PHYSICS = config_file.WORLD_CONFIG["world"]["physics"]
+PHYSICS_PROFILES: Dict[str, Dict[str, str]] = {
+    # The world as it is played in the competition
+    "competition": {},
+    # The physics of this small world run quicker on a single thread when
+    # the simulators share the CPUs, and the bodies which are at rest for a
+    # second are not simulated until something touches them
+    "fast": {
+        "optimalThreadCount": "1",
+        "physicsDisableTime": "1",
+    },
+    # Fewer contact joints make the steps cheaper, and the softer and less
+    # stiff contacts keep them stable
+    "screening": {
+        "optimalThreadCount": "1",
+        "physicsDisableTime": "0.5",
+        "ERP": "0.6",
+        "CFM": "0.0001",
+        "contactProperties": (
+            "[\n"
+            "    ContactProperties {\n"
+            "      maxContactJoints 2\n"
+            "    }\n"
+            "  ]"
+        ),
+    },
+}
+
+# Nodes and fields which are only needed for rendering the world
+VISUAL_NODES = re.compile(r"(TexturedBackground|TexturedBackgroundLight) \{$")
+VISUAL_FIELDS = re.compile(r"(appearance|texCoord|texCoordIndex) ")
+SHAPE = re.compile(r"(DEF (\w+) )?Shape \{$")
+DEF = re.compile(r"DEF (\w+) ")
+USE = re.compile(r"\bUSE (\w+)")
+WORLD_INFO_FIELD = re.compile(r"  (\w+) ")
+
+# Section and key of the config value of each template parameter
+CONFIG_KEYS = {
+    "blue_rgb": ("blue", "rgb"),
+    "yellow_rgb": ("yellow", "rgb"),
+    "blue_png_url": ("blue", "png_url"),
+    "yellow_png_url": ("yellow", "png_url"),
+    "controller_blue": ("blue", "controller"),
+    "controller_yellow": ("yellow", "controller"),
+    "ir_range": ("robot", "ir_range"),
+}
+# The parameters of the world the referee expects without a config
+WORLD_DEFAULTS = {
+    param: str(config_file.WORLD_CONFIG[section][key])
+    for param, (section, key) in CONFIG_KEYS.items()
+}
+
+
+def world_params(config: dict) -> Dict[str, str]:
+    """Get the template parameters from the match config.
+
+    Args:
+        config (dict): The match config, only the values affecting the world
+            are used
+
+    Returns:
+        dict: The parameters of the world template
+    """
+    params = dict(WORLD_DEFAULTS)
+    for param, (section, key) in CONFIG_KEYS.items():
+        value = config.get(section, {}).get(key)
+        if value is not None:
+            params[param] = str(value)
+    return params
+
+
+def block_end(lines: List[str], start: int) -> int:
+    """Get the index of the line after the block opened on the start line.
+
+    The worlds are expected to be formatted the way Webots saves them, with
+    the closing bracket of a block indented the same as its first line.
+    """
+    line = lines[start]
+    if not line.rstrip().endswith(("{", "[")):
+        return start + 1
+
+    indent = line[: len(line) - len(line.lstrip())]
+    for end in range(start + 1, len(lines)):
+        if lines[end].startswith(indent + "}") or lines[end].startswith(
+            indent + "]"
+        ):
+            return end + 1
+    raise ValueError(f"The block on line {start + 1} is not closed")
+
+
+def is_visual(line: str, used: Set[str]) -> bool:
+    """Check whether the node or field on the line is only rendered."""
+    stripped = line.strip()
+    if not line.startswith(" ") and VISUAL_NODES.match(stripped):
+        return True
+
+    # The shapes which are also used as the bounding objects are kept
+    shape = SHAPE.match(stripped)
+    return shape is not None and shape.group(2) not in used
+
+
+def strip_world(text: str) -> str:
+    """Strip the world down to what the simulation of a match needs.
+
+    The appearances, textures, background and the shapes which are not
+    used as bounding objects are left out. The bounding objects, physics,
+    devices and DEF names (which the supervisor looks the nodes up by) are
+    kept.
+
+    Raises:
+        ValueError: If a node which is still used would be left out
+    """
+    lines = text.splitlines(keepends=True)
+    used = set(USE.findall(text))
+    kept = []
+    # Indentation of the bounding objects and of the nodes which are used
+    # elsewhere, all of their children are kept
+    used_blocks: List[str] = []
+
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        if used_blocks and line.startswith(used_blocks[-1] + "}"):
+            used_blocks.pop()
+
+        stripped = line.strip()
+        if VISUAL_FIELDS.match(stripped) or (
+            not used_blocks and is_visual(line, used)
+        ):
+            index = block_end(lines, index)
+            continue
+
+        node = DEF.search(line)
+        if stripped.endswith("{") and (
+            stripped.startswith("boundingObject ")
+            or (node is not None and node.group(1) in used)
+        ):
+            used_blocks.append(line[: len(line) - len(line.lstrip())])
+
+        kept.append(line)
+        index += 1
+
+    world = "".join(kept)
+    missing = set(USE.findall(world)) - set(DEF.findall(world))
+    if missing:
+        raise ValueError(f"The nodes {sorted(missing)} would be left out")
+    return world
+
+
+def is_headless(config: dict) -> bool:
+    """Check whether the matches of the config are played headless, which
+    is also when the world is stripped down."""
+    return bool(config.get("referee", {}).get("headless", False))
+
+
+def physics_profile(config: dict) -> str:
+    """Get the physics profile of the world of the match config."""
+    return config.get("world", {}).get("physics", DEFAULT_PHYSICS)
+
+
+def set_world_info(world: str, fields: Dict[str, str]) -> str:
+    """Set the fields of the WorldInfo node of the world.
+
+    Args:
+        world (str): The world
+        fields (dict): The values of the fields, as written in the world
+
+    Returns:
+        str: The world with the fields replaced or added
+    """
+    if not fields:
+        return world
+
+    lines = world.splitlines(keepends=True)
+    start = next(
+        index
+        for index, line in enumerate(lines)
+        if line.startswith("WorldInfo {")
+    )
+    end = block_end(lines, start) - 1
+
+    info = []
+    index = start + 1
+    while index < end:
+        field = WORLD_INFO_FIELD.match(lines[index])
+        if field is not None and field.group(1) in fields:
+            index = block_end(lines, index)
+            continue
+        info.append(lines[index])
+        index += 1
+    info.extend(f"  {name} {value}\n" for name, value in fields.items())
+
+    return "".join(lines[: start + 1] + info + lines[end:])
+
+
+def world_key(template: str, params: Dict[str, str]) -> str:
+    digest = hashlib.sha256(template.encode("utf8"))
+    digest.update(json.dumps(params, sort_keys=True).encode("utf8"))
+    return digest.hexdigest()
+
+
+def generate_world(
+    params: Dict[str, str],
+    template_path: Path = TEMPLATE,
+    cache_dir: Path = WORLDS_DIR,
+    headless: bool = False,
+    physics: str = DEFAULT_PHYSICS,
+) -> Path:
+    """Get the world with the parameters, generating it if it is not cached.
+
+    Args:
+        params (dict): The parameters of the world template
+        template_path (Path): The world template
+        cache_dir (Path): Directory of the generated worlds
+        headless (bool): Whether to generate the variant of the world which
+            is stripped down for matches nobody watches
+        physics (str): The physics profile of the world
+
+    Returns:
+        Path: Path of the world
+
+    Raises:
+        ValueError: If the physics profile is not known
+    """
+    if physics not in PHYSICS_PROFILES:
+        raise ValueError(f"Unknown physics profile {physics}")
+
+    template = template_path.read_text()
+    fields = PHYSICS_PROFILES[physics]
+    key = world_key(template, {**params, **fields})
+    prefix = HEADLESS_WORLD_PREFIX if headless else WORLD_PREFIX
+    if physics != DEFAULT_PHYSICS:
+        prefix += f"{physics}-"
+    path = cache_dir / f"{prefix}{key[:16]}.wbt"
+    if path.exists():
+        return path
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Written under a unique name first, as several runs might be generating
+    # the same world at the same time
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    world = set_world_info(Template(template).substitute(params), fields)
+    tmp_path.write_text(strip_world(world) if headless else world)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        description="Get the (cached) world of the match config."
+    )
+    parser.add_argument("config", type=Path, help="TOML or JSON match config")
+    parser.add_argument("--template", type=Path, default=TEMPLATE)
+    parser.add_argument("--cache-dir", type=Path, default=WORLDS_DIR)
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="strip the world down, as set by `headless` in [referee]",
+    )
+    parser.add_argument(
+        "--physics",
+        choices=list(PHYSICS_PROFILES),
+        help="physics profile, as set by `physics` in [world]",
+    )
+    args = parser.parse_args(argv)
+
+    config = read_config_file(args.config)
+    headless = args.headless or is_headless(config)
+    params = world_params(config)
+    print(
+        generate_world(
+            params,
+            args.template,
+            args.cache_dir,
+            headless,
+            args.physics or physics_profile(config),
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()